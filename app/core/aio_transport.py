@@ -0,0 +1,452 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import serial
+
+from .deframer import DEFAULT_MAX_FRAME_LEN
+from .dispatcher import AckTracker, RetryPolicy
+from .protocol import MsgType, Packet
+from .serial_interface import SerialInterface
+
+logger = logging.getLogger(__name__)
+
+class EventLoopThread:
+    """在后台线程中运行的 asyncio 事件循环；call() 供其他线程同步调用循环线程中的函数"""
+    def __init__(self, name: str = "AsyncioLoop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True, name=name)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def in_loop(self) -> bool:
+        return threading.current_thread() is self.thread
+
+    def call(self, fn: Callable, *args, timeout: Optional[float] = 5.0):
+        """在循环线程中执行 fn(*args) 并返回结果（已在循环线程中时直接调用）"""
+        if self.in_loop():
+            return fn(*args)
+        future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        self.loop.call_soon_threadsafe(run)
+        return future.result(timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1.0)
+
+_shared_loop: Optional[EventLoopThread] = None
+_shared_lock = threading.Lock()
+
+def shared_loop_thread() -> EventLoopThread:
+    """进程内共享的 I/O 事件循环线程（首次使用时启动）"""
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            _shared_loop = EventLoopThread()
+        return _shared_loop
+
+class SerialTransport(asyncio.Transport):
+    """
+    pyserial 端口上的 asyncio Transport。
+
+    端口有可 select 的文件描述符且事件循环支持 add_reader（POSIX 串口 / pty）时，读写都由事件循环驱动：
+    可读时用 os.readv 读入复用缓冲区，写入先直接 os.write，写不完的部分挂 add_writer 续写。
+    否则（Windows 的 Proactor 循环、loop:// 等 URL 端口）退回一个阻塞读线程，读到的数据经
+    call_soon_threadsafe 交给协议，写入直接调用 serial.write。
+    data_received 收到的可能是复用缓冲区上的 memoryview，只在回调期间有效。
+    last_read_time 为最近一次读取返回的时刻（单调时钟），读线程模式下在读线程中取得。
+    """
+    max_read = 65536
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, protocol: asyncio.Protocol, serial_instance,
+                 use_reader: Optional[bool] = None):
+        super().__init__()
+        self._loop = loop
+        self._protocol = protocol
+        self._serial = serial_instance
+        self._write_buf = bytearray()
+        self._closing = False
+        self._closed = False
+        self._fd: Optional[int] = None
+        self._reader_thread: Optional[threading.Thread] = None
+        self.last_read_time = 0.0
+        self._buf = bytearray(self.max_read)
+        self._view = memoryview(self._buf)
+        if use_reader is not False:
+            self._fd = self._attach_reader()
+        if self._fd is None:
+            self._reader_thread = threading.Thread(target=self._read_thread, daemon=True, name="SerialRx")
+        loop.call_soon(protocol.connection_made, self)
+        if self._reader_thread is not None:
+            loop.call_soon(self._reader_thread.start)
+
+    def _attach_reader(self) -> Optional[int]:
+        try:
+            fd = self._serial.fileno()
+        except Exception:
+            return None
+        if not hasattr(os, "readv"):
+            return None
+        try:
+            self._loop.add_reader(fd, self._read_ready)
+        except NotImplementedError:
+            return None
+        return fd
+
+    @property
+    def event_driven(self) -> bool:
+        return self._fd is not None
+
+    def get_extra_info(self, name, default=None):
+        if name == "serial":
+            return self._serial
+        return default
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    # 读取
+    def _read_ready(self):
+        try:
+            n = os.readv(self._fd, [self._view])
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fatal(e)
+            return
+        if n == 0:
+            return
+        self.last_read_time = time.perf_counter()
+        self._protocol.data_received(self._view[:n])
+
+    def _read_thread(self):
+        ser = self._serial
+        while not self._closing:
+            try:
+                data = ser.read(min(max(ser.in_waiting, 1), self.max_read))
+            except Exception as e:
+                if not self._closing:
+                    self._loop.call_soon_threadsafe(self._fatal, e)
+                return
+            if data:
+                t = time.perf_counter()
+                try:
+                    self._loop.call_soon_threadsafe(self._deliver, data, t)
+                except RuntimeError: # 事件循环已关闭
+                    return
+
+    def _deliver(self, data: bytes, t: float):
+        if not self._closing:
+            self.last_read_time = t
+            self._protocol.data_received(data)
+
+    # 写入
+    def write(self, data):
+        if self._closing or not data:
+            return
+        if self._fd is None:
+            try:
+                self._serial.write(data)
+            except Exception as e:
+                self._fatal(e)
+            return
+        if self._write_buf:
+            self._write_buf += data
+            return
+        try:
+            n = os.write(self._fd, data)
+        except (BlockingIOError, InterruptedError):
+            n = 0
+        except OSError as e:
+            self._fatal(e)
+            return
+        if n < len(data):
+            self._write_buf += memoryview(data)[n:]
+            self._loop.add_writer(self._fd, self._write_ready)
+
+    def _write_ready(self):
+        try:
+            n = os.write(self._fd, self._write_buf)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fatal(e)
+            return
+        del self._write_buf[:n]
+        if not self._write_buf:
+            self._loop.remove_writer(self._fd)
+            if self._closing:
+                self._finish_close(None)
+
+    def get_write_buffer_size(self) -> int:
+        return len(self._write_buf)
+
+    # 关闭
+    def close(self):
+        """发送缓冲写完后关闭端口"""
+        if self._closing:
+            return
+        self._closing = True
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+        if not self._write_buf:
+            self._loop.call_soon(self._finish_close, None)
+
+    def abort(self):
+        self._force_close(None)
+
+    def _fatal(self, exc: BaseException):
+        logger.error(f"串口传输错误: {exc}")
+        self._force_close(exc)
+
+    def _force_close(self, exc: Optional[BaseException]):
+        self._closing = True
+        self._write_buf.clear()
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+        self._finish_close(exc)
+
+    def _finish_close(self, exc: Optional[BaseException]):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._serial.close()
+        except Exception:
+            pass
+        if self._reader_thread is not None and self._reader_thread is not threading.current_thread():
+            self._reader_thread.join(1.0)
+        self._protocol.connection_lost(exc)
+
+class AioSerialInterface(SerialInterface, asyncio.Protocol):
+    """
+    SerialInterface 的 asyncio 实现：收发都在事件循环线程中完成，不再使用 SerialRx/SerialTx 线程。
+    open()/close()/send() 可从任意线程调用；同一轮事件循环内 send 的包合并为一次写入。
+    分帧、时间戳与统计沿用 SerialInterface，rx_callback 在事件循环线程中调用。
+    """
+    def __init__(self, port: str, baudrate: int = 115200, max_frame_len: int = DEFAULT_MAX_FRAME_LEN,
+                 loop_thread: Optional[EventLoopThread] = None):
+        super().__init__(port, baudrate, max_frame_len)
+        self.loop_thread = loop_thread or shared_loop_thread()
+        self.loop = self.loop_thread.loop
+        self.transport: Optional[SerialTransport] = None
+        self._tx_pending: List[Packet] = []
+
+    # 同步接口（任意线程）
+    def open(self) -> bool:
+        return self.loop_thread.call(self.open_in_loop)
+
+    def close(self):
+        self.loop_thread.call(self.close_in_loop)
+
+    def send(self, packet: Packet):
+        if self.loop_thread.in_loop():
+            self._queue(packet)
+        else:
+            self.loop.call_soon_threadsafe(self._queue, packet)
+
+    # 事件循环线程
+    def open_in_loop(self) -> bool:
+        if self.transport is not None:
+            return True
+        try:
+            ser = serial.serial_for_url(self.port, self.baudrate, timeout=0.1)
+        except Exception as e:
+            logger.error(f"打开串口 {self.port} 失败: {e}")
+            self.connected = False
+            return False
+        self.running = True
+        self.connected = True
+        self.transport = SerialTransport(self.loop, self, ser)
+        logger.info(f"已连接到 {self.port} @ {self.baudrate}")
+        return True
+
+    def close_in_loop(self):
+        self.running = False
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        self._tx_pending = []
+        self.connected = False
+        logger.info("串口已关闭")
+
+    def _queue(self, packet: Packet):
+        self._tx_pending.append(packet)
+        if len(self._tx_pending) == 1:
+            self.loop.call_soon(self._flush)
+
+    def _flush(self):
+        batch, self._tx_pending = self._tx_pending, []
+        transport = self.transport
+        if not batch or transport is None or transport.is_closing():
+            return
+        data = b"".join([packet.serialize() for packet in batch])
+        transport.write(data)
+        self.stats['tx_packets'] += len(batch)
+        self.stats['tx_writes'] += 1
+        self.stats['bytes_sent'] += len(data)
+
+    # asyncio.Protocol
+    def connection_made(self, transport):
+        self.deframer.reset()
+
+    def data_received(self, data):
+        transport = self.transport
+        self._rx_time = transport.last_read_time if transport is not None else time.perf_counter()
+        self.stats['bytes_received'] += len(data)
+        self.deframer.feed(data, self._handle_frame)
+        self.stats['rx_overflows'] = self.deframer.stats['overflows']
+
+    def connection_lost(self, exc):
+        if exc is not None:
+            logger.error(f"串口连接断开: {exc}")
+        self.connected = False
+        self.transport = None
+
+class AckFuture(asyncio.Future):
+    """send() 返回的可等待对象：结果为 True（已确认或无需确认）或 False（重试耗尽）；seq 为包序号"""
+    def __init__(self, seq: int, *, loop=None):
+        super().__init__(loop=loop)
+        self.seq = seq
+
+class AsyncDispatcher:
+    """
+    Dispatcher 的 asyncio 版本，全部状态只在事件循环线程中访问。
+    ACK 重发与统计与 Dispatcher 共用 AckTracker，定时器为 call_later（按消息类型的 RetryPolicy 超时重发，
+    重试耗尽时结果为 False）；看门狗定时器按最后一次收包时刻重新排期，不再需要周期扫描。
+    """
+    WATCHDOG_TIMEOUT = 1.0
+
+    def __init__(self, link: SerialInterface, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 retry_policies: Optional[Dict[MsgType, RetryPolicy]] = None):
+        self.link = link
+        self.loop = loop or asyncio.get_event_loop()
+        link.set_callback(self._on_packet_received)
+        self.handlers: Dict[MsgType, Callable[[Packet], None]] = {}
+        self.telemetry_handlers = []
+        self.acks = AckTracker(self.loop.call_later, link.send, retry_policies)
+        self.seq_counter = 0
+        self.last_heartbeat = time.perf_counter()
+        self.watchdog_callback: Optional[Callable[[], None]] = None
+        self._watchdog: Optional[asyncio.TimerHandle] = None
+
+    def register_handler(self, msg_type: MsgType, handler: Callable[[Packet], None]):
+        self.handlers[msg_type] = handler
+
+    def register_telemetry_handler(self, handler: Callable[[Packet], None]):
+        self.telemetry_handlers.append(handler)
+
+    def set_watchdog_callback(self, callback: Callable[[], None]):
+        self.watchdog_callback = callback
+        if self._watchdog is None:
+            self._watchdog = self.loop.call_later(self.WATCHDOG_TIMEOUT, self._check_watchdog)
+
+    def set_retry_policy(self, msg_type: MsgType, policy: RetryPolicy):
+        self.acks.set_retry_policy(msg_type, policy)
+
+    def send(self, msg_type: MsgType, payload: bytes = b'', need_ack: bool = False,
+             policy: Optional[RetryPolicy] = None) -> AckFuture:
+        seq = self._next_seq()
+        packet = Packet(msg_type, payload, seq=seq)
+        future = AckFuture(seq, loop=self.loop)
+        if need_ack:
+            self.acks.track(packet, lambda ok: future.done() or future.set_result(ok), policy)
+            future.add_done_callback(lambda f, seq=seq: f.cancelled() and self.acks.discard(seq))
+        else:
+            future.set_result(True)
+        self.link.send(packet)
+        return future
+
+    def _next_seq(self) -> int:
+        self.seq_counter = (self.seq_counter + 1) & 0xFFFF
+        return self.seq_counter
+
+    def ack_summary(self) -> Dict[str, dict]:
+        return self.acks.summary()
+
+    def _on_packet_received(self, packet: Packet):
+        self.last_heartbeat = max(self.last_heartbeat, packet.timestamp)
+        if packet.msg_type == MsgType.ACK:
+            self._handle_ack(packet)
+            return
+        if packet.msg_type == MsgType.TELEMETRY:
+            for h in self.telemetry_handlers:
+                h(packet)
+        elif packet.msg_type in self.handlers:
+            self.handlers[packet.msg_type](packet)
+        else:
+            logger.debug(f"未处理的数据包类型: {packet.msg_type}")
+
+    def _handle_ack(self, packet: Packet):
+        # ACK 载荷通常包含被确认的序列号 (uint16)
+        if len(packet.payload) >= 2:
+            self.acks.ack(struct.unpack('<H', packet.payload[:2])[0], packet.timestamp)
+
+    def _check_watchdog(self):
+        idle = time.perf_counter() - self.last_heartbeat
+        if idle >= self.WATCHDOG_TIMEOUT:
+            if self.watchdog_callback:
+                self.watchdog_callback()
+            delay = self.WATCHDOG_TIMEOUT
+        else:
+            delay = self.WATCHDOG_TIMEOUT - idle
+        self._watchdog = self.loop.call_later(delay, self._check_watchdog)
+
+    def close(self):
+        """取消全部定时器，未确认的包结果为 False"""
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        self.acks.close()
+
+class SyncDispatcher:
+    """
+    保留原 Dispatcher 同步接口的薄适配层：调用转到事件循环线程中的 AsyncDispatcher。
+    send() 返回序号，need_ack 时 callback(bool) 在事件循环线程中调用（与原实现一样不在主线程）。
+    """
+    def __init__(self, serial_interface: AioSerialInterface):
+        self.serial = serial_interface
+        self.loop_thread = serial_interface.loop_thread
+        self.core: AsyncDispatcher = self.loop_thread.call(AsyncDispatcher, serial_interface, self.loop_thread.loop)
+
+    def register_handler(self, msg_type: MsgType, handler: Callable[[Packet], None]):
+        self.loop_thread.call(self.core.register_handler, msg_type, handler)
+
+    def register_telemetry_handler(self, handler: Callable[[Packet], None]):
+        self.loop_thread.call(self.core.register_telemetry_handler, handler)
+
+    def set_watchdog_callback(self, callback: Callable[[], None]):
+        self.loop_thread.call(self.core.set_watchdog_callback, callback)
+
+    def send(self, msg_type: MsgType, payload: bytes = b'', need_ack: bool = False,
+             callback: Callable[[bool], None] = None) -> int:
+        def submit():
+            future = self.core.send(msg_type, payload, need_ack)
+            if need_ack and callback is not None:
+                future.add_done_callback(lambda f: None if f.cancelled() else callback(f.result()))
+            return future.seq
+        return self.loop_thread.call(submit)
+
+    def set_retry_policy(self, msg_type: MsgType, policy: RetryPolicy):
+        self.loop_thread.call(self.core.set_retry_policy, msg_type, policy)
+
+    def ack_summary(self) -> Dict[str, dict]:
+        return self.loop_thread.call(self.core.ack_summary)
+
+    def close(self):
+        self.loop_thread.call(self.core.close)
@@ -1,8 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from array import array
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Any, Optional, Set
+import math
 import time
 import numpy as np
 
+from .log_store import ColumnarLog, LogView, as_log_view
+from .binning import bin_codes, group_by
+from .metrics import response_metrics
+from .online_model import OnlineModelTable
+from .quantile import KLLSketch
+from .tuning import Optimizer, TuningProblem, run_search
+
 class AlgorithmBase(ABC):
     """
     算法插件的抽象基类。
@@ -13,6 +23,7 @@ class AlgorithmBase(ABC):
         self.inputs = [] # 所需的遥测键列表
         self.outputs = [] # 生成的输出键列表
         self.enabled = True
+        self.deadline: Optional[float] = None # 独立进程模式下每块的执行时限（秒），None 时使用宿主默认值
 
     @abstractmethod
     def init(self):
@@ -31,6 +42,30 @@ class AlgorithmBase(ABC):
         """
         pass
 
+    def update_batch(self, columns: Dict[str, np.ndarray], dt) -> Dict[str, np.ndarray]:
+        """
+        批量处理 N 个连续样本。
+        Args:
+            columns: 遥测键 -> (N,) 数组
+            dt: (N,) 数组或标量，每个样本距上一样本的时间（秒）
+        Returns:
+            输出键 -> (N,) 数组
+        默认实现逐样本调用 update()，只实现了 update 的插件无需修改；可向量化的插件应覆盖此方法，
+        使 N 个样本只需一次调用。
+        """
+        n = batch_length(columns, dt)
+        dt = np.broadcast_to(np.asarray(dt, dtype=float), (n,))
+        keys = list(columns)
+        cols = [np.asarray(columns[k]).tolist() for k in keys]
+        out: Dict[str, np.ndarray] = {}
+        for i in range(n):
+            result = self.update({k: c[i] for k, c in zip(keys, cols)}, float(dt[i]))
+            for k, v in result.items():
+                if k not in out:
+                    out[k] = np.full(n, np.nan)
+                out[k][i] = v
+        return out
+
     @abstractmethod
     def reset(self):
         """重置状态"""
@@ -42,76 +77,316 @@ class AlgorithmBase(ABC):
     def set_config(self, config: Dict[str, Any]):
         pass
 
+def batch_length(columns: Dict[str, np.ndarray], dt) -> int:
+    """update_batch 的样本数：取自 dt 数组，dt 为标量时取自任一列"""
+    if np.ndim(dt):
+        return len(dt)
+    for col in columns.values():
+        return len(col)
+    return 0
+
+def batch_column(columns: Dict[str, np.ndarray], key: str, n: int, default: float = 0.0) -> np.ndarray:
+    """取批量输入列，缺失时返回填满 default 的数组（对应 update 中的 dict.get(key, default)）"""
+    col = columns.get(key)
+    if col is None:
+        return np.full(n, default)
+    return np.asarray(col, dtype=float)
+
+class RollingWindow:
+    """
+    定长滑动窗口统计：均值 / 方差 / 标准差，每个样本 O(1)。
+
+    样本存于预分配的 array 环形缓冲；窗口满后用“替换一个样本”的 Welford 形式更新均值与二阶矩
+    （不直接维护 sum/sumsq，避免大均值时的相消误差），并每 refresh 次替换后从缓冲精确重算一次，
+    消除长期累积的舍入漂移。方差为总体方差 (ddof=0)，与 np.std 默认一致。
+    """
+    def __init__(self, size: int, refresh: Optional[int] = None):
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.size = size
+        self.refresh = refresh or max(size, 1024)
+        self._buf = array("d", bytes(8 * size))
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._head = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_refresh = 0
+
+    def push(self, x: float):
+        x = float(x)
+        buf = self._buf
+        head = self._head
+        if self.count < self.size:
+            buf[head] = x
+            self.count += 1
+            delta = x - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (x - self._mean)
+        else:
+            old = buf[head]
+            buf[head] = x
+            mean = self._mean
+            new_mean = mean + (x - old) / self.size
+            self._m2 += (x - old) * (x - new_mean + old - mean)
+            self._mean = new_mean
+            self._since_refresh += 1
+            if self._since_refresh >= self.refresh:
+                self._recompute()
+        self._head = head + 1 if head + 1 < self.size else 0
+
+    def extend(self, values):
+        """批量追加：直接写入环形缓冲后精确重算统计量，O(len(values) + size)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        m = len(values)
+        if m == 0:
+            return
+        buf = np.frombuffer(self._buf, dtype=np.float64)
+        if m >= self.size:
+            buf[:] = values[-self.size:]
+            self._head = 0
+            self.count = self.size
+        else:
+            first = min(m, self.size - self._head)
+            buf[self._head:self._head + first] = values[:first]
+            buf[:m - first] = values[first:]
+            self._head = (self._head + m) % self.size
+            self.count = min(self.count + m, self.size)
+        self._recompute()
+
+    def _recompute(self):
+        values = np.frombuffer(self._buf, dtype=np.float64)[:self.count] if self.count < self.size \
+            else np.frombuffer(self._buf, dtype=np.float64)
+        self._mean = float(values.mean())
+        self._m2 = float(((values - self._mean) ** 2).sum())
+        self._since_refresh = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def sum(self) -> float:
+        return self._mean * self.count
+
+    @property
+    def var(self) -> float:
+        return max(self._m2, 0.0) / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    def values(self) -> np.ndarray:
+        """按时间顺序返回窗口内样本（拷贝）"""
+        buf = np.frombuffer(self._buf, dtype=np.float64)
+        if self.count < self.size:
+            return buf[:self.count].copy()
+        return np.concatenate((buf[self._head:], buf[:self._head]))
+
+class RollingMinMax:
+    """滑动窗口最小/最大值：单调双端队列，每个样本摊还 O(1)"""
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._min: Deque = deque() # (序号, 值)，值单调递增
+        self._max: Deque = deque() # (序号, 值)，值单调递减
+
+    def push(self, x: float):
+        i = self.count
+        self.count += 1
+        lo, hi = self._min, self._max
+        while lo and lo[-1][1] >= x:
+            lo.pop()
+        lo.append((i, x))
+        while hi and hi[-1][1] <= x:
+            hi.pop()
+        hi.append((i, x))
+        start = i - self.size + 1
+        if lo[0][0] < start:
+            lo.popleft()
+        if hi[0][0] < start:
+            hi.popleft()
+
+    @property
+    def min(self) -> float:
+        return self._min[0][1] if self._min else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._max[0][1] if self._max else math.nan
+
+class EWMA:
+    """
+    指数加权均值与方差：mean += alpha * (x - mean)，方差按 West (1979) 的增量形式更新。
+    第一个样本直接作为初值。
+    """
+    def __init__(self, alpha: float):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.reset()
+
+    @classmethod
+    def from_halflife(cls, samples: float) -> 'EWMA':
+        """按半衰期（样本数）构造"""
+        return cls(1.0 - 0.5 ** (1.0 / samples))
+
+    @classmethod
+    def from_span(cls, span: float) -> 'EWMA':
+        """与 pandas ewm(span=...) 相同的 alpha = 2 / (span + 1)"""
+        return cls(2.0 / (span + 1.0))
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def push(self, x: float) -> float:
+        self.count += 1
+        if self.count == 1:
+            self.mean = float(x)
+            self.var = 0.0
+            return self.mean
+        diff = x - self.mean
+        incr = self.alpha * diff
+        self.mean += incr
+        self.var = (1.0 - self.alpha) * (self.var + diff * incr)
+        return self.mean
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
 class ControlCompiler:
     def __init__(self):
-        self.logs = []
+        self.logs = ColumnarLog()
         self.experiments = []
         self.model_table = []
         self.tuning_table = []
+        self.last_tune = {}
         self.feedforward_table = []
         self.last_report = {}
         self.profile = {}
         self.session_id = 0
+        self.online_model = OnlineModelTable()
+        # 随遥测一起记录的插件输出键（虚拟遥测）；None 表示全部。配置项，reset() 不清除
+        self.log_keys: Optional[Set[str]] = None
 
     def reset(self):
-        self.logs = []
+        self.logs = ColumnarLog()
         self.experiments = []
         self.model_table = []
         self.tuning_table = []
+        self.last_tune = {}
         self.feedforward_table = []
         self.last_report = {}
         self.profile = {}
         self.session_id += 1
+        self.online_model.reset()
 
     def ingest(self, telemetry: Dict[str, float], timestamp: Optional[float] = None, context: Optional[Dict[str, Any]] = None):
         t = timestamp if timestamp is not None else time.time()
-        entry = {"t": t}
-        entry.update(telemetry)
-        if context:
-            entry.update(context)
-        self.logs.append(entry)
-
-    def slice_logs(self, start: Optional[float] = None, end: Optional[float] = None):
-        if not self.logs:
-            return []
+        self.logs.append(t, telemetry, context)
+        speed = telemetry.get("speed")
+        if speed is not None:
+            target = (context or {}).get("target_spd", telemetry.get("target_spd"))
+            self.online_model.update(t, speed, telemetry.get("voltage", 0.0), target)
+
+    def log_subscription(self, available: Iterable[str]) -> List[str]:
+        """available（插件可提供的输出键）中需要记录的部分，供 PluginManager 的 "compiler" 订阅使用"""
+        return [k for k in available if self.log_keys is None or k in self.log_keys]
+
+    def ingest_batch(self, columns: Dict[str, np.ndarray], timestamps, context: Optional[Dict[str, Any]] = None,
+                     virtual: Optional[Dict[str, np.ndarray]] = None):
+        """
+        批量版 ingest：columns 为遥测键 -> (N,) 数组，timestamps 为 (N,) 数组或标量，context 对整批生效。
+        virtual 为本块的插件输出列，其中属于 log_keys 的键一并记录。
+        """
+        n = batch_length(columns, timestamps)
+        if n == 0:
+            return
+        t = np.broadcast_to(np.asarray(timestamps, dtype=float), (n,))
+        merged = dict(columns)
+        for k, v in (virtual or {}).items():
+            if k not in merged and (self.log_keys is None or k in self.log_keys):
+                merged[k] = v
+        for k, v in (context or {}).items():
+            merged[k] = np.full(n, v, dtype=float)
+        self.logs.extend(t, merged)
+        speed = columns.get("speed")
+        if speed is None:
+            return
+        voltage = batch_column(columns, "voltage", n)
+        target = merged.get("target_spd")
+        targets = target.tolist() if target is not None else [None] * n
+        update = self.online_model.update
+        for ti, sp, v, tg in zip(t.tolist(), np.asarray(speed, dtype=float).tolist(), voltage.tolist(), targets):
+            update(ti, sp, v, tg)
+
+    def online_model_table(self, min_samples: int = 5):
+        """流式模型表：由 ingest 增量维护，读取开销 O(箱数)"""
+        return self.online_model.table(min_samples)
+
+    def load_records(self, records):
+        """用 list-of-dict 记录（例如 EXPORT_LOG）替换当前日志"""
+        self.logs = ColumnarLog.from_records(records)
+
+    def slice_logs(self, start: Optional[float] = None, end: Optional[float] = None) -> LogView:
         if start is None and end is None:
-            return list(self.logs)
-        return [x for x in self.logs if (start is None or x["t"] >= start) and (end is None or x["t"] <= end)]
+            return self.logs.view()
+        return self.logs.time_slice(start, end)
+
+    def slice_logs_batch(self, windows=None) -> List[LogView]:
+        """
+        一次查询多个时间窗。windows 为 (start, end) 序列；为空时使用 self.experiments
+        中每段试验的 "start"/"end"。
+        """
+        if windows is None:
+            windows = [(exp.get("start"), exp.get("end")) for exp in self.experiments]
+        return self.logs.time_slices(windows)
 
     def compute_metrics(self, samples, target_key="target_spd", output_key="speed"):
+        samples = as_log_view(samples)
         if not samples:
             return {}
-        times = np.array([s["t"] for s in samples], dtype=float)
-        y = np.array([s.get(output_key, 0.0) for s in samples], dtype=float)
-        r = np.array([s.get(target_key, y[-1] if len(y) > 0 else 0.0) for s in samples], dtype=float)
-        err = r - y
-        rms = float(np.sqrt(np.mean(err ** 2))) if len(err) > 0 else 0.0
-        overshoot = float(np.max(y - r)) if len(y) > 0 else 0.0
-        settle_time = 0.0
-        if len(y) > 0:
-            band = np.maximum(0.02 * np.abs(r), 0.5)
-            within = np.abs(err) <= band
-            settle_time = float(times[-1] - times[0])
-            for i in range(len(within)):
-                if np.all(within[i:]):
-                    settle_time = float(times[i] - times[0])
-                    break
-        energy = float(np.mean(np.abs(err)))
-        jitter = float(np.std(err))
-        return {
-            "rms_error": rms,
-            "overshoot": overshoot,
-            "settle_time": settle_time,
-            "energy": energy,
-            "jitter": jitter
-        }
+        times = samples["t"]
+        y = samples.get(output_key, 0.0)
+        r = samples.get(target_key, y[-1])
+        metrics = response_metrics(times, y, r)
+        return {k: float(v) for k, v in metrics.items()}
+
+    def compute_metrics_batch(self, times, y, r):
+        """
+        批量计算指标：y/r 形状 (batch, n)（或可广播），返回每个指标一个 (batch,) 数组。
+        用于一次评估多路信号或多组候选仿真响应。
+        """
+        return response_metrics(times, y, r)
 
-    def estimate_model(self, samples, target_key="target_spd", output_key="speed"):
+    def estimate_model(self, samples, target_key="target_spd", output_key="speed",
+                       sketch: Optional[KLLSketch] = None):
+        """
+        一阶模型辨识。死区默认为误差的精确 10% 分位数；传入 sketch 时误差写入该 KLL 草图，
+        死区取草图的分位数——内存固定，同一草图可跨多段日志/会话累积或与其他草图合并。
+        """
+        samples = as_log_view(samples)
         if len(samples) < 5:
             return {}
-        times = np.array([s["t"] for s in samples], dtype=float)
-        y = np.array([s.get(output_key, 0.0) for s in samples], dtype=float)
-        r = np.array([s.get(target_key, y[-1]) for s in samples], dtype=float)
+        y = samples.get(output_key, 0.0)
+        return self._estimate_model_arrays(samples["t"], y, samples.get(target_key, y[-1]), sketch)
+
+    def _estimate_model_arrays(self, times, y, r, sketch: Optional[KLLSketch] = None):
         start = y[0]
         final = y[-1]
         total = final - start
@@ -124,27 +399,53 @@ class ControlCompiler:
         idx05 = np.argmax((y - y05) * np.sign(total) >= 0)
         delay = float(times[idx05] - times[0]) if idx05 > 0 else 0.0
         err = np.abs(r - y)
-        deadzone = float(np.percentile(err, 10)) if len(err) > 0 else 0.0
+        if sketch is not None:
+            sketch.update_many(err)
+            deadzone = sketch.quantile(0.1)
+        else:
+            deadzone = float(np.percentile(err, 10)) if len(err) > 0 else 0.0
         return {"tau": tau, "delay": delay, "deadzone": deadzone}
 
-    def build_model_table(self, speed_bin=50.0, voltage_bin=2.0):
-        table = {}
-        for s in self.logs:
-            spd = float(s.get("speed", 0.0))
-            volt = float(s.get("voltage", 0.0))
-            key = (int(spd // speed_bin), int(volt // voltage_bin))
-            table.setdefault(key, []).append(s)
+    def build_model_table(self, speed_bin=50.0, voltage_bin=2.0, temperature_bin=None, logs=None):
+        """
+        按 速度 × 电压（temperature_bin 非空时再加温度）分箱，逐箱辨识一阶模型。
+        分箱编号一次性算出，稳定排序后每箱是一段连续切片，箱内样本保持时间顺序。
+        logs 为日志快照（LogView）；在工作线程中调用时应由写入日志的线程事先取好，为空时取当前日志。
+        """
+        logs = as_log_view(logs) if logs is not None else self.logs.view()
+        speed = logs.get("speed", 0.0)
+        columns = [speed, logs.get("voltage", 0.0)]
+        sizes = [speed_bin, voltage_bin]
+        if temperature_bin:
+            columns.append(logs.get("temperature", 0.0))
+            sizes.append(temperature_bin)
+        keys, order, bounds = group_by(bin_codes(columns, sizes))
+        times = logs["t"][order]
+        y = speed[order]
+        target = logs.columns.get("target_spd")
+        r = target[order] if target is not None else None
         result = []
-        for (sp_bin, v_bin), samples in table.items():
-            model = self.estimate_model(samples)
-            if model:
-                result.append({
-                    "speed_bin": [sp_bin * speed_bin, (sp_bin + 1) * speed_bin],
-                    "voltage_bin": [v_bin * voltage_bin, (v_bin + 1) * voltage_bin],
-                    "tau": model.get("tau", 0.0),
-                    "delay": model.get("delay", 0.0),
-                    "deadzone": model.get("deadzone", 0.0)
-                })
+        for key, i0, i1 in zip(keys.tolist(), bounds[:-1].tolist(), bounds[1:].tolist()):
+            if i1 - i0 < 5:
+                continue
+            y_bin = y[i0:i1]
+            if r is None:
+                r_bin = np.full(i1 - i0, y_bin[-1])
+            else:
+                r_bin = r[i0:i1]
+                if np.isnan(r_bin).any():
+                    r_bin = np.where(np.isnan(r_bin), y_bin[-1], r_bin)
+            model = self._estimate_model_arrays(times[i0:i1], y_bin, r_bin)
+            entry = {
+                "speed_bin": [key[0] * speed_bin, (key[0] + 1) * speed_bin],
+                "voltage_bin": [key[1] * voltage_bin, (key[1] + 1) * voltage_bin],
+                "tau": model.get("tau", 0.0),
+                "delay": model.get("delay", 0.0),
+                "deadzone": model.get("deadzone", 0.0)
+            }
+            if temperature_bin:
+                entry["temperature_bin"] = [key[2] * temperature_bin, (key[2] + 1) * temperature_bin]
+            result.append(entry)
         self.model_table = result
         return result
 
@@ -168,54 +469,47 @@ class ControlCompiler:
             prev_err = err
         return ys, us
 
-    def auto_tune(self, samples, base_pid, weight, u_limit=100.0):
+    def search_pid(self, samples, base_pid, weight, u_limit=100.0, optimizer: Optional[Optimizer] = None,
+                   executor=None, progress=None, cancel=None) -> Dict[str, Any]:
+        """
+        在日志辨识出的一阶模型上搜索 PID，返回 run_search 的结果 {"best", "candidates", "evaluations", "cancelled"}。
+        optimizer 默认为以 base_pid 为中心的 5×5×5 乘性网格；executor 为进程池时候选批次分块并行评估。
+        progress(done, total) 在评估线程中回调，cancel (threading.Event) 置位后尽快返回已评估部分的最优解。
+        不修改编译器状态，可在任务线程中调用；日志为空时 best 为空字典。
+        """
+        samples = as_log_view(samples)
         if not samples:
-            return {}
-        times = np.array([s["t"] for s in samples], dtype=float)
-        r = np.array([s.get("target_spd", 0.0) for s in samples], dtype=float)
+            return {"best": {}, "candidates": [], "evaluations": 0, "cancelled": False}
+        times = samples["t"]
+        r = samples.get("target_spd", 0.0)
         dt = float(np.median(np.diff(times))) if len(times) > 1 else 0.05
         model = self.estimate_model(samples)
         tau = model.get("tau", 0.5) if model else 0.5
-        factors = [0.6, 0.8, 1.0, 1.2, 1.5]
-        candidates = []
-        for kp in factors:
-            for ki in factors:
-                for kd in factors:
-                    pid = {
-                        "kp": base_pid["kp"] * kp,
-                        "ki": base_pid["ki"] * ki,
-                        "kd": base_pid["kd"] * kd
-                    }
-                    ys, us = self._simulate_pid(r, tau, dt, pid, u_limit)
-                    if not ys:
-                        continue
-                    sim_samples = [{"t": float(times[i]), "speed": ys[i], "target_spd": float(r[i])} for i in range(len(ys))]
-                    metrics = self.compute_metrics(sim_samples)
-                    saturation = float(np.mean(np.abs(us) >= 0.98 * u_limit))
-                    cost = (
-                        weight["rms"] * metrics.get("rms_error", 0.0) +
-                        weight["overshoot"] * max(0.0, metrics.get("overshoot", 0.0)) +
-                        weight["settle"] * metrics.get("settle_time", 0.0) +
-                        weight["sat"] * saturation +
-                        weight["energy"] * metrics.get("energy", 0.0) +
-                        weight["jitter"] * metrics.get("jitter", 0.0)
-                    )
-                    candidates.append({"pid": pid, "cost": cost, "metrics": metrics})
-        best = min(candidates, key=lambda x: x["cost"]) if candidates else {}
-        self.tuning_table = candidates
-        return best
+        problem = TuningProblem(r, times, tau, dt, weight, u_limit)
+        return run_search(problem, base_pid, optimizer, executor, progress, cancel)
+
+    def store_tune(self, result: Dict[str, Any]):
+        """记录一次搜索结果（tuning_table / last_tune）"""
+        self.tuning_table = result["candidates"]
+        self.last_tune = result
+
+    def auto_tune(self, samples, base_pid, weight, u_limit=100.0, optimizer: Optional[Optimizer] = None,
+                  executor=None, progress=None, cancel=None):
+        """search_pid 并记录结果，返回最优候选（日志为空时为空字典）"""
+        result = self.search_pid(samples, base_pid, weight, u_limit, optimizer, executor, progress, cancel)
+        self.store_tune(result)
+        return result["best"]
 
     def update_feedforward(self, samples, alpha=0.2):
+        samples = as_log_view(samples)
         if not samples:
             return []
         n = len(samples)
         if len(self.feedforward_table) < n:
             self.feedforward_table.extend([0.0] * (n - len(self.feedforward_table)))
-        for i in range(n):
-            r = float(samples[i].get("target_spd", 0.0))
-            y = float(samples[i].get("speed", 0.0))
-            err = r - y
-            self.feedforward_table[i] = self.feedforward_table[i] + alpha * err
+        err = samples.get("target_spd", 0.0) - samples.get("speed", 0.0)
+        table = np.asarray(self.feedforward_table[:n], dtype=float) + alpha * err
+        self.feedforward_table[:n] = table.tolist()
         return self.feedforward_table
 
     def compile_profile(self, profile_id: str, pid: Dict[str, float]):
@@ -0,0 +1,71 @@
+from typing import Sequence, Tuple
+import numpy as np
+
+def bin_codes(columns: Sequence[np.ndarray], sizes: Sequence[float]) -> np.ndarray:
+    """
+    每个样本的整数分箱编号 floor(x / size)，返回 (n, k) int64，k 为分箱维数。
+    NaN 样本的编号为 int64 最小值（单独成组）。
+    """
+    n = len(columns[0]) if columns else 0
+    codes = np.empty((n, len(columns)), dtype=np.int64, order="F") # 按列存放，逐列写入与归约都是连续内存
+    for j, (col, size) in enumerate(zip(columns, sizes)):
+        q = np.floor_divide(np.asarray(col, dtype=float), size)
+        bad = ~np.isfinite(q)
+        if bad.any():
+            q[bad] = 0
+            codes[:, j] = q
+            codes[bad, j] = np.iinfo(np.int64).min
+        else:
+            codes[:, j] = q
+    return codes
+
+def _flatten(codes: np.ndarray):
+    """把 (n, k) 编号按混合进制压成一维 int64；编号跨度过大时返回 None"""
+    lo = codes.min(axis=0)
+    # 先用 Python 整数计算跨度，避免 int64 相减溢出
+    spans = [h - l + 1 for h, l in zip(codes.max(axis=0).tolist(), lo.tolist())]
+    total = 1
+    for v in spans:
+        total *= v
+    if total >= 2 ** 62:
+        return None
+    span = np.array(spans, dtype=np.int64)
+    strides = np.ones(codes.shape[1], dtype=np.int64)
+    for j in range(codes.shape[1] - 2, -1, -1):
+        strides[j] = strides[j + 1] * span[j + 1]
+    return (codes - lo) @ strides, lo, span, strides, total
+
+def group_by(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    按分箱编号分组。返回 (keys, order, bounds)：
+    keys 为 (g, k) 按字典序升序排列的唯一编号；order 为稳定排序后的样本下标，
+    同组样本在 order 中连续且保持原始（时间）顺序；第 i 组为 order[bounds[i]:bounds[i + 1]]。
+
+    编号先压成一维；跨度不大时用 bincount 直接得到组号，否则退回 np.unique。
+    组号用能容纳的最窄整数类型做稳定排序（uint8/uint16 走基数排序，O(n)）。
+    """
+    n = len(codes)
+    if n == 0:
+        return np.empty((0, codes.shape[1]), dtype=np.int64), np.empty(0, dtype=np.intp), np.zeros(1, dtype=np.intp)
+    flat = _flatten(codes)
+    if flat is None:
+        keys, inverse, counts = np.unique(codes, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+    else:
+        flat, lo, span, strides, total = flat
+        if total <= max(4 * n, 1 << 16):
+            counts = np.bincount(flat, minlength=total)
+            present = np.flatnonzero(counts)
+            lut = np.empty(total, dtype=np.int64)
+            lut[present] = np.arange(len(present))
+            inverse = lut[flat]
+            counts = counts[present]
+        else:
+            present, inverse, counts = np.unique(flat, return_inverse=True, return_counts=True)
+        keys = lo + (present[:, np.newaxis] // strides) % span
+    g = len(counts)
+    narrow = np.uint8 if g <= 0xFF else np.uint16 if g <= 0xFFFF else np.uint32 if g <= 0xFFFFFFFF else np.int64
+    order = np.argsort(inverse.astype(narrow), kind="stable")
+    bounds = np.zeros(g + 1, dtype=np.intp)
+    np.cumsum(counts, out=bounds[1:])
+    return keys, order, bounds
@@ -0,0 +1,75 @@
+from typing import Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# 每个块最多 254 个非零数据字节，对应代码字节 0xFF（块后无隐式零）
+_MAX_RUN = 0xFE
+
+def max_encoded_len(n: int) -> int:
+    """长度为 n 的数据编码后的最大长度（不含 0x00 分隔符）"""
+    return n + n // _MAX_RUN + 1
+
+def encode(data: BytesLike) -> bytes:
+    """COBS 编码：按零字节切段，每段整体拷贝，超过 254 字节的段拆分为 0xFF 块"""
+    src = data if isinstance(data, bytes) else bytes(data)
+    out = bytearray()
+    for seg in src.split(b"\x00"):
+        n = len(seg)
+        if n >= _MAX_RUN:
+            view = memoryview(seg)
+            pos = 0
+            while n - pos >= _MAX_RUN:
+                out.append(0xFF)
+                out += view[pos:pos + _MAX_RUN]
+                pos += _MAX_RUN
+            seg = view[pos:]
+            n = len(seg)
+        out.append(n + 1)
+        out += seg
+    return bytes(out)
+
+def decode_into(data: BytesLike, out: Union[bytearray, memoryview]) -> int:
+    """
+    COBS 解码到调用者提供的缓冲区，返回写入的字节数。
+    data 为不含分隔符的 COBS 块；out 至少需要 len(data) 字节。
+    遇到代码字节 0 时停止，截断的块按实际可用字节复制。
+    """
+    src = data if isinstance(data, memoryview) else memoryview(data)
+    dst = out if isinstance(out, memoryview) else memoryview(out)
+    n = len(src)
+    if len(dst) < n:
+        raise ValueError(f"输出缓冲区太小: {len(dst)} < {n}")
+    i = 0
+    o = 0
+    while i < n:
+        code = src[i]
+        if code == 0:
+            break
+        i += 1
+        end = i + code - 1
+        if end > n:
+            end = n
+        length = end - i
+        dst[o:o + length] = src[i:end]
+        o += length
+        i = end
+        if code < 0xFF and i < n:
+            dst[o] = 0
+            o += 1
+    return o
+
+def decode(data: BytesLike) -> bytes:
+    """COBS 解码，单遍按块切片拷贝，返回新的 bytes（语义同 decode_into）"""
+    res = bytearray()
+    n = len(data)
+    i = 0
+    while i < n:
+        code = data[i]
+        if code == 0:
+            break
+        end = i + code
+        res += data[i + 1:end]
+        i = end if end < n else n
+        if code < 0xFF and i < n:
+            res.append(0)
+    return bytes(res)
@@ -0,0 +1,100 @@
+import binascii
+from typing import Callable, Dict, List, Optional
+
+# CRC-16/CCITT-FALSE: 多项式 0x1021, 初始值 0xFFFF, 不反射, 无异或输出
+CRC16_POLY = 0x1021
+CRC16_INIT = 0xFFFF
+SLICE_N = 8
+
+def crc16_bitwise(data: bytes, crc: int = CRC16_INIT) -> int:
+    """逐位参考实现（最慢，仅作为其余后端的基准）"""
+    for byte in data:
+        crc ^= (byte << 8)
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ CRC16_POLY
+            else:
+                crc = crc << 1
+            crc &= 0xFFFF
+    return crc
+
+def _build_tables(n: int) -> List[List[int]]:
+    # tables[k][x] = 字节 x 后跟 k 个零字节的 CRC（零初值）
+    base = [crc16_bitwise(bytes([i]), 0) for i in range(256)]
+    tables = [base]
+    for _ in range(1, n):
+        prev = tables[-1]
+        tables.append([((v << 8) & 0xFFFF) ^ base[v >> 8] for v in prev])
+    return tables
+
+_TABLES = _build_tables(SLICE_N)
+CRC16_TABLE = _TABLES[0]
+
+def crc16_table(data: bytes, crc: int = CRC16_INIT) -> int:
+    """256 项查表实现，每字节一次查表"""
+    table = CRC16_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
+
+def crc16_slice8(data: bytes, crc: int = CRC16_INIT) -> int:
+    """slice-by-8 实现，每次迭代处理 8 字节，适合大载荷（DICT_RSP/EXPORT_LOG）"""
+    t7, t6, t5, t4, t3, t2, t1, t0 = _TABLES[::-1]
+    n = len(data) - len(data) % SLICE_N
+    it = iter(memoryview(data)[:n])
+    for b0, b1, b2, b3, b4, b5, b6, b7 in zip(it, it, it, it, it, it, it, it):
+        crc = (t7[(crc >> 8) ^ b0] ^ t6[(crc & 0xFF) ^ b1] ^
+               t5[b2] ^ t4[b3] ^ t3[b4] ^ t2[b5] ^ t1[b6] ^ t0[b7])
+    return crc16_table(data[n:], crc)
+
+def crc16_binascii(data: bytes, crc: int = CRC16_INIT) -> int:
+    """编译后端: binascii.crc_hqx 即 C 实现的 CRC-CCITT (0x1021, 不反射)"""
+    return binascii.crc_hqx(data, crc)
+
+BACKENDS: Dict[str, Callable[..., int]] = {
+    "bitwise": crc16_bitwise,
+    "table": crc16_table,
+    "slice8": crc16_slice8,
+    "binascii": crc16_binascii,
+}
+
+# 按优先级排列，导入时选取第一个通过自检的后端
+PREFERRED = ["binascii", "slice8", "table", "bitwise"]
+
+_CHECK_VECTOR = b"123456789"
+_CHECK_VALUE = 0x29B1
+
+def register_backend(name: str, func: Callable[..., int], preferred: bool = False):
+    """注册额外的 CRC 后端（例如编译扩展），preferred=True 时优先于内置后端"""
+    BACKENDS[name] = func
+    if name in PREFERRED:
+        PREFERRED.remove(name)
+    if preferred:
+        PREFERRED.insert(0, name)
+    else:
+        PREFERRED.append(name)
+
+def _self_test(func: Callable[..., int]) -> bool:
+    try:
+        if func(_CHECK_VECTOR) != _CHECK_VALUE:
+            return False
+        sample = bytes(range(256)) * 3 + b"\x00\xff\x10"
+        return func(sample) == crc16_table(sample)
+    except Exception:
+        return False
+
+def select_backend(name: Optional[str] = None) -> str:
+    """选择当前使用的后端；name 为空时按 PREFERRED 自动选择"""
+    global crc16_ccitt_false, active_backend
+    candidates = [name] if name else PREFERRED
+    for candidate in candidates:
+        func = BACKENDS.get(candidate)
+        if func is not None and _self_test(func):
+            crc16_ccitt_false = func
+            active_backend = candidate
+            return candidate
+    raise ValueError(f"CRC 后端不可用: {name}")
+
+crc16_ccitt_false: Callable[..., int] = crc16_table
+active_backend = "table"
+select_backend()
@@ -0,0 +1,102 @@
+from typing import Callable, Union
+from . import cobs
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# 载荷长度字段为 uint16：头部(7) + 载荷(最大 65535) + CRC(2)，再加 COBS 开销
+DEFAULT_MAX_FRAME_LEN = cobs.max_encoded_len(7 + 0xFFFF + 2)
+
+class FrameDeframer:
+    """
+    以 0x00 分隔的流式分帧器。
+
+    数据写入预分配的固定容量缓冲区，按偏移量跟踪帧起点与扫描位置，
+    每个字节只扫描一次；帧以 memoryview 切片交给回调（仅在回调期间有效，
+    需要保留时由调用者自行拷贝）。只有写满时才把未完成的尾部搬到开头。
+    超过 max_frame_len 仍未出现分隔符的数据被丢弃，直到下一个分隔符重新同步。
+    回调期间 trailing 为本次 feed 中位于该帧分隔符之后的字节数，可据此估计帧的到达时刻。
+    """
+    def __init__(self, max_frame_len: int = DEFAULT_MAX_FRAME_LEN, capacity: int = 0):
+        self.max_frame_len = max_frame_len
+        self.capacity = max(capacity, 2 * max_frame_len + 2, 65536)
+        self._buf = bytearray(self.capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0 # 当前帧起点
+        self._scan = 0 # 下一个待扫描位置
+        self._end = 0 # 写入位置
+        self._discarding = False # 正在丢弃超长帧的剩余部分
+        self._unfed = 0 # 本次 feed 中尚未拷入缓冲区的字节数
+        self.trailing = 0
+
+        self.stats = {
+            'frames': 0,
+            'overflows': 0,
+            'compactions': 0,
+            'bytes_dropped': 0
+        }
+
+    def __len__(self) -> int:
+        """缓冲中尚未成帧的字节数"""
+        return self._end - self._start
+
+    def reset(self):
+        self._start = self._scan = self._end = 0
+        self._discarding = False
+
+    def feed(self, data: BytesLike, on_frame: Callable[[memoryview], None]):
+        src = data if isinstance(data, memoryview) else memoryview(data)
+        while len(src):
+            free = self.capacity - self._end
+            if free == 0:
+                self._compact()
+                free = self.capacity - self._end
+            n = min(free, len(src))
+            self._buf[self._end:self._end + n] = src[:n]
+            self._end += n
+            src = src[n:]
+            self._unfed = len(src)
+            self._drain(on_frame)
+
+    def _drain(self, on_frame: Callable[[memoryview], None]):
+        buf = self._buf
+        view = self._view
+        end = self._end
+        while True:
+            idx = buf.find(0, self._scan, end)
+            if idx < 0:
+                self._scan = end
+                if self._discarding:
+                    self.stats['bytes_dropped'] += end - self._start
+                    self._start = end
+                elif end - self._start > self.max_frame_len:
+                    self._drop(end)
+                    self._discarding = True
+                break
+            length = idx - self._start
+            if self._discarding:
+                self.stats['bytes_dropped'] += length
+                self._discarding = False
+            elif length > self.max_frame_len:
+                self._drop(idx)
+            elif length > 0:
+                self.stats['frames'] += 1
+                self.trailing = end - idx - 1 + self._unfed
+                on_frame(view[self._start:idx])
+            self._start = self._scan = idx + 1
+        if self._start == end:
+            # 缓冲区已全部消费，直接回绕，无需拷贝
+            self._start = self._scan = self._end = 0
+
+    def _drop(self, upto: int):
+        self.stats['overflows'] += 1
+        self.stats['bytes_dropped'] += upto - self._start
+        self._start = upto
+
+    def _compact(self):
+        pending = self._end - self._start
+        # 源与目标可能重叠，先取出未完成的尾部（至多 max_frame_len 字节）
+        self._buf[:pending] = bytes(self._view[self._start:self._end])
+        self._scan -= self._start
+        self._start = 0
+        self._end = pending
+        self.stats['compactions'] += 1
@@ -1,3 +1,4 @@
+import struct
 import threading
 import time
 import logging
@@ -5,32 +6,179 @@ from collections import deque
 from typing import Dict, Callable, Any, Optional
 from .protocol import Packet, MsgType
 from .serial_interface import SerialInterface
+from .telemetry import LatencyHistogram
+from .timer_wheel import TimerWheel
 
 logger = logging.getLogger(__name__)
 
+class RetryPolicy:
+    """ACK 超时重发策略：第 k 次发送后等待 timeout * backoff**k 秒（不超过 max_timeout），最多重发 retries 次"""
+    def __init__(self, timeout: float = 0.2, retries: int = 3, backoff: float = 1.0, max_timeout: float = 2.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_timeout = max_timeout
+
+    def delay(self, attempt: int) -> float:
+        return min(self.timeout * self.backoff ** attempt, self.max_timeout)
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+class AckStats:
+    """
+    单个消息类型的 ACK 统计。RTT 只统计未重发过的包（Karn 算法）：
+    重发后收到的 ACK 无法区分对应哪一次发送。
+    """
+    def __init__(self):
+        self.sent = 0
+        self.acked = 0
+        self.retries = 0
+        self.failed = 0
+        self.rtt = LatencyHistogram()
+
+    def summary(self) -> dict:
+        return {"sent": self.sent, "acked": self.acked, "retries": self.retries,
+                "failed": self.failed, "rtt": self.rtt.summary()}
+
+class _PendingAck:
+    __slots__ = ("packet", "done", "policy", "retries", "attempt", "sent_at", "timer")
+
+    def __init__(self, packet: Packet, done: Optional[Callable[[bool], None]], policy: RetryPolicy):
+        self.packet = packet
+        self.done = done
+        self.policy = policy
+        self.retries = policy.retries
+        self.attempt = 0
+        self.sent_at = time.perf_counter()
+        self.timer = None
+
+class AckTracker:
+    """
+    待确认包的超时重发、失败判定与按消息类型的统计，Dispatcher 与 AsyncDispatcher 共用。
+
+    schedule(delay, fn, *args) 提供定时器并返回带 cancel() 的句柄：Dispatcher 传 TimerWheel.schedule，
+    AsyncDispatcher 传 loop.call_later。超时回调在调度器线程中执行，resend(packet) 重发数据包；
+    done(ok) 在锁外调用（确认时 True，重试耗尽或 close() 时 False）。
+    """
+    def __init__(self, schedule: Callable[..., Any], resend: Callable[[Packet], None],
+                 retry_policies: Optional[Dict[MsgType, RetryPolicy]] = None):
+        self.schedule = schedule
+        self.resend = resend
+        self.pending: Dict[int, _PendingAck] = {}
+        self.lock = threading.Lock()
+        self.retry_policies: Dict[MsgType, RetryPolicy] = dict(retry_policies or {})
+        self.stats: Dict[MsgType, AckStats] = {}
+
+    def set_retry_policy(self, msg_type: MsgType, policy: RetryPolicy):
+        self.retry_policies[msg_type] = policy
+
+    def track(self, packet: Packet, done: Optional[Callable[[bool], None]] = None,
+              policy: Optional[RetryPolicy] = None):
+        """登记一个即将发送、需要 ACK 的包并启动其超时定时器"""
+        entry = _PendingAck(packet, done, policy or self.retry_policies.get(packet.msg_type, DEFAULT_RETRY_POLICY))
+        with self.lock:
+            self._stats_for(packet.msg_type).sent += 1
+            self.pending[packet.seq] = entry
+            entry.timer = self.schedule(entry.policy.delay(0), self._on_timeout, packet.seq, 0)
+
+    def ack(self, seq: int, timestamp: float) -> bool:
+        """处理 seq 的 ACK（timestamp 为接收时刻）；seq 不在等待中时返回 False"""
+        with self.lock:
+            entry = self.pending.pop(seq, None)
+            if entry is None:
+                return False
+            entry.timer.cancel()
+            stats = self._stats_for(entry.packet.msg_type)
+            stats.acked += 1
+            if entry.attempt == 0: # Karn 算法，见 AckStats
+                stats.rtt.record(timestamp - entry.sent_at)
+        if entry.done:
+            entry.done(True)
+        return True
+
+    def discard(self, seq: int):
+        """不再等待 seq 的 ACK，也不回调"""
+        with self.lock:
+            entry = self.pending.pop(seq, None)
+        if entry is not None:
+            entry.timer.cancel()
+
+    def _on_timeout(self, seq: int, attempt: int):
+        with self.lock:
+            entry = self.pending.get(seq)
+            if entry is None or entry.attempt != attempt: # 已确认，或是被取消前已到期的旧定时器
+                return
+            stats = self._stats_for(entry.packet.msg_type)
+            if entry.retries > 0:
+                entry.retries -= 1
+                entry.attempt += 1
+                entry.sent_at = time.perf_counter()
+                entry.timer = self.schedule(entry.policy.delay(entry.attempt), self._on_timeout, seq, entry.attempt)
+                stats.retries += 1
+                retry = True
+            else:
+                del self.pending[seq]
+                stats.failed += 1
+                retry = False
+        if retry:
+            logger.warning(f"重试数据包 {seq} 类型 {entry.packet.msg_type}")
+            self.resend(entry.packet)
+        elif entry.done:
+            entry.done(False)
+
+    def _stats_for(self, msg_type: MsgType) -> AckStats:
+        stats = self.stats.get(msg_type)
+        if stats is None:
+            stats = self.stats[msg_type] = AckStats()
+        return stats
+
+    def summary(self) -> Dict[str, dict]:
+        """按消息类型汇总的发送/确认/重发/失败次数与 RTT 分位数（秒）"""
+        with self.lock:
+            return {getattr(t, "name", str(t)): st.summary() for t, st in self.stats.items()}
+
+    def close(self):
+        """取消全部定时器，未确认的包按失败回调"""
+        with self.lock:
+            pending = list(self.pending.values())
+            self.pending.clear()
+        for entry in pending:
+            entry.timer.cancel()
+            if entry.done:
+                entry.done(False)
+
 class Dispatcher:
     """
-    处理消息分发、ACK 管理以及请求/响应匹配。
+    处理消息分发、ACK 管理以及请求/响应匹配（串口接收线程 + 时间轮线程的同步实现）。
+
+    ACK 超时与看门狗由时间轮 (TimerWheel) 上的定时器驱动：每个待确认的包一个定时器，
+    收到 ACK 时 O(1) 取消，超时按该消息类型的 RetryPolicy 重发或判定失败（见 AckTracker）。
+    界面使用的是 aio_transport 中的 SyncDispatcher / AsyncDispatcher（同一个 AckTracker，
+    定时器为事件循环的 call_later）；本类供不经过事件循环的链路使用，如 tools 中的模拟下位机。
     """
-    def __init__(self, serial_interface: SerialInterface):
+    WATCHDOG_TIMEOUT = 1.0
+
+    def __init__(self, serial_interface: SerialInterface, timer_wheel: Optional[TimerWheel] = None,
+                 retry_policies: Optional[Dict[MsgType, RetryPolicy]] = None):
         self.serial = serial_interface
         self.serial.set_callback(self._on_packet_received)
         
         self.handlers: Dict[MsgType, Callable[[Packet], None]] = {}
         self.telemetry_handlers = []
         
-        # ACK 管理
-        self.pending_acks: Dict[int, Dict] = {} # seq -> {timestamp, callback, retry_count, packet}
-        self.ack_lock = threading.Lock()
-        
         self.seq_counter = 0
+        self.seq_lock = threading.Lock() # send() 可能同时来自 UI 线程与串口接收线程中的回调
         self.running = True
         
-        # 看门狗
-        self.last_heartbeat = time.time()
+        # 看门狗（与 Packet.timestamp 同为单调时钟，不受系统时间调整影响）
+        self.last_heartbeat = time.perf_counter()
         self.watchdog_callback: Optional[Callable[[], None]] = None
         
-        threading.Thread(target=self._maintenance_loop, daemon=True, name="DispatcherMaintenance").start()
+        self._own_wheel = timer_wheel is None
+        self.timers = timer_wheel or TimerWheel(name="DispatcherTimers")
+        # ACK 管理
+        self.acks = AckTracker(self.timers.schedule, self.serial.send, retry_policies)
+        self._watchdog = self.timers.schedule(self.WATCHDOG_TIMEOUT, self._check_watchdog)
 
     def register_handler(self, msg_type: MsgType, handler: Callable[[Packet], None]):
         self.handlers[msg_type] = handler
@@ -41,28 +189,30 @@ class Dispatcher:
     def set_watchdog_callback(self, callback: Callable[[], None]):
         self.watchdog_callback = callback
 
-    def send(self, msg_type: MsgType, payload: bytes = b'', need_ack: bool = False, callback: Callable[[bool], None] = None) -> int:
+    def set_retry_policy(self, msg_type: MsgType, policy: RetryPolicy):
+        self.acks.set_retry_policy(msg_type, policy)
+
+    def send(self, msg_type: MsgType, payload: bytes = b'', need_ack: bool = False, callback: Callable[[bool], None] = None,
+             policy: Optional[RetryPolicy] = None) -> int:
         seq = self._next_seq()
         packet = Packet(msg_type, payload, seq=seq)
-        
         if need_ack:
-            with self.ack_lock:
-                self.pending_acks[seq] = {
-                    'ts': time.time(),
-                    'cb': callback,
-                    'retry': 3,
-                    'pkt': packet
-                }
-        
+            self.acks.track(packet, callback, policy)
         self.serial.send(packet)
         return seq
 
     def _next_seq(self) -> int:
-        self.seq_counter = (self.seq_counter + 1) & 0xFFFF
-        return self.seq_counter
+        with self.seq_lock:
+            self.seq_counter = (self.seq_counter + 1) & 0xFFFF
+            return self.seq_counter
+
+    def ack_summary(self) -> Dict[str, dict]:
+        """按消息类型汇总的发送/确认/重发/失败次数与 RTT 分位数（秒）"""
+        return self.acks.summary()
 
     def _on_packet_received(self, packet: Packet):
-        self.last_heartbeat = time.time()
+        # 线程: 串口接收线程；packet.timestamp 为接收时刻，原样交给各处理函数
+        self.last_heartbeat = max(self.last_heartbeat, packet.timestamp)
         
         # 处理 ACK
         if packet.msg_type == MsgType.ACK:
@@ -81,45 +231,24 @@ class Dispatcher:
     def _handle_ack(self, packet: Packet):
         # ACK 载荷通常包含被确认的序列号 (uint16)
         if len(packet.payload) >= 2:
-            import struct
-            acked_seq = struct.unpack('<H', packet.payload[:2])[0]
-            with self.ack_lock:
-                if acked_seq in self.pending_acks:
-                    req = self.pending_acks.pop(acked_seq)
-                    if req['cb']:
-                        req['cb'](True)
-
-    def _maintenance_loop(self):
-        while self.running:
-            now = time.time()
-            
-            # 检查 ACK
-            to_retry = []
-            to_fail = []
-            
-            with self.ack_lock:
-                for seq, req in list(self.pending_acks.items()):
-                    if now - req['ts'] > 0.2: # 200ms 超时
-                        if req['retry'] > 0:
-                            req['retry'] -= 1
-                            req['ts'] = now
-                            to_retry.append(req['pkt'])
-                        else:
-                            to_fail.append(seq)
-                            
-                for seq in to_fail:
-                    req = self.pending_acks.pop(seq)
-                    if req['cb']:
-                        req['cb'](False)
-                        
-            for pkt in to_retry:
-                logger.warning(f"重试数据包 {pkt.seq} 类型 {pkt.msg_type}")
-                self.serial.send(pkt)
-            
-            # 看门狗检查
-            if now - self.last_heartbeat > 1.0: # 1s 超时
-                if self.watchdog_callback:
-                    self.watchdog_callback()
-            
-            time.sleep(0.05)
+            self.acks.ack(struct.unpack('<H', packet.payload[:2])[0], packet.timestamp)
+
+    def _check_watchdog(self):
+        if not self.running:
+            return
+        idle = time.perf_counter() - self.last_heartbeat
+        if idle >= self.WATCHDOG_TIMEOUT:
+            if self.watchdog_callback:
+                self.watchdog_callback()
+            delay = self.WATCHDOG_TIMEOUT
+        else:
+            delay = self.WATCHDOG_TIMEOUT - idle
+        self._watchdog = self.timers.schedule(delay, self._check_watchdog)
 
+    def close(self):
+        """取消全部定时器，未确认的包按失败回调"""
+        self.running = False
+        self._watchdog.cancel()
+        self.acks.close()
+        if self._own_wheel:
+            self.timers.stop()
@@ -0,0 +1,136 @@
+from typing import List, Optional, Tuple
+import numpy as np
+
+from .ring_buffer import RingBuffer2D
+
+class MinMaxPyramid:
+    """
+    保峰值的 min/max 多级细节 (LOD) 金字塔。
+
+    第 0 级是原始样本环形缓冲；第 k 级每个块覆盖 factor**k 个样本，保存块内
+    最小值与最大值。追加数据时只重算受影响的块（末尾未满的块每次重算），
+    查询时按视图宽度选取块数不超过 max_points 的最细一级，返回交错的
+    min/max 点列，因此绘制开销取决于像素宽度而不是历史长度。
+    各级容量都是 factor**levels 的整数倍，保证块边界不跨越环形回绕点。
+    """
+    def __init__(self, channels: int, capacity: int, factor: int = 4, min_blocks: int = 1024,
+                 dtype=np.float32):
+        self.channels = channels
+        self.factor = factor
+        levels = 0
+        while capacity // factor ** (levels + 1) >= min_blocks:
+            levels += 1
+        unit = factor ** levels
+        self.capacity = -(-capacity // unit) * unit
+        self.levels = levels
+        self.raw = RingBuffer2D(channels, self.capacity, dtype=dtype, mirror=False)
+        # 第 k 级 (k>=1) 的块容量与 min/max 存储（双份写入，读取总是连续视图）
+        self._caps: List[int] = [self.capacity // factor ** k for k in range(levels + 1)]
+        self._mins: List[Optional[np.ndarray]] = [None]
+        self._maxs: List[Optional[np.ndarray]] = [None]
+        for k in range(1, levels + 1):
+            self._mins.append(np.full((channels, 2 * self._caps[k]), np.nan, dtype=dtype))
+            self._maxs.append(np.full((channels, 2 * self._caps[k]), np.nan, dtype=dtype))
+
+    @property
+    def total(self) -> int:
+        return self.raw.total
+
+    @property
+    def generation(self) -> np.ndarray:
+        return self.raw.generation
+
+    def __len__(self) -> int:
+        return self.raw.count
+
+    def clear(self):
+        self.raw.clear()
+        for k in range(1, self.levels + 1):
+            self._mins[k].fill(np.nan)
+            self._maxs[k].fill(np.nan)
+
+    def append(self, block: np.ndarray, valid: Optional[int] = None):
+        old_total = self.raw.total
+        self.raw.append(block, valid)
+        new_total = self.raw.total
+        if new_total == old_total:
+            return
+        f = self.factor
+        for k in range(1, self.levels + 1):
+            size = f ** k
+            child = size // f
+            # 受影响的父块；超出容量时只重算仍完整留在环内的部分
+            p0 = max(old_total // size, -(-(new_total - self.capacity) // size))
+            c0 = p0 * f
+            c1 = -(-new_total // child) # 有效子块数（末块可能未满）
+            if k == 1:
+                lo = hi = self.raw.read(c0, c1)
+            else:
+                lo = self._level_read(self._mins[k - 1], k - 1, c0, c1)
+                hi = self._level_read(self._maxs[k - 1], k - 1, c0, c1)
+            mins, maxs = self._reduce(lo, hi, f)
+            self._level_write(k, p0, mins, maxs)
+
+    @staticmethod
+    def _reduce(lo: np.ndarray, hi: np.ndarray, f: int) -> Tuple[np.ndarray, np.ndarray]:
+        n = lo.shape[1]
+        full = n // f
+        ch = lo.shape[0]
+        # fmin/fmax 忽略 NaN（未使用的通道整块为 NaN 时结果仍为 NaN）
+        mins = np.fmin.reduce(lo[:, :full * f].reshape(ch, full, f), axis=2)
+        maxs = np.fmax.reduce(hi[:, :full * f].reshape(ch, full, f), axis=2)
+        if n % f:
+            mins = np.concatenate((mins, np.fmin.reduce(lo[:, full * f:], axis=1)[:, np.newaxis]), axis=1)
+            maxs = np.concatenate((maxs, np.fmax.reduce(hi[:, full * f:], axis=1)[:, np.newaxis]), axis=1)
+        return mins, maxs
+
+    def _level_read(self, store: np.ndarray, k: int, b0: int, b1: int) -> np.ndarray:
+        p = b0 % self._caps[k]
+        return store[:, p:p + (b1 - b0)]
+
+    def _level_write(self, k: int, b0: int, mins: np.ndarray, maxs: np.ndarray):
+        cap = self._caps[k]
+        pos = (b0 + np.arange(mins.shape[1])) % cap
+        for store, src in ((self._mins[k], mins), (self._maxs[k], maxs)):
+            store[:, pos] = src
+            store[:, pos + cap] = src
+
+    def select_level(self, span: int, max_points: int) -> int:
+        """返回块数不超过 max_points 的最细一级"""
+        k = 0
+        while k < self.levels and span > max_points * self.factor ** k:
+            k += 1
+        return k
+
+    def query(self, ch: int, start: int, stop: int, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        返回通道 ch 在绝对样本区间 [start, stop) 内用于绘制的 (x, y)。
+        第 0 级为原始样本；更粗的级别每块输出 (块起点, min) 与 (块中点, max) 两点。
+        """
+        start = max(int(start), self.raw.oldest)
+        stop = min(int(stop), self.raw.total)
+        if stop <= start:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty
+        k = self.select_level(stop - start, max(max_points, 1))
+        if k == 0:
+            y = self.raw.read(start, stop, ch)
+            return np.arange(start, start + len(y), dtype=np.float64), y
+        size = self.factor ** k
+        b_oldest = -(-self.raw.oldest // size) # 完整留在环内的最旧块
+        b0 = max(start // size, b_oldest)
+        b1 = (stop - 1) // size + 1
+        if b1 <= b0:
+            y = self.raw.read(start, stop, ch)
+            return np.arange(start, start + len(y), dtype=np.float64), y
+        mins = self._level_read(self._mins[k], k, b0, b1)[ch]
+        maxs = self._level_read(self._maxs[k], k, b0, b1)[ch]
+        n = b1 - b0
+        x = np.empty(2 * n, dtype=np.float64)
+        y = np.empty(2 * n, dtype=mins.dtype)
+        base = np.arange(b0, b1, dtype=np.float64) * size
+        x[0::2] = base
+        x[1::2] = base + size / 2
+        y[0::2] = mins
+        y[1::2] = maxs
+        return x, y
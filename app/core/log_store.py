@@ -0,0 +1,217 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+import numpy as np
+
+class LogView:
+    """
+    列式日志的只读视图：每列是一段 float64 数组（通常是 ColumnarLog 存储的切片，不拷贝）。
+    缺失值用 NaN 表示。
+    """
+    def __init__(self, columns: Mapping[str, np.ndarray], length: int):
+        self.columns = dict(columns)
+        self.length = length
+
+    @classmethod
+    def from_records(cls, records: Sequence[Mapping[str, Any]]) -> 'LogView':
+        """由 list-of-dict 日志一次性转换（兼容旧接口）"""
+        n = len(records)
+        keys: Dict[str, None] = {}
+        for rec in records:
+            for k in rec:
+                keys.setdefault(k, None)
+        columns = {}
+        for k in keys:
+            try:
+                columns[k] = np.fromiter((rec.get(k, np.nan) for rec in records), dtype=float, count=n)
+            except (TypeError, ValueError):
+                continue # 非数值列（例如字符串标签）不参与分析
+        return cls(columns, n)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def keys(self) -> List[str]:
+        return list(self.columns)
+
+    def get(self, name: str, default: Optional[float] = None) -> np.ndarray:
+        """
+        取列；列不存在时返回填满 default 的数组。
+        default 非空时列中的 NaN（该样本缺少此键）也替换为 default。
+        """
+        col = self.columns.get(name)
+        if col is None:
+            return np.full(self.length, np.nan if default is None else default)
+        if default is not None and np.isnan(col).any():
+            return np.where(np.isnan(col), default, col)
+        return col
+
+    def take(self, indices: np.ndarray) -> 'LogView':
+        """按行号取子集（拷贝）"""
+        return LogView({k: v[indices] for k, v in self.columns.items()}, len(indices))
+
+    def slice(self, i0: int, i1: int) -> 'LogView':
+        """按行号区间取子集（视图）"""
+        i0 = max(i0, 0)
+        i1 = min(i1, self.length)
+        return LogView({k: v[i0:i1] for k, v in self.columns.items()}, max(i1 - i0, 0))
+
+    def to_records(self) -> List[Dict[str, float]]:
+        keys = list(self.columns)
+        cols = [self.columns[k].tolist() for k in keys]
+        return [{k: c[i] for k, c in zip(keys, cols) if c[i] == c[i]} for i in range(self.length)]
+
+class ColumnarLog:
+    """
+    按通道分列、可增长的遥测日志。
+
+    每列是一个 float64 数组，容量按倍增摊还扩展；必须包含时间列 "t"。
+    后出现的键会补建新列，之前的行为 NaN。view()/time_slice() 返回 LogView，
+    其中的列是底层存储的切片，追加数据不会影响已取得的视图。
+    时间戳单调不减时（正常采集总是如此），按时间切片用二分查找，O(log n) 且不拷贝。
+    """
+    def __init__(self, capacity: int = 1024):
+        self._capacity = max(capacity, 1)
+        self._n = 0
+        self._cols: Dict[str, np.ndarray] = {"t": np.empty(self._capacity)}
+        self.monotonic = True # t 单调不减，可二分查找
+
+    @classmethod
+    def from_records(cls, records: Sequence[Mapping[str, Any]]) -> 'ColumnarLog':
+        log = cls(capacity=len(records))
+        log.extend_view(LogView.from_records(records))
+        return log
+
+    def __len__(self) -> int:
+        return self._n
+
+    def keys(self) -> List[str]:
+        return list(self._cols)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self._cols.values())
+
+    def _reserve(self, extra: int):
+        need = self._n + extra
+        if need <= self._capacity:
+            return
+        cap = self._capacity
+        while cap < need:
+            cap *= 2
+        for k, col in self._cols.items():
+            grown = np.empty(cap)
+            grown[:self._n] = col[:self._n]
+            self._cols[k] = grown
+        self._capacity = cap
+
+    def _column(self, name: str) -> np.ndarray:
+        col = self._cols.get(name)
+        if col is None:
+            col = np.empty(self._capacity)
+            col[:self._n] = np.nan
+            self._cols[name] = col
+        return col
+
+    def append(self, t: float, values: Mapping[str, float], context: Optional[Mapping[str, float]] = None):
+        self._reserve(1)
+        i = self._n
+        tcol = self._cols["t"]
+        if not (i == 0 or t >= tcol[i - 1]):
+            self.monotonic = False
+        tcol[i] = t
+        written = {"t"}
+        for src in (values, context or {}):
+            for k, v in src.items():
+                self._column(k)[i] = v
+                written.add(k)
+        if len(written) < len(self._cols):
+            for k, col in self._cols.items():
+                if k not in written:
+                    col[i] = np.nan
+        self._n += 1
+
+    def extend(self, t: np.ndarray, columns: Mapping[str, np.ndarray]):
+        """批量追加：t 为时间数组，columns 中每列长度与 t 相同"""
+        t = np.asarray(t, dtype=float)
+        n = len(t)
+        if n == 0:
+            return
+        self._reserve(n)
+        i0, i1 = self._n, self._n + n
+        tcol = self._cols["t"]
+        if self.monotonic:
+            prev = tcol[i0 - 1] if i0 > 0 else -np.inf
+            # NaN 参与比较为 False，因此缺失时间戳也会关闭二分查找
+            if not (t[0] >= prev and np.all(t[1:] >= t[:-1])):
+                self.monotonic = False
+        tcol[i0:i1] = t
+        for k, v in columns.items():
+            if k != "t":
+                self._column(k)[i0:i1] = v
+        for k, col in self._cols.items():
+            if k != "t" and k not in columns:
+                col[i0:i1] = np.nan
+        self._n = i1
+
+    def extend_view(self, view: LogView):
+        t = view.columns.get("t")
+        if t is None:
+            t = np.full(len(view), np.nan)
+        self.extend(t, view.columns)
+
+    def extend_records(self, records: Sequence[Mapping[str, Any]]):
+        self.extend_view(LogView.from_records(records))
+
+    def view(self, i0: int = 0, i1: Optional[int] = None) -> LogView:
+        i1 = self._n if i1 is None else min(i1, self._n)
+        i0 = max(i0, 0)
+        return LogView({k: c[i0:i1] for k, c in self._cols.items()}, max(i1 - i0, 0))
+
+    def column(self, name: str) -> np.ndarray:
+        return self._column(name)[:self._n] if name in self._cols else np.full(self._n, np.nan)
+
+    def time_index(self, start: Optional[float] = None, end: Optional[float] = None):
+        """返回 start <= t <= end 的行号区间 [i0, i1)（要求 t 单调）"""
+        t = self._cols["t"][:self._n]
+        i0 = 0 if start is None else int(np.searchsorted(t, start, side='left'))
+        i1 = self._n if end is None else int(np.searchsorted(t, end, side='right'))
+        return i0, max(i0, i1)
+
+    def time_slice(self, start: Optional[float] = None, end: Optional[float] = None) -> LogView:
+        """返回 start <= t <= end 的样本；t 单调时为零拷贝视图"""
+        if self.monotonic:
+            return self.view(*self.time_index(start, end))
+        t = self._cols["t"][:self._n]
+        mask = np.ones(self._n, dtype=bool)
+        if start is not None:
+            mask &= t >= start
+        if end is not None:
+            mask &= t <= end
+        return self.view().take(np.flatnonzero(mask))
+
+    def time_slices(self, windows: Sequence[Sequence[Optional[float]]]) -> List[LogView]:
+        """批量按时间切片：windows 为 (start, end) 序列，None 表示不限"""
+        if not windows:
+            return []
+        if not self.monotonic:
+            return [self.time_slice(start, end) for start, end in windows]
+        t = self._cols["t"][:self._n]
+        starts = np.array([-np.inf if w[0] is None else w[0] for w in windows], dtype=float)
+        ends = np.array([np.inf if w[1] is None else w[1] for w in windows], dtype=float)
+        i0 = np.searchsorted(t, starts, side='left')
+        i1 = np.maximum(np.searchsorted(t, ends, side='right'), i0)
+        view = self.view()
+        return [view.slice(a, b) for a, b in zip(i0.tolist(), i1.tolist())]
+
+def as_log_view(samples: Any) -> LogView:
+    """把 ColumnarLog / LogView / list-of-dict 统一为 LogView"""
+    if isinstance(samples, LogView):
+        return samples
+    if isinstance(samples, ColumnarLog):
+        return samples.view()
+    return LogView.from_records(list(samples) if samples is not None else [])
@@ -0,0 +1,47 @@
+from typing import Dict
+import numpy as np
+
+def settle_index(within: np.ndarray) -> np.ndarray:
+    """
+    沿最后一轴求最早的 i，使 within[i:] 全为 True；末尾样本不在误差带内时返回 n。
+    等价于反向累积与，但只需一次 argmax：最后一个越界点之后即为稳定起点。
+    """
+    n = within.shape[-1]
+    outside = ~within[..., ::-1]
+    last_out = n - 1 - np.argmax(outside, axis=-1)
+    return np.where(outside.any(axis=-1), last_out + 1, 0)
+
+def response_metrics(times: np.ndarray, y: np.ndarray, r: np.ndarray,
+                     band_ratio: float = 0.02, band_min: float = 0.5) -> Dict[str, np.ndarray]:
+    """
+    向量化的阶跃/跟踪响应指标，O(n)。
+
+    times 形状 (n,)；y 与 r 形状 (..., n)，可带任意批量轴（多路信号或多组候选响应），
+    按广播规则对齐。返回的每个指标形状为批量轴形状。
+    """
+    times = np.asarray(times, dtype=float)
+    y = np.asarray(y, dtype=float)
+    r = np.asarray(r, dtype=float)
+    err = r - y
+    abs_err = np.abs(err)
+    n = err.shape[-1]
+
+    rms = np.sqrt(np.mean(err * err, axis=-1))
+    overshoot = np.max(y - r, axis=-1)
+    energy = np.mean(abs_err, axis=-1)
+    mean_err = np.mean(err, axis=-1, keepdims=True)
+    dev = err - mean_err
+    jitter = np.sqrt(np.mean(dev * dev, axis=-1))
+
+    band = np.maximum(band_ratio * np.abs(r), band_min)
+    idx = settle_index(abs_err <= band)
+    span = times[-1] - times[0]
+    settle_time = np.where(idx < n, times[np.minimum(idx, n - 1)] - times[0], span)
+
+    return {
+        "rms_error": rms,
+        "overshoot": overshoot,
+        "settle_time": settle_time,
+        "energy": energy,
+        "jitter": jitter
+    }
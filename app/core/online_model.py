@@ -0,0 +1,219 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+from .quantile import WindowedSketch, weighted_quantiles
+
+BinKey = Tuple[int, int]
+
+class _StepEvent:
+    """一次目标阶跃的响应跟踪：记录 5% 与 63.2% 穿越时刻"""
+    __slots__ = ("key", "t0", "y0", "total", "sign", "delay")
+
+    def __init__(self, key: BinKey, t0: float, y0: float, target: float):
+        self.key = key
+        self.t0 = t0
+        self.y0 = y0
+        self.total = target - y0
+        self.sign = 1.0 if self.total >= 0 else -1.0
+        self.delay: Optional[float] = None
+
+class _BinState:
+    __slots__ = ("samples", "last_t", "err_w", "err_mean", "err_m2",
+                 "step_w", "tau", "delay", "steps", "sketch", "generation_t")
+
+    def __init__(self, sketch_k: int, t: float):
+        self.samples = 0
+        self.last_t = t
+        # 误差的加权 Welford 统计（权重随时间衰减）
+        self.err_w = 0.0
+        self.err_mean = 0.0
+        self.err_m2 = 0.0
+        # 阶跃辨识结果的加权均值
+        self.step_w = 0.0
+        self.tau = 0.0
+        self.delay = 0.0
+        self.steps = 0
+        # 误差分布的 KLL 草图（两代轮换实现老化），死区取其分位数
+        self.sketch = WindowedSketch(sketch_k)
+        self.generation_t = t
+
+class OnlineModelTable:
+    """
+    随遥测流增量更新的分箱模型表，读取开销 O(箱数)，无需重扫日志。
+
+    每个 (速度, 电压) 箱维护：
+    - 误差 |target - speed| 的 Welford 均值/方差；
+    - 误差的 KLL 分位数草图，死区取其 quantile 分位数，内存固定且可跨箱/跨会话合并；
+    - 目标阶跃事件的响应拟合：阶跃发生时记录起点，输出越过 5% / 63.2% 时分别得到 delay / tau，
+      结果计入阶跃起点所在的箱。
+
+    老化策略：half_life（秒）非空时，误差统计与 tau/delay 的权重按指数衰减，分位数草图每隔
+    half_life 轮换一代；max_age（秒）非空时，超过该时长没有新样本的箱不再出现在表中（prune() 删除）。
+    """
+    def __init__(self, speed_bin: float = 50.0, voltage_bin: float = 2.0, quantile: float = 0.1,
+                 step_threshold: float = 1.0, step_timeout: float = 5.0,
+                 half_life: Optional[float] = None, max_age: Optional[float] = None, sketch_k: int = 64):
+        self.speed_bin = speed_bin
+        self.voltage_bin = voltage_bin
+        self.quantile = quantile
+        self.step_threshold = step_threshold
+        self.step_timeout = step_timeout
+        self.half_life = half_life
+        self.max_age = max_age
+        self.sketch_k = sketch_k
+        self.bins: Dict[BinKey, _BinState] = {}
+        self.now = -math.inf
+        self._prev_target: Optional[float] = None
+        self._step: Optional[_StepEvent] = None
+
+    def reset(self):
+        self.bins = {}
+        self.now = -math.inf
+        self._prev_target = None
+        self._step = None
+
+    def configure(self, speed_bin: float, voltage_bin: float):
+        """修改分箱尺寸；尺寸变化时已有统计无法重新分配，直接清空"""
+        if speed_bin != self.speed_bin or voltage_bin != self.voltage_bin:
+            self.speed_bin = speed_bin
+            self.voltage_bin = voltage_bin
+            self.reset()
+
+    def _key(self, speed: float, voltage: float) -> BinKey:
+        return (math.floor(speed / self.speed_bin), math.floor(voltage / self.voltage_bin))
+
+    def _decay(self, state: _BinState, t: float):
+        if self.half_life and t > state.last_t:
+            f = 0.5 ** ((t - state.last_t) / self.half_life)
+            state.err_w *= f
+            state.err_m2 *= f
+            state.step_w *= f
+        state.last_t = max(state.last_t, t)
+
+    def update(self, t: float, speed: float, voltage: float = 0.0, target: Optional[float] = None):
+        if speed != speed:
+            return
+        if voltage != voltage:
+            voltage = 0.0
+        self.now = max(self.now, t)
+        key = self._key(speed, voltage)
+        state = self.bins.get(key)
+        if state is None:
+            state = self.bins[key] = _BinState(self.sketch_k, t)
+        self._decay(state, t)
+        state.samples += 1
+
+        if target is not None and target == target:
+            err = abs(target - speed)
+            state.err_w += 1.0
+            delta = err - state.err_mean
+            state.err_mean += delta / state.err_w
+            state.err_m2 += delta * (err - state.err_mean)
+            if self.half_life and t - state.generation_t >= self.half_life:
+                state.sketch.rotate()
+                state.generation_t = t
+            state.sketch.update(err)
+            self._track_step(t, speed, target, key)
+
+    def _track_step(self, t: float, speed: float, target: float, key: BinKey):
+        prev = self._prev_target
+        self._prev_target = target
+        if prev is not None and abs(target - prev) >= self.step_threshold:
+            # 新阶跃覆盖尚未完成的旧阶跃
+            self._step = _StepEvent(key, t, speed, target) if abs(target - speed) > 1e-6 else None
+            return
+        ev = self._step
+        if ev is None:
+            return
+        if t - ev.t0 > self.step_timeout:
+            self._step = None
+            return
+        if ev.delay is None and (speed - (ev.y0 + 0.05 * ev.total)) * ev.sign >= 0:
+            ev.delay = t - ev.t0
+        if (speed - (ev.y0 + 0.632 * ev.total)) * ev.sign >= 0:
+            self._add_step(ev.key, t - ev.t0, ev.delay if ev.delay is not None else 0.0, t)
+            self._step = None
+
+    def _add_step(self, key: BinKey, tau: float, delay: float, t: float):
+        state = self.bins.get(key)
+        if state is None:
+            return
+        self._decay(state, t)
+        state.step_w += 1.0
+        state.tau += (tau - state.tau) / state.step_w
+        state.delay += (delay - state.delay) / state.step_w
+        state.steps += 1
+
+    def _alive(self, state: _BinState) -> bool:
+        return self.max_age is None or self.now - state.last_t <= self.max_age
+
+    def prune(self) -> int:
+        """删除超过 max_age 未更新的箱，返回删除数量"""
+        stale = [k for k, s in self.bins.items() if not self._alive(s)]
+        for k in stale:
+            del self.bins[k]
+        return len(stale)
+
+    def _deadzone(self, state: _BinState) -> float:
+        value = state.sketch.quantile(self.quantile)
+        return 0.0 if value != value else value
+
+    def deadzone(self, keys: Optional[List[BinKey]] = None, quantile: Optional[float] = None) -> float:
+        """若干箱（默认全部）合并后的误差分位数"""
+        states = [self.bins[k] for k in keys if k in self.bins] if keys is not None else list(self.bins.values())
+        sketches = [sk for st in states for sk in (st.sketch.current, st.sketch.previous)]
+        value = float(weighted_quantiles(sketches, [self.quantile if quantile is None else quantile])[0])
+        return 0.0 if value != value else value
+
+    def merge(self, other: 'OnlineModelTable'):
+        """
+        并入另一张表（例如另一次会话），要求分箱尺寸相同。
+        误差统计用 Chan 公式合并，tau/delay 按权重合并，草图逐代合并。
+        """
+        if (other.speed_bin, other.voltage_bin) != (self.speed_bin, self.voltage_bin):
+            raise ValueError("bin sizes differ")
+        for key, src in other.bins.items():
+            dst = self.bins.get(key)
+            if dst is None:
+                dst = self.bins[key] = _BinState(self.sketch_k, src.last_t)
+            w = dst.err_w + src.err_w
+            if w > 0:
+                delta = src.err_mean - dst.err_mean
+                dst.err_m2 += src.err_m2 + delta * delta * dst.err_w * src.err_w / w
+                dst.err_mean += delta * src.err_w / w
+                dst.err_w = w
+            sw = dst.step_w + src.step_w
+            if sw > 0:
+                dst.tau = (dst.tau * dst.step_w + src.tau * src.step_w) / sw
+                dst.delay = (dst.delay * dst.step_w + src.delay * src.step_w) / sw
+                dst.step_w = sw
+            dst.steps += src.steps
+            dst.samples += src.samples
+            dst.last_t = max(dst.last_t, src.last_t)
+            dst.sketch.current.merge(src.sketch.current)
+            if src.sketch.previous is not None:
+                if dst.sketch.previous is None:
+                    dst.sketch.previous = src.sketch.previous.copy()
+                else:
+                    dst.sketch.previous.merge(src.sketch.previous)
+        self.now = max(self.now, other.now)
+
+    def table(self, min_samples: int = 5) -> List[Dict]:
+        """当前模型表快照，格式与 ControlCompiler.build_model_table 相同，另附误差统计与阶跃次数"""
+        result = []
+        for (sp, v), state in sorted(self.bins.items()):
+            if state.samples < min_samples or not self._alive(state):
+                continue
+            var = state.err_m2 / state.err_w if state.err_w > 0 else 0.0
+            result.append({
+                "speed_bin": [sp * self.speed_bin, (sp + 1) * self.speed_bin],
+                "voltage_bin": [v * self.voltage_bin, (v + 1) * self.voltage_bin],
+                "tau": state.tau,
+                "delay": state.delay,
+                "deadzone": self._deadzone(state),
+                "samples": state.samples,
+                "steps": state.steps,
+                "err_mean": state.err_mean,
+                "err_std": math.sqrt(max(var, 0.0))
+            })
+        return result
@@ -0,0 +1,135 @@
+import struct
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from .protocol import MsgType
+
+# PARAM_SET 载荷: 条目数 u8 | 条目数 × (参数 id u16 | 值 4 字节，按参数类型的小端编码)
+PARAM_ENTRY = struct.Struct('<H4s')
+PARAM_COUNT = struct.Struct('<B')
+MAX_ENTRIES_PER_FRAME = 255
+# 未协商时的载荷上限（与 firmware_ref PROTOCOL_MAX_PAYLOAD 一致）
+DEFAULT_PARAM_MTU = 256
+# HELLO_RSP 载荷: 下位机可接收的最大载荷长度 u16（旧固件为空载荷）
+HELLO_RSP = struct.Struct('<H')
+
+ParamEntry = Tuple[int, bytes]
+
+def parse_hello(payload: bytes) -> Optional[int]:
+    """从 HELLO_RSP 取下位机声明的最大载荷长度；旧固件未声明时返回 None"""
+    if len(payload) < HELLO_RSP.size:
+        return None
+    return HELLO_RSP.unpack_from(payload)[0]
+
+def entries_per_frame(mtu: int) -> int:
+    return max(1, min((mtu - PARAM_COUNT.size) // PARAM_ENTRY.size, MAX_ENTRIES_PER_FRAME))
+
+def pack_param_frames(entries: Iterable[ParamEntry], mtu: int = DEFAULT_PARAM_MTU) -> List[bytes]:
+    """把 (id, 值) 按 mtu 切分打包成若干 PARAM_SET 载荷"""
+    entries = list(entries)
+    per = entries_per_frame(mtu)
+    frames = []
+    for start in range(0, len(entries), per):
+        chunk = entries[start:start + per]
+        frames.append(PARAM_COUNT.pack(len(chunk)) + b''.join(PARAM_ENTRY.pack(pid, value) for pid, value in chunk))
+    return frames
+
+def unpack_param_set(payload: bytes) -> List[ParamEntry]:
+    """解析 PARAM_SET 载荷（下位机侧逻辑的参考实现，供模拟器使用）"""
+    if not payload:
+        raise ValueError("空的 PARAM_SET 载荷")
+    count = payload[0]
+    if len(payload) < PARAM_COUNT.size + count * PARAM_ENTRY.size:
+        raise ValueError("PARAM_SET 载荷被截断")
+    return [PARAM_ENTRY.unpack_from(payload, PARAM_COUNT.size + i * PARAM_ENTRY.size) for i in range(count)]
+
+class ParamTransfer:
+    """
+    批量参数下发：多个 (id, 值) 打包进一个 PARAM_SET 帧，最多 window 帧同时等待 ACK（滑动窗口）。
+    每帧独立序号、独立 ACK 定时器（见 Dispatcher），超时只重发未确认的那一帧；
+    某帧重试耗尽即判定整体失败，不再发送后续帧。
+
+    dispatcher 为 Dispatcher 或 SyncDispatcher；回调在其 ACK 处理线程中调用。
+    """
+    def __init__(self, dispatcher, entries: Sequence[ParamEntry], mtu: int = DEFAULT_PARAM_MTU, window: int = 4,
+                 on_done: Optional[Callable[[bool], None]] = None,
+                 on_progress: Optional[Callable[[int, int], None]] = None):
+        self.dispatcher = dispatcher
+        self.frames = pack_param_frames(entries, mtu)
+        self.counts = [frame[0] for frame in self.frames]
+        self.window = max(1, window)
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.next_frame = 0
+        self.in_flight = 0
+        self.acked_params = 0
+        self.total_params = sum(self.counts)
+        self.ok: Optional[bool] = None
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def start(self) -> "ParamTransfer":
+        self.started = time.perf_counter()
+        if not self.frames:
+            self._finish(True)
+            return self
+        self._pump()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[bool]:
+        self.done.wait(timeout)
+        return self.ok
+
+    @property
+    def params_per_second(self) -> float:
+        return self.acked_params / self.elapsed if self.elapsed > 0 else 0.0
+
+    def _pump(self):
+        """窗口未满时继续发送后续帧"""
+        while True:
+            with self.lock:
+                if self.ok is not None or self.in_flight >= self.window or self.next_frame >= len(self.frames):
+                    return
+                index = self.next_frame
+                self.next_frame += 1
+                self.in_flight += 1
+            self.dispatcher.send(MsgType.PARAM_SET, self.frames[index], need_ack=True,
+                                 callback=lambda ok, index=index: self._on_ack(index, ok))
+
+    def _on_ack(self, index: int, ok: bool):
+        with self.lock:
+            self.in_flight -= 1
+            if self.ok is not None:
+                return
+            if ok:
+                self.acked_params += self.counts[index]
+            acked = self.acked_params
+            complete = self.in_flight == 0 and self.next_frame >= len(self.frames)
+        if not ok:
+            self._finish(False)
+            return
+        if self.on_progress:
+            self.on_progress(acked, self.total_params)
+        if complete:
+            self._finish(True)
+        else:
+            self._pump()
+
+    def _finish(self, ok: bool):
+        with self.lock:
+            if self.ok is not None:
+                return
+            self.ok = ok
+            self.elapsed = time.perf_counter() - self.started
+        self.done.set()
+        if self.on_done:
+            self.on_done(ok)
+
+def send_params(dispatcher, entries: Sequence[ParamEntry], mtu: int = DEFAULT_PARAM_MTU, window: int = 4,
+                on_done: Optional[Callable[[bool], None]] = None,
+                on_progress: Optional[Callable[[int, int], None]] = None) -> ParamTransfer:
+    """打包并开始一次批量参数下发，返回进行中的 ParamTransfer"""
+    return ParamTransfer(dispatcher, entries, mtu, window, on_done, on_progress).start()
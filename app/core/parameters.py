@@ -1,10 +1,11 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pydantic import BaseModel, Field
 import struct
 import json
 
 class ParameterDef(BaseModel):
     name: str
+    id: int = -1 # PARAM_SET 中的参数编号；字典未给出时按字典中的顺序分配
     type: str # int, float, bool
     min_val: float = 0
     max_val: float = 0
@@ -22,6 +23,8 @@ class TelemetryDef(BaseModel):
     unit: str
     group: str
     index: int # 遥测数组中的索引
+    scale: float = 1.0 # 定点字段: 物理值 = 原始值 × scale + offset（见 telemetry_schema）
+    offset: float = 0.0
 
 class ParameterManager:
     def __init__(self):
@@ -35,8 +38,10 @@ class ParameterManager:
             data = json.loads(json_data)
             
             # 加载参数
-            for p_data in data.get('params', []):
+            for idx, p_data in enumerate(data.get('params', [])):
                 p = ParameterDef(**p_data)
+                if p.id < 0:
+                    p.id = idx
                 self.params[p.name] = p
                 if p.group not in self.groups:
                     self.groups[p.group] = []
@@ -66,3 +71,15 @@ class ParameterManager:
         elif p.type == 'uint':
             return struct.pack('<I', int(value))
         return b''
+
+    def get_param_entries(self, values: Dict[str, Any]) -> List[Tuple[int, bytes]]:
+        """把 {参数名: 值} 编码为批量 PARAM_SET 的 (id, 值) 条目；未知或不可写的参数被跳过"""
+        entries = []
+        for name, value in values.items():
+            p = self.params.get(name)
+            if p is None or not p.rw:
+                continue
+            data = self.get_param_bytes(name, value)
+            if data:
+                entries.append((p.id, data))
+        return entries
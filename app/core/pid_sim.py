@@ -0,0 +1,127 @@
+from typing import Dict, Union
+import numpy as np
+
+ArrayLike = Union[float, np.ndarray]
+
+def simulate_pid_batch(r: np.ndarray, times: np.ndarray, tau: ArrayLike, dt: float,
+                       kp: ArrayLike, ki: ArrayLike, kd: ArrayLike, u_limit: float,
+                       band_ratio: float = 0.02, band_min: float = 0.5,
+                       block: int = 256, return_trajectories: bool = False) -> Dict[str, np.ndarray]:
+    """
+    同步仿真一批 PID 候选（一阶对象 y' = (u - y) / tau），候选沿向量轴 (C,) 同步步进。
+
+    逐步递推与 ControlCompiler._simulate_pid 相同（常数因子预先合并，结果在浮点舍入误差内一致）；
+    时间轴按 block 分段，每段结束后直接在 (block × C) 数组上累计代价项，内存为 O(block × C) 而非 O(n × C)。
+    返回 (C,) 数组: rms_error / overshoot / settle_time / energy / jitter / saturation，
+    与对仿真结果调用 compute_metrics 的定义一致。return_trajectories=True 时额外返回
+    y 与 u 的 (C, n) 轨迹。
+    """
+    r = np.asarray(r, dtype=float)
+    times = np.asarray(times, dtype=float)
+    kp, ki, kd = np.broadcast_arrays(np.atleast_1d(np.asarray(kp, dtype=float)),
+                                     np.atleast_1d(np.asarray(ki, dtype=float)),
+                                     np.atleast_1d(np.asarray(kd, dtype=float)))
+    c = kp.shape[0]
+    n = len(r)
+    if n == 0 or dt <= 0:
+        return {}
+    gain = dt / np.maximum(np.asarray(tau, dtype=float), 1e-3)
+    kd_dt = kd / dt
+    sat_level = 0.98 * u_limit
+
+    y = np.full(c, r[0])
+    integral = np.zeros(c)
+    prev_err = np.zeros(c)
+    err = np.empty(c)
+    tmp = np.empty(c)
+
+    # 分段累计量
+    sum_sq = np.zeros(c)
+    sum_abs = np.zeros(c)
+    overshoot = np.full(c, -np.inf)
+    mean = np.zeros(c)
+    m2 = np.zeros(c)
+    last_out = np.full(c, -1, dtype=np.int64)
+    sat_count = np.zeros(c)
+
+    ys_block = np.empty((block, c))
+    us_block = np.empty((block, c))
+    if return_trajectories:
+        ys_all = np.empty((c, n))
+        us_all = np.empty((c, n))
+
+    for i0 in range(0, n, block):
+        i1 = min(i0 + block, n)
+        for j, ref in enumerate(r[i0:i1].tolist()):
+            # u 与 y 直接写入本段的轨迹行，省去额外拷贝
+            u = us_block[j]
+            y_next = ys_block[j]
+            np.subtract(ref, y, out=err)
+            np.multiply(err, dt, out=tmp)
+            integral += tmp
+            np.subtract(err, prev_err, out=tmp)
+            tmp *= kd_dt
+            np.multiply(kp, err, out=u)
+            u += ki * integral
+            u += tmp
+            np.minimum(u, u_limit, out=u)
+            np.maximum(u, -u_limit, out=u)
+            np.subtract(u, y, out=tmp)
+            tmp *= gain
+            np.add(y, tmp, out=y_next)
+            y = y_next
+            prev_err, err = err, prev_err
+        y = y.copy() # 下一段会覆盖本段的轨迹缓冲
+
+        m = i1 - i0
+        yb = ys_block[:m]
+        ub = us_block[:m]
+        rb = r[i0:i1, np.newaxis]
+        e = rb - yb
+        abs_e = np.abs(e)
+        sum_sq += np.einsum('ij,ij->j', e, e)
+        sum_abs += abs_e.sum(axis=0)
+        # max(y - r) = -min(e)；用 0.0 - x 避免产生 -0.0
+        np.maximum(overshoot, 0.0 - e.min(axis=0), out=overshoot)
+        # Chan 并行合并各段的均值与二阶矩，保证 jitter 的数值稳定性
+        b_mean = e.mean(axis=0)
+        b_m2 = ((e - b_mean) ** 2).sum(axis=0)
+        delta = b_mean - mean
+        mean += delta * (m / i1)
+        m2 += b_m2 + delta * delta * (i0 * m / i1)
+        band = np.maximum(band_ratio * np.abs(rb), band_min)
+        outside = abs_e > band
+        any_out = outside.any(axis=0)
+        idx = m - 1 - np.argmax(outside[::-1], axis=0)
+        last_out = np.where(any_out, i0 + idx, last_out)
+        sat_count += (np.abs(ub) >= sat_level).sum(axis=0)
+        if return_trajectories:
+            ys_all[:, i0:i1] = yb.T
+            us_all[:, i0:i1] = ub.T
+
+    span = times[-1] - times[0]
+    settle_idx = last_out + 1
+    settle_time = np.where(settle_idx < n, times[np.minimum(settle_idx, n - 1)] - times[0], span)
+    result = {
+        "rms_error": np.sqrt(sum_sq / n),
+        "overshoot": overshoot,
+        "settle_time": settle_time,
+        "energy": sum_abs / n,
+        "jitter": np.sqrt(m2 / n),
+        "saturation": sat_count / n
+    }
+    if return_trajectories:
+        result["y"] = ys_all
+        result["u"] = us_all
+    return result
+
+def pid_cost(metrics: Dict[str, np.ndarray], weight: Dict[str, float]) -> np.ndarray:
+    """auto_tune 的加权代价，逐候选计算"""
+    return (
+        weight["rms"] * metrics["rms_error"] +
+        weight["overshoot"] * np.maximum(0.0, metrics["overshoot"]) +
+        weight["settle"] * metrics["settle_time"] +
+        weight["sat"] * metrics["saturation"] +
+        weight["energy"] * metrics["energy"] +
+        weight["jitter"] * metrics["jitter"]
+    )
@@ -0,0 +1,344 @@
+import importlib
+import multiprocessing
+import time
+import traceback
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .algo_sdk import AlgorithmBase
+
+# 共享头部字段（int64）
+H_CURRENT = 0 # 工作进程正在执行的插件下标，空闲时为 -1；卡死时据此定位插件
+HEADER_FIELDS = 1
+
+class ShmRing:
+    """
+    共享内存中的 (capacity × cols) float64 行环。行按全局序号寻址，序号对 capacity 取模得到槽位，
+    读写两端只交换序号，块数据不经过序列化。
+    """
+    def __init__(self, cols: int, capacity: int, name: Optional[str] = None):
+        self.cols = max(int(cols), 1)
+        self.capacity = int(capacity)
+        size = self.cols * self.capacity * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.owner = name is None
+        self.data = np.ndarray((self.capacity, self.cols), dtype=np.float64, buffer=self.shm.buf)
+
+    def spec(self) -> Tuple[int, int, str]:
+        return self.cols, self.capacity, self.shm.name
+
+    @classmethod
+    def attach(cls, spec: Tuple[int, int, str]) -> 'ShmRing':
+        cols, capacity, name = spec
+        return cls(cols, capacity, name)
+
+    def _slots(self, seq: int, n: int):
+        start = seq % self.capacity
+        first = min(n, self.capacity - start)
+        return start, first
+
+    def write(self, seq: int, rows: np.ndarray):
+        n = len(rows)
+        start, first = self._slots(seq, n)
+        self.data[start:start + first] = rows[:first]
+        self.data[:n - first] = rows[first:]
+
+    def read(self, seq: int, n: int) -> np.ndarray:
+        start, first = self._slots(seq, n)
+        if first == n:
+            return self.data[start:start + n].copy()
+        return np.concatenate((self.data[start:], self.data[:n - first]))
+
+    def close(self):
+        self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _load_plugin(module: str, qualname: str) -> AlgorithmBase:
+    cls = importlib.import_module(module)
+    for part in qualname.split("."):
+        cls = getattr(cls, part)
+    return cls()
+
+def _worker_main(conn, header_spec, in_spec, out_spec, plugin_specs, input_keys, output_map,
+                 default_deadline, max_misses):
+    """
+    工作进程入口。plugin_specs 为拓扑序的 (名称, 模块, 类名, 时限)；output_map 为 输出键 -> (列, 插件名)。
+    每块收到 ("run", 序号, 行数, 存在的输入列, 要执行的插件)，结果写入输出环后回复耗时与新禁用的插件；
+    ("enable", 插件名) 重新启用被自动禁用的插件并清零其超时计数（不回复）。
+    """
+    header_shm = shared_memory.SharedMemory(name=header_spec)
+    header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=header_shm.buf)
+    ring_in = ShmRing.attach(in_spec)
+    ring_out = ShmRing.attach(out_spec)
+    plugins = []
+    for name, module, qualname, deadline in plugin_specs:
+        plugins.append((name, _load_plugin(module, qualname), deadline or default_deadline))
+    owned: Dict[str, List[Tuple[str, int]]] = {}
+    for key, (col, producer) in output_map.items():
+        owned.setdefault(producer, []).append((key, col))
+    misses = {name: 0 for name, _, _ in plugins}
+    disabled = set()
+    conn.send(("ready",))
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            if msg[0] == "enable":
+                disabled.discard(msg[1])
+                misses[msg[1]] = 0
+                continue
+            _, seq, n, present, active = msg
+            rows = ring_in.read(seq, n)
+            dt = rows[:, -1]
+            available = {input_keys[j]: rows[:, j] for j in present}
+            out = np.full((n, ring_out.cols), np.nan)
+            timings = {}
+            newly_disabled = []
+            for idx, (name, plugin, deadline) in enumerate(plugins):
+                if name not in active or name in disabled:
+                    continue
+                header[H_CURRENT] = idx
+                start = time.perf_counter()
+                try:
+                    outputs = plugin.update_batch(available, dt)
+                except Exception:
+                    disabled.add(name)
+                    newly_disabled.append((name, "异常: " + traceback.format_exc(limit=3).strip().splitlines()[-1]))
+                    continue
+                elapsed = time.perf_counter() - start
+                timings[name] = elapsed
+                if elapsed > deadline:
+                    misses[name] += 1
+                    if misses[name] >= max_misses:
+                        disabled.add(name)
+                        newly_disabled.append((name, f"连续 {misses[name]} 块超过时限 {deadline * 1e3:.1f} ms"))
+                else:
+                    misses[name] = 0
+                for key, col in owned.get(name, ()):
+                    value = outputs.get(key)
+                    if value is not None:
+                        out[:, col] = value
+                        available[key] = out[:, col]
+            header[H_CURRENT] = -1
+            ring_out.write(seq, out)
+            conn.send(("done", seq, n, timings, newly_disabled))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        header = None
+        ring_in.close()
+        ring_out.close()
+        header_shm.close()
+
+class PluginHost:
+    """
+    在独立进程中执行插件，慢插件或异常插件不会阻塞主线程。
+
+    遥测块写入共享内存输入环（最后一列为 dt），工作进程按拓扑序执行插件，把输出写入共享内存
+    输出环；管道上每块只传递序号与行数。主线程最多等待 timeout 秒，超时则本块没有插件输出
+    （迟到的结果被丢弃），上一块未完成时新块直接丢弃，因此任意时刻最多一块在途。时限：
+    - 每个插件每块的执行时间超过其时限（AlgorithmBase.deadline，缺省为 deadline）连续 max_misses 次，
+      或抛出异常时，由工作进程自动禁用；
+    - 工作进程超过 hang_timeout 没有完成任何块时视为卡死：终止进程、禁用正在执行的插件并重启。
+    被禁用的插件记录在 disabled（插件名 -> 原因），新发生的禁用由 take_disabled() 取走；
+    enable() 重新启用。
+    """
+    def __init__(self, plugins: Sequence[AlgorithmBase], producers: Dict[str, str], input_keys: Sequence[str],
+                 capacity: int = 16384, deadline: float = 0.005, max_misses: int = 5,
+                 timeout: float = 0.02, hang_timeout: float = 1.0, start_timeout: float = 30.0):
+        self.plugins = list(plugins)
+        self.names = [p.name for p in self.plugins]
+        self.input_keys = list(input_keys)
+        self.output_keys = [k for p in self.plugins for k in p.outputs if producers.get(k) == p.name]
+        self.output_map = {k: (j, producers[k]) for j, k in enumerate(self.output_keys)}
+        self.capacity = capacity
+        self.deadline = deadline
+        self.max_misses = max_misses
+        self.timeout = timeout
+        self.hang_timeout = hang_timeout
+        self.start_timeout = start_timeout
+        self.disabled: Dict[str, str] = {}
+        self._newly_disabled: List[Tuple[str, str]] = []
+        self.stats = {"blocks": 0, "late": 0, "dropped": 0, "restarts": 0}
+        self.process = None
+        self.conn = None
+        self._header_shm = None
+        self.header = None
+        self.ring_in: Optional[ShmRing] = None
+        self.ring_out: Optional[ShmRing] = None
+
+    def start(self):
+        self._header_shm = shared_memory.SharedMemory(create=True, size=HEADER_FIELDS * 8)
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self._header_shm.buf)
+        self.ring_in = ShmRing(len(self.input_keys) + 1, self.capacity)
+        self.ring_out = ShmRing(len(self.output_keys), self.capacity)
+        try:
+            self._spawn()
+            if not self.conn.poll(self.start_timeout):
+                raise RuntimeError("plugin host did not start")
+            self.conn.recv()
+        except BaseException:
+            self.stop()
+            raise
+        self._ready = True
+
+    def _spawn(self):
+        """启动工作进程，不等待就绪（重启时主线程不阻塞，就绪前的块直接丢弃）"""
+        self.header[H_CURRENT] = -1
+        self.submitted = 0
+        self._inflight: Optional[Tuple[int, float]] = None # (序号, 提交时刻)
+        specs = [(p.name, type(p).__module__, type(p).__qualname__, getattr(p, "deadline", None))
+                 for p in self.plugins]
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        process = ctx.Process(target=_worker_main, daemon=True, name="plugin-host",
+                              args=(child, self._header_shm.name, self.ring_in.spec(), self.ring_out.spec(),
+                                    specs, self.input_keys, self.output_map, self.deadline, self.max_misses))
+        try:
+            process.start()
+        finally:
+            child.close()
+        self.process = process
+        self._ready = False
+        self._spawned_at = time.perf_counter()
+
+    def stop(self):
+        if self.process is not None:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(1.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.conn.close()
+            self.process = None
+        if self.ring_in is not None:
+            self.header = None
+            self.ring_in.close()
+            self.ring_out.close()
+            self._header_shm.close()
+            self._header_shm.unlink()
+            self.ring_in = self.ring_out = self._header_shm = None
+
+    def _restart(self, reason: Optional[str]):
+        """终止工作进程；reason 非空时禁用正在执行的插件。插件状态随进程丢失"""
+        current = int(self.header[H_CURRENT])
+        if reason is not None and 0 <= current < len(self.names):
+            self._disable(self.names[current], reason)
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+        self.stats["restarts"] += 1
+        self._spawn()
+
+    def _disable(self, name: str, reason: str):
+        if name not in self.disabled:
+            self.disabled[name] = reason
+            self._newly_disabled.append((name, reason))
+
+    def take_disabled(self) -> List[Tuple[str, str]]:
+        """取走上次调用以来新禁用的插件 [(插件名, 原因)]"""
+        events, self._newly_disabled = self._newly_disabled, []
+        return events
+
+    def enable(self, name: str):
+        """重新启用被自动禁用的插件；工作进程中的超时计数同时清零"""
+        if self.disabled.pop(name, None) is None:
+            return
+        self._newly_disabled = [(n, r) for n, r in self._newly_disabled if n != name]
+        try:
+            self.conn.send(("enable", name))
+        except (BrokenPipeError, OSError):
+            pass # 进程已退出，重启后的工作进程没有禁用状态
+
+    def _check_ready(self) -> bool:
+        if not self._ready:
+            try:
+                if self.conn.poll(0):
+                    self.conn.recv()
+                    self._ready = True
+            except (EOFError, OSError):
+                pass
+            if not self._ready and (not self.process.is_alive()
+                                    or time.perf_counter() - self._spawned_at > self.start_timeout):
+                self._restart(None)
+        return self._ready
+
+    def _receive(self, wait: float) -> Tuple[Optional[tuple], Dict[str, float]]:
+        """处理回复直到收到当前在途块的结果或超时；返回 (完成的块, 累计耗时)"""
+        timings: Dict[str, float] = {}
+        deadline = time.perf_counter() + wait
+        while self._inflight is not None:
+            remaining = deadline - time.perf_counter()
+            try:
+                if not self.conn.poll(max(remaining, 0.0)):
+                    return None, timings
+                _, seq, n, block_timings, newly_disabled = self.conn.recv()
+            except (EOFError, OSError):
+                self._restart("工作进程退出")
+                return None, timings
+            for name, reason in newly_disabled:
+                self._disable(name, reason)
+            for name, elapsed in block_timings.items():
+                timings[name] = timings.get(name, 0.0) + elapsed
+            if seq == self._inflight[0]:
+                self._inflight = None
+                return (seq, n), timings
+            # 迟到的旧块：结果丢弃，耗时照常统计
+        return None, timings
+
+    def run_batch(self, columns: Dict[str, np.ndarray], dt, active: Sequence[str]) -> Tuple[Dict[str, np.ndarray], Dict[str, float]]:
+        """
+        执行一块。返回 (虚拟遥测, 各插件耗时)；超时、丢块或无插件可执行时虚拟遥测为空。
+        """
+        n = len(dt) if np.ndim(dt) else len(next(iter(columns.values()), ()))
+        active = [name for name in active if name not in self.disabled]
+        if not self._check_ready():
+            self.stats["dropped"] += 1
+            return {}, {}
+        # 先收取上一块的迟到回复
+        _, timings = self._receive(0.0)
+        if self._inflight is not None:
+            if time.perf_counter() - self._inflight[1] > self.hang_timeout:
+                self._restart(f"超过 {self.hang_timeout:.1f} s 未返回")
+            # 上一块仍在执行（或进程刚重启）：丢弃本块，避免积压
+            self.stats["dropped"] += 1
+            return {}, timings
+        if n == 0 or not active:
+            return {}, timings
+        if n > self.capacity:
+            columns = {k: v[-self.capacity:] for k, v in columns.items()}
+            dt = np.broadcast_to(np.asarray(dt, dtype=float), (n,))[-self.capacity:]
+            n = self.capacity
+        rows = np.empty((n, self.ring_in.cols))
+        present = []
+        for j, key in enumerate(self.input_keys):
+            col = columns.get(key)
+            if col is not None:
+                rows[:, j] = col
+                present.append(j)
+        rows[:, -1] = dt
+        seq = self.submitted
+        self.ring_in.write(seq, rows)
+        self.submitted += n
+        self._inflight = (seq, time.perf_counter())
+        try:
+            self.conn.send(("run", seq, n, present, active))
+        except (BrokenPipeError, OSError):
+            self._restart("工作进程退出")
+            return {}, timings
+        self.stats["blocks"] += 1
+        done, block_timings = self._receive(self.timeout)
+        for name, elapsed in block_timings.items():
+            timings[name] = timings.get(name, 0.0) + elapsed
+        if done is None:
+            self.stats["late"] += 1
+            return {}, timings
+        out = self.ring_out.read(seq, n)
+        return {k: out[:, j] for k, (j, producer) in self.output_map.items() if producer in block_timings}, timings
@@ -3,16 +3,38 @@ import importlib
 import inspect
 import os
 import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
 from app.core.algo_sdk import AlgorithmBase
+from app.core.plugin_host import PluginHost
 
 class PluginManager:
+    """
+    插件加载与执行图。
+
+    插件按声明的 inputs / outputs 连成有向图：输入键由遥测源 (sources) 或其他插件的输出提供，
+    因此插件可以消费上游插件的虚拟遥测。执行顺序为拓扑序；只有输出被订阅（示波器、编译器或
+    下游插件间接需要）的插件才会运行。加载时报告环、缺失输入与输出键冲突（见 problems）。
+    start_host() 后插件改在独立工作进程中执行（见 PluginHost）。
+    """
     def __init__(self, plugin_dir="app/plugins"):
         self.plugin_dir = plugin_dir
         self.plugins = {}
+        self.sources: Optional[Set[str]] = None # 遥测源键；None 表示未知，不检查缺失输入
+        self.order: List[str] = []              # 可执行插件的拓扑序
+        self.producers: Dict[str, str] = {}     # 输出键 -> 插件名
+        self.deps: Dict[str, Set[str]] = {}     # 插件名 -> 上游插件名
+        self.problems: List[str] = []
+        self.subscriptions: Dict[str, Set[str]] = {} # 订阅者 -> 键集合
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._active_cache = None
+        self.host: Optional[PluginHost] = None
+        self.host_options: Dict = {}
 
-    def discover_plugins(self):
+    def discover_plugins(self, sources: Optional[Iterable[str]] = None):
         """
-        从插件目录动态加载插件。
+        从插件目录动态加载插件，随后建立执行图。
         """
         # 确保插件目录在路径中
         if self.plugin_dir not in sys.path:
@@ -40,6 +62,188 @@ class PluginManager:
             except Exception as e:
                 print(f"[PluginManager] 加载 {name} 失败: {e}")
 
+        if sources is not None:
+            self.sources = set(sources)
+        self.build_graph()
+
+    def set_sources(self, sources: Iterable[str]):
+        """更新遥测源键并重建执行图"""
+        self.sources = set(sources)
+        self.build_graph()
+
+    def build_graph(self) -> List[str]:
+        """
+        按声明的键建立依赖并拓扑排序（Kahn 算法，同层按名称排序保证顺序稳定）。
+        输出键冲突时保留名称靠前的插件；处于环上的插件及其下游不参与执行。
+        """
+        problems = []
+        producers: Dict[str, str] = {}
+        for name in sorted(self.plugins):
+            for key in self.plugins[name].outputs:
+                if key in producers:
+                    problems.append(f"输出冲突: {name} 与 {producers[key]} 都输出 {key}，忽略 {name} 的该输出")
+                elif self.sources is not None and key in self.sources:
+                    problems.append(f"输出冲突: {name} 的输出 {key} 与遥测源同名，已忽略")
+                else:
+                    producers[key] = name
+
+        deps: Dict[str, Set[str]] = {}
+        for name in sorted(self.plugins):
+            deps[name] = set()
+            for key in self.plugins[name].inputs:
+                upstream = producers.get(key)
+                if upstream is not None and upstream != name:
+                    deps[name].add(upstream)
+                elif upstream is None and self.sources is not None and key not in self.sources:
+                    problems.append(f"缺失输入: {name} 需要 {key}，没有遥测源或插件提供")
+
+        pending = {name: len(d) for name, d in deps.items()}
+        ready = sorted(name for name, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for other, d in deps.items():
+                if name in d:
+                    pending[other] -= 1
+                    if pending[other] == 0:
+                        ready.append(other)
+            ready.sort()
+        blocked = sorted(set(deps) - set(order))
+        if blocked:
+            problems.append(f"依赖环: {', '.join(blocked)} 无法排序，不会执行")
+
+        self.producers = {k: p for k, p in producers.items() if p in order}
+        self.order = order
+        self.deps = deps
+        self.problems = problems
+        self._active_cache = None
+        for msg in problems:
+            print(f"[PluginManager] {msg}")
+        if self.host is not None:
+            self.stop_host()
+            self.start_host(**self.host_options)
+        return order
+
+    def output_keys(self) -> List[str]:
+        """可执行插件提供的全部虚拟遥测键（按拓扑序）"""
+        return [k for name in self.order for k in self.plugins[name].outputs if self.producers.get(k) == name]
+
+    def subscribe(self, consumer: str, keys: Iterable[str]):
+        self.subscriptions.setdefault(consumer, set()).update(keys)
+        self._active_cache = None
+
+    def unsubscribe(self, consumer: str, keys: Optional[Iterable[str]] = None):
+        """取消订阅；keys 为空时取消该订阅者的全部订阅"""
+        subs = self.subscriptions.get(consumer)
+        if subs is None:
+            return
+        if keys is None:
+            subs.clear()
+        else:
+            subs.difference_update(keys)
+        if not subs:
+            del self.subscriptions[consumer]
+        self._active_cache = None
+
+    def active_plugins(self) -> List[str]:
+        """
+        本次需要执行的插件（拓扑序）：从被订阅的键反向追溯生产者及其上游；
+        未启用的插件不执行，依赖它的下游也一并跳过。
+        """
+        enabled = tuple(self.plugins[name].enabled for name in self.order)
+        if self._active_cache is not None and self._active_cache[0] == enabled:
+            return self._active_cache[1]
+        needed: Set[str] = set()
+        stack = [self.producers[k] for subs in self.subscriptions.values() for k in subs if k in self.producers]
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.deps[name])
+        runnable: Set[str] = set()
+        for name in self.order:
+            if self.plugins[name].enabled and self.deps[name] <= runnable:
+                runnable.add(name)
+        active = [name for name in self.order if name in needed and name in runnable]
+        self._active_cache = (enabled, active)
+        return active
+
+    def start_host(self, **options):
+        """
+        改为在独立进程中执行插件（options 传给 PluginHost，如 deadline / max_misses / timeout）。
+        工作进程重新实例化插件，本进程中的插件实例只保留元数据与启用状态。
+        """
+        if self.host is not None:
+            return
+        host = PluginHost([self.plugins[name] for name in self.order], self.producers,
+                          sorted(self.sources or ()), **options)
+        host.start()
+        self.host = host
+        self.host_options = options
+
+    def stop_host(self):
+        if self.host is not None:
+            self.host.stop()
+            self.host = None
+
+    def _record(self, name: str, n: int, elapsed: float):
+        stat = self.stats.setdefault(name, {"calls": 0, "samples": 0, "total_s": 0.0, "last_s": 0.0})
+        stat["calls"] += 1
+        stat["samples"] += n
+        stat["total_s"] += elapsed
+        stat["last_s"] = elapsed
+
+    def run_batch(self, columns: Dict[str, np.ndarray], dt) -> Dict[str, np.ndarray]:
+        """
+        按拓扑序执行被需要的插件，返回本块计算出的虚拟遥测 (键 -> 数组)。
+        上游插件的输出会并入下游插件的输入列。
+        """
+        n = len(dt) if np.ndim(dt) else len(next(iter(columns.values()), ()))
+        if self.host is not None:
+            return self._run_hosted(columns, dt, n)
+        available = dict(columns)
+        produced: Dict[str, np.ndarray] = {}
+        for name in self.active_plugins():
+            plugin = self.plugins[name]
+            start = time.perf_counter()
+            outputs = plugin.update_batch(available, dt)
+            self._record(name, n, time.perf_counter() - start)
+            for key, value in outputs.items():
+                if self.producers.get(key) == name:
+                    available[key] = produced[key] = value
+        return produced
+
+    def _run_hosted(self, columns: Dict[str, np.ndarray], dt, n: int) -> Dict[str, np.ndarray]:
+        host = self.host
+        produced, timings = host.run_batch(columns, dt, self.active_plugins())
+        for name, elapsed in timings.items():
+            self._record(name, n, elapsed)
+        # 工作进程新禁用的插件同步到本进程，下游插件随之跳过；只在禁用发生时报告一次
+        for name, reason in host.take_disabled():
+            plugin = self.plugins.get(name)
+            if plugin is not None:
+                plugin.enabled = False
+                print(f"[PluginManager] 禁用插件 {name}: {reason}")
+        return produced
+
+    def set_enabled(self, name: str, enabled: bool):
+        """启用/禁用插件；重新启用被工作进程自动禁用的插件时一并清除其禁用状态"""
+        plugin = self.plugins.get(name)
+        if plugin is None:
+            return
+        plugin.enabled = enabled
+        if enabled and self.host is not None:
+            self.host.enable(name)
+
+    def timing(self) -> Dict[str, Dict[str, float]]:
+        """各插件的执行耗时：调用次数、样本数、累计/最近一次耗时（秒）与每样本微秒数"""
+        return {name: dict(stat, us_per_sample=stat["total_s"] / stat["samples"] * 1e6 if stat["samples"] else 0.0)
+                for name, stat in self.stats.items()}
+
+    def reset_stats(self):
+        self.stats = {}
+
     def get_plugin(self, name):
         return self.plugins.get(name)
 
@@ -0,0 +1,162 @@
+import math
+import random
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+class KLLSketch:
+    """
+    KLL 流式分位数草图（Karnin, Lang, Liberty 2016），内存 O(k)，可合并。
+
+    第 h 层的每个样本代表 2^h 个原始样本；某层装满时排序并随机保留奇数位或偶数位
+    元素提升到上一层。秩误差约为 O(1/k)，k=200 时通常在 1% 以内。
+    合并两个草图只需逐层拼接后再压缩，因此可以跨分箱、跨会话汇总。
+    """
+    C = 2.0 / 3.0 # 相邻层容量比
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = max(int(k), 8)
+        self.n = 0
+        self.compactors: List[List[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._rng = random.Random(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.compactors) - h - 1
+        return max(int(math.ceil(self.k * self.C ** depth)), 2)
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, x: float):
+        if x != x:
+            return
+        self.compactors[0].append(x)
+        self._size += 1
+        self.n += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def update_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        # 分段写入，保证任何时刻草图大小有界（压缩会替换各层列表，每段重新取第 0 层）
+        step = max(self._capacity(0), 1)
+        for i in range(0, len(values), step):
+            chunk = values[i:i + step].tolist()
+            self.compactors[0].extend(chunk)
+            self._size += len(chunk)
+            self.n += len(chunk)
+            while self._size >= self._max_size:
+                self._compress()
+
+    def _compress(self):
+        for h in range(len(self.compactors)):
+            level = self.compactors[h]
+            if len(level) >= self._capacity(h):
+                if h + 1 >= len(self.compactors):
+                    self._grow()
+                level.sort()
+                # 奇数个时保留最后一个在本层，其余成对压缩
+                keep = [level.pop()] if len(level) % 2 else []
+                offset = self._rng.getrandbits(1)
+                promoted = level[offset::2]
+                self.compactors[h + 1].extend(promoted)
+                self._size -= len(level) - len(promoted)
+                self.compactors[h] = keep
+                if self._size < self._max_size:
+                    return
+
+    def merge(self, other: 'KLLSketch'):
+        """把 other 并入本草图（other 不变）"""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for h, level in enumerate(other.compactors):
+            self.compactors[h].extend(level)
+        self.n += other.n
+        self._size = sum(len(c) for c in self.compactors)
+        while self._size >= self._max_size:
+            self._compress()
+
+    def copy(self) -> 'KLLSketch':
+        dup = KLLSketch(self.k)
+        dup.n = self.n
+        dup.compactors = [list(c) for c in self.compactors]
+        dup._size = self._size
+        dup._max_size = self._max_size
+        dup._rng.setstate(self._rng.getstate())
+        return dup
+
+    def weighted_items(self) -> Tuple[np.ndarray, np.ndarray]:
+        """按值排序的 (样本, 权重)"""
+        values = np.fromiter((x for level in self.compactors for x in level), dtype=float, count=self._size)
+        weights = np.concatenate([np.full(len(level), float(1 << h)) for h, level in enumerate(self.compactors)])
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        return weighted_quantiles([self], qs)
+
+    def rank(self, x: float) -> float:
+        """x 的归一化秩，即 P(X <= x) 的估计"""
+        values, weights = self.weighted_items()
+        total = weights.sum()
+        if total == 0:
+            return math.nan
+        return float(weights[:np.searchsorted(values, x, side="right")].sum() / total)
+
+def weighted_quantiles(sketches: Iterable[KLLSketch], qs: Iterable[float]) -> np.ndarray:
+    """多个草图联合的分位数，不修改也不拷贝草图；全部为空时返回 NaN"""
+    parts = [s.weighted_items() for s in sketches if s is not None and s.n > 0]
+    qs = np.atleast_1d(np.asarray(qs, dtype=float))
+    if not parts:
+        return np.full(len(qs), np.nan)
+    values = np.concatenate([p[0] for p in parts])
+    weights = np.concatenate([p[1] for p in parts])
+    if len(parts) > 1:
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+    cum = np.cumsum(weights)
+    idx = np.searchsorted(cum, qs * cum[-1], side="left")
+    return values[np.minimum(idx, len(values) - 1)]
+
+class WindowedSketch:
+    """
+    两代 KLL 草图，用于让旧数据老化：rotate() 时当前代变为上一代、旧的上一代丢弃。
+    查询合并两代，因此任意时刻覆盖最近 1~2 个窗口的数据。何时轮换由调用方决定（按时间或按样本数）。
+    """
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.seed = seed
+        self.current = KLLSketch(k, seed)
+        self.previous: Optional[KLLSketch] = None
+
+    @property
+    def n(self) -> int:
+        return self.current.n + (self.previous.n if self.previous is not None else 0)
+
+    def update(self, x: float):
+        self.current.update(x)
+
+    def update_many(self, values: Iterable[float]):
+        self.current.update_many(values)
+
+    def rotate(self):
+        self.previous = self.current
+        self.current = KLLSketch(self.k, self.seed)
+
+    def quantile(self, q: float) -> float:
+        return float(weighted_quantiles([self.current, self.previous], [q])[0])
+
+    def merged(self) -> KLLSketch:
+        """两代合并后的独立草图（用于跨分箱/会话汇总）"""
+        out = self.current.copy()
+        if self.previous is not None:
+            out.merge(self.previous)
+        return out
@@ -0,0 +1,87 @@
+from typing import Optional
+import numpy as np
+
+class RingBuffer2D:
+    """
+    多通道预分配环形缓冲区 (channels × capacity)。
+
+    mirror=True 时存储长度为 2×capacity，每个样本同时写入 i 与 i+capacity 两处，
+    因此任意不超过 capacity 的最近样本区间都是一段连续内存，可直接返回视图而不拷贝；
+    mirror=False 时只存一份（超长历史省一半内存），跨越回绕点的读取会拼接一次。
+    generation[ch] 记录该通道最后一次写入时的累计样本数，用于跳过未变化的通道。
+    """
+    def __init__(self, channels: int, capacity: int, dtype=np.float32, mirror: bool = True):
+        self.channels = channels
+        self.capacity = capacity
+        self.mirror = mirror
+        self._data = np.zeros((channels, (2 if mirror else 1) * capacity), dtype=dtype)
+        self._write = 0 # 下一个写入位置，范围 [0, capacity)
+        self.count = 0 # 有效样本数
+        self.total = 0 # 累计写入样本数
+        self.generation = np.zeros(channels, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def oldest(self) -> int:
+        """缓冲区内最旧样本的绝对序号"""
+        return self.total - self.count
+
+    def clear(self):
+        self._write = 0
+        self.count = 0
+        self.total = 0
+        self.generation[:] = 0
+
+    def append(self, block: np.ndarray, valid: Optional[int] = None):
+        """
+        追加一块样本 (rows × cols)。cols 少于通道数时其余通道补 NaN，
+        valid 指定前多少列是真实数据（决定哪些通道的 generation 前进）。
+        """
+        block = np.asarray(block)
+        if block.ndim == 1:
+            block = block[np.newaxis, :]
+        rows = block.shape[0]
+        if rows == 0:
+            return
+        cols = min(block.shape[1], self.channels)
+        if valid is None:
+            valid = cols
+        self.total += rows
+        if rows > self.capacity:
+            block = block[-self.capacity:]
+            rows = self.capacity
+        # 写入位置始终与绝对序号对应 (_write == total % capacity)，超长块丢弃的前段也要计入
+        start = (self.total - rows) % self.capacity
+        pos = (start + np.arange(rows)) % self.capacity
+        data = self._data
+        src = block[:, :cols].T
+        data[:cols, pos] = src
+        if cols < self.channels:
+            data[cols:, pos] = np.nan
+        if self.mirror:
+            data[:, pos + self.capacity] = data[:, pos]
+        self.generation[:min(valid, cols)] = self.total
+        self._write = self.total % self.capacity
+        self.count = min(self.count + rows, self.capacity)
+
+    def read(self, start: int, stop: int, ch: Optional[int] = None) -> np.ndarray:
+        """
+        按绝对样本序号读取 [start, stop)，区间会被裁剪到缓冲区内。
+        ch 为空时返回 (channels × n)。连续（或 mirror 模式）时为视图，否则拼接。
+        """
+        start = max(start, self.oldest)
+        stop = min(stop, self.total)
+        rows = self._data if ch is None else self._data[ch]
+        if stop <= start:
+            return rows[..., :0]
+        p0 = start % self.capacity
+        p1 = p0 + (stop - start)
+        if p1 <= self.capacity or self.mirror:
+            return rows[..., p0:p1]
+        return np.concatenate((rows[..., p0:], rows[..., :p1 - self.capacity]), axis=-1)
+
+    def view(self, ch: int) -> np.ndarray:
+        """通道 ch 最近 count 个样本（从旧到新）；mirror 模式下为零拷贝视图"""
+        return self.read(self.oldest, self.total, ch)
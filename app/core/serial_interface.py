@@ -5,11 +5,19 @@ import collections
 import logging
 from typing import Optional, Callable, Deque
 from .protocol import Packet, MsgType, ProtocolError
+from .deframer import FrameDeframer, DEFAULT_MAX_FRAME_LEN
 
 logger = logging.getLogger(__name__)
 
 class SerialInterface:
-    def __init__(self, port: str, baudrate: int = 115200):
+    """
+    串口收发。TX 线程在条件变量上等待，send() 立即唤醒它，积压的包拼接后一次 write；
+    RX 线程用 readinto 读入可复用缓冲区，每次读取量取 in_waiting（至少 1 字节、至多缓冲区大小）。
+    port 可以是串口名或 pyserial URL（如 loop://）。
+    """
+    RX_CHUNK = 65536
+
+    def __init__(self, port: str, baudrate: int = 115200, max_frame_len: int = DEFAULT_MAX_FRAME_LEN):
         self.port = port
         self.baudrate = baudrate
         self.serial: Optional[serial.Serial] = None
@@ -18,24 +26,30 @@ class SerialInterface:
         self.tx_thread: Optional[threading.Thread] = None
         
         self.tx_queue = collections.deque() # 发送队列
+        self.tx_cond = threading.Condition() # 保护 tx_queue；send()/close() 唤醒 TX 线程
         self.rx_callback: Optional[Callable[[Packet], None]] = None
         
         self.connected = False
         self.error_count = 0
-        self.rx_buffer = bytearray()
+        self.deframer = FrameDeframer(max_frame_len)
+        self._rx_time = 0.0 # 最近一次读取返回的时刻（单调时钟）
+        self._rx_buf = bytearray(self.RX_CHUNK)
+        self._rx_view = memoryview(self._rx_buf)
         
         # 统计信息
         self.stats = {
             'tx_packets': 0,
+            'tx_writes': 0,
             'rx_packets': 0,
             'rx_errors': 0,
+            'rx_overflows': 0,
             'bytes_sent': 0,
             'bytes_received': 0
         }
 
     def open(self) -> bool:
         try:
-            self.serial = serial.Serial(self.port, self.baudrate, timeout=0.1)
+            self.serial = serial.serial_for_url(self.port, self.baudrate, timeout=0.1)
             
             self.running = True
             self.connected = True
@@ -54,30 +68,43 @@ class SerialInterface:
             return False
 
     def close(self):
-        self.running = False
+        with self.tx_cond:
+            self.running = False
+            self.tx_cond.notify_all()
+        if self.tx_thread and self.tx_thread is not threading.current_thread():
+            self.tx_thread.join(1.0)
         if self.serial and self.serial.is_open:
             self.serial.close()
+        if self.rx_thread and self.rx_thread is not threading.current_thread():
+            self.rx_thread.join(1.0)
         self.connected = False
         logger.info("串口已关闭")
 
     def send(self, packet: Packet):
-        self.tx_queue.append(packet)
+        with self.tx_cond:
+            self.tx_queue.append(packet)
+            self.tx_cond.notify()
 
     def set_callback(self, callback: Callable[[Packet], None]):
         self.rx_callback = callback
 
     def _tx_loop(self):
-        while self.running:
-            if not self.tx_queue:
-                time.sleep(0.001)
-                continue
-            
+        while True:
+            with self.tx_cond:
+                while self.running and not self.tx_queue:
+                    self.tx_cond.wait()
+                if not self.running:
+                    return
+                # 一次取走全部积压的包
+                batch = list(self.tx_queue)
+                self.tx_queue.clear()
+
             try:
-                packet = self.tx_queue.popleft()
-                data = packet.serialize()
+                data = b"".join([packet.serialize() for packet in batch])
                 if self.serial and self.serial.is_open:
                     self.serial.write(data)
-                    self.stats['tx_packets'] += 1
+                    self.stats['tx_packets'] += len(batch)
+                    self.stats['tx_writes'] += 1
                     self.stats['bytes_sent'] += len(data)
             except Exception as e:
                 logger.error(f"TX 错误: {e}")
@@ -91,41 +118,41 @@ class SerialInterface:
                     time.sleep(0.1)
                     continue
                 
-                # 读取可用字节
-                data = self.serial.read(self.serial.in_waiting or 1)
-                if data:
-                    self.stats['bytes_received'] += len(data)
-                    self.rx_buffer.extend(data)
-                    self._process_buffer()
+                # 读取可用字节：没有积压时阻塞等待 1 字节（至多 timeout），否则一次读完积压
+                want = min(max(self.serial.in_waiting, 1), len(self._rx_buf))
+                n = self.serial.readinto(self._rx_view[:want])
+                if n:
+                    self._rx_time = time.perf_counter()
+                    self.stats['bytes_received'] += n
+                    self.deframer.feed(self._rx_view[:n], self._handle_frame)
+                    self.stats['rx_overflows'] = self.deframer.stats['overflows']
                     
             except Exception as e:
+                if not self.running:
+                    break # close() 关闭端口导致的读取失败
                 logger.error(f"RX 错误: {e}")
                 self.connected = False
                 time.sleep(1)
 
-    def _process_buffer(self):
-        # 帧以 0x00 分隔
-        while b'\x00' in self.rx_buffer:
-            # 找到第一个分隔符
-            idx = self.rx_buffer.index(b'\x00')
-            
-            # 提取帧（解码逻辑如果需要的话排除分隔符，
-            # 但我们的协议解析器期望 COBS 数据，从技术上讲，该数据块中不包含分隔符）
-            # cobs_decode 函数期望零之前的块。
-            frame_data = self.rx_buffer[:idx]
-            
-            # 从缓冲区移除帧 + 分隔符
-            del self.rx_buffer[:idx+1]
-            
-            if len(frame_data) > 0:
-                try:
-                    packet = Packet.parse(frame_data)
-                    self.stats['rx_packets'] += 1
-                    if self.rx_callback:
-                        self.rx_callback(packet)
-                except ProtocolError as pe:
-                    self.stats['rx_errors'] += 1
-                    logger.warning(f"协议错误: {pe}")
-                except Exception as e:
-                    self.stats['rx_errors'] += 1
-                    logger.error(f"解析错误: {e}")
+    @property
+    def byte_time(self) -> float:
+        """线路上传输一个字节的时间（8N1 每字节 10 位）"""
+        return 10.0 / self.baudrate
+
+    def _handle_frame(self, frame_data: memoryview):
+        # frame_data 是分帧器缓冲区上的视图（不含分隔符），仅在本次调用内有效；
+        # Packet.parse 解码后得到独立的 bytes，不持有该视图
+        # 同一次读取中的多帧：最后一个字节在读取返回时到达，之前的字节按线路速率倒推，
+        # 避免同批帧的时间戳相同（dt = 0）
+        timestamp = self._rx_time - self.deframer.trailing * self.byte_time
+        try:
+            packet = Packet.parse(frame_data, timestamp)
+            self.stats['rx_packets'] += 1
+            if self.rx_callback:
+                self.rx_callback(packet)
+        except ProtocolError as pe:
+            self.stats['rx_errors'] += 1
+            logger.warning(f"协议错误: {pe}")
+        except Exception as e:
+            self.stats['rx_errors'] += 1
+            logger.error(f"解析错误: {e}")
@@ -0,0 +1,275 @@
+import bisect
+import math
+import threading
+import time
+from typing import Iterable, Optional, Sequence, Tuple, Union
+import numpy as np
+
+# 单调时钟 (time.perf_counter) 到墙上时间的固定偏移：换算后的时间仍单调，可与 time.time() 记录的时间比较
+_WALL_OFFSET = time.time() - time.perf_counter()
+
+def wall_time(timestamps):
+    """把单调时钟时间戳（Packet.timestamp）换算为墙上时间（秒）"""
+    return np.asarray(timestamps, dtype=float) + _WALL_OFFSET
+
+def sample_intervals(times: np.ndarray, previous: Optional[float], fallback: float,
+                     max_dt: float = 1.0) -> np.ndarray:
+    """
+    由逐样本时间戳计算 dt。previous 为上一块最后一个样本的时间戳；
+    缺失、非正或超过 max_dt（断流后重新开始）的间隔用 fallback 代替。
+    """
+    times = np.asarray(times, dtype=float)
+    if len(times) == 0:
+        return np.empty(0)
+    dt = np.diff(times, prepend=np.nan if previous is None else previous)
+    bad = ~((dt > 0) & (dt <= max_dt))
+    if bad.any():
+        dt[bad] = fallback
+    return dt
+
+class TelemetryChannel:
+    """
+    RX 线程与 UI 线程之间的批量遥测通道。
+
+    RX 线程把每帧解码进预分配的 (capacity × channels) 环形块，
+    UI 线程在定时器节拍中一次取走全部积压行，避免每包一次跨线程信号。
+    每行附带接收时刻（单调时钟），由 drain_timed() 一并取走，用于计算真实 dt 与端到端延迟。
+    设置 schema（见 telemetry_schema）后 push_payload 按遥测字典的帧布局解码。
+    队列满时的背压策略:
+        drop_oldest: 覆盖最旧的行（保留最新的 capacity 行）
+        coalesce:    新样本覆盖最新一行（保留已排队的连续历史，只更新末值）
+    """
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    MAX_FRAME_GAP = 1.0 # 与 sample_intervals 的 max_dt 一致：更长的帧间隔视为断流
+
+    def __init__(self, channels: int = 16, capacity: int = 4096, policy: str = DROP_OLDEST):
+        if policy not in (self.DROP_OLDEST, self.COALESCE):
+            raise ValueError(f"未知的背压策略: {policy}")
+        self.channels = channels
+        self.capacity = capacity
+        self.policy = policy
+        self._block = np.full((capacity, channels), np.nan)
+        self._times = np.full(capacity, np.nan) # 每行的接收时刻（单调时钟）
+        self._last_time: Optional[float] = None # 上一帧的接收时刻
+        self._sample_dt = 0.0 # 最近一次由多样本帧推算出的样本间隔
+        self._head = 0 # 最旧行的位置
+        self._count = 0 # 排队行数
+        self.width = 0 # 见过的最大通道数
+        self.schema = None # TelemetrySchema；None 时载荷按 float32 数组解码
+        self.lock = threading.Lock()
+
+        # 统计信息
+        self.stats = {
+            'pushed': 0,
+            'drained': 0,
+            'dropped': 0,
+            'high_water': 0
+        }
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _claim_row(self) -> int:
+        # 调用者持有锁；返回本次写入的行号
+        if self._count < self.capacity:
+            row = (self._head + self._count) % self.capacity
+            self._count += 1
+            if self._count > self.stats['high_water']:
+                self.stats['high_water'] = self._count
+            return row
+        self.stats['dropped'] += 1
+        if self.policy == self.DROP_OLDEST:
+            row = self._head
+            self._head = (self._head + 1) % self.capacity
+            return row
+        return (self._head + self._count - 1) % self.capacity
+
+    def push(self, values: Union[Sequence[float], np.ndarray], timestamp: Optional[float] = None):
+        """写入一行（RX 线程）；timestamp 为接收时刻，缺省为当前时刻"""
+        self._push_row(np.asarray(values, dtype=float)[:self.channels], timestamp)
+
+    def _push_row(self, values: Sequence[float], timestamp: Optional[float]):
+        # values 不超过 channels 个，直接赋值进环形块的一行
+        width = len(values)
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        with self.lock:
+            row = self._claim_row()
+            self._times[row] = timestamp
+            self._last_time = timestamp
+            dst = self._block[row]
+            dst[:width] = values
+            dst[width:] = np.nan
+            if width > self.width:
+                self.width = width
+            self.stats['pushed'] += 1
+
+    def _row_times(self, timestamp: float, n: int) -> np.ndarray:
+        """
+        同一帧中 n 个样本的时刻（调用者持有锁）：均匀分布在 (上一帧时刻, timestamp] 内，末样本为 timestamp；
+        与上一帧间隔无效（首帧、乱序或超过 MAX_FRAME_GAP 的断流）时沿用最近的样本间隔。
+        """
+        prev = self._last_time
+        if prev is not None and 0 < timestamp - prev <= self.MAX_FRAME_GAP:
+            self._sample_dt = (timestamp - prev) / n
+        self._last_time = timestamp
+        return timestamp - self._sample_dt * np.arange(n - 1, -1, -1)
+
+    def push_rows(self, rows: np.ndarray, timestamp: Optional[float] = None):
+        """写入多行（同一帧中的多个样本）；timestamp 为该帧的接收时刻，各行时刻见 _row_times"""
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        def fill(dst, i0, i1):
+            dst[:] = rows[i0:i1, :dst.shape[1]]
+        with self.lock:
+            self._store(len(rows), rows.shape[1], self._row_times(timestamp, len(rows)), fill)
+
+    def _store(self, n: int, width: int, times: np.ndarray, fill):
+        """
+        按背压策略写入 n 行（调用者持有锁），至多两段连续切片（环形绕回时）。
+        fill(dst, i0, i1) 把第 i0..i1 个新样本写入 dst（环形块的 (i1 - i0) × width 切片）。
+        与逐行 _claim_row 的结果相同：drop_oldest 丢弃最旧的行，新样本超过 capacity 时只保留最后 capacity 个；
+        coalesce 先填空位，满后只有末样本覆盖最新一行。
+        """
+        width = min(width, self.channels)
+        cap = self.capacity
+        free = cap - self._count
+        segments = [(0, n)] # 写入的新样本区间，按写入顺序
+        if n > free:
+            self.stats['dropped'] += n - free
+            if self.policy == self.DROP_OLDEST:
+                if n >= cap:
+                    self._head, self._count = 0, 0
+                    segments = [(n - cap, n)]
+                else:
+                    self._head = (self._head + n - free) % cap
+                    self._count -= n - free
+            elif free == 0:
+                self._count -= 1
+                segments = [(n - 1, n)]
+            else:
+                segments = [(0, free - 1), (n - 1, n)]
+        row = (self._head + self._count) % cap
+        for i0, i1 in segments:
+            while i0 < i1:
+                m = min(i1 - i0, cap - row)
+                fill(self._block[row:row + m, :width], i0, i0 + m)
+                self._block[row:row + m, width:] = np.nan
+                self._times[row:row + m] = times[i0:i0 + m]
+                self._count += m
+                row = (row + m) % cap
+                i0 += m
+        if self._count > self.stats['high_water']:
+            self.stats['high_water'] = self._count
+        if width > self.width:
+            self.width = width
+        self.stats['pushed'] += n
+
+    def push_payload(self, payload: bytes, timestamp: Optional[float] = None):
+        """
+        把一帧遥测载荷直接解码进通道：有 schema 且长度为其帧长整数倍时按字典布局解码（可含多个样本），
+        多样本帧经 decode_into 直接写入环形块的一到两段切片；否则按旧格式（float32 小端数组，一帧一行）解码。
+        """
+        schema = self.schema
+        if schema is not None and schema.matches(payload):
+            if len(schema) > self.channels:
+                self.push_rows(schema.decode(payload), timestamp)
+                return
+            size = schema.frame_size
+            n = len(payload) // size
+            if n == 1:
+                self._push_row(schema.decode_sample(payload), timestamp)
+                return
+            if timestamp is None:
+                timestamp = time.perf_counter()
+
+            def fill(dst, i0, i1):
+                schema.decode_into(payload[i0 * size:i1 * size], dst)
+            with self.lock:
+                self._store(n, len(schema), self._row_times(timestamp, n), fill)
+            return
+        count = min(len(payload) // 4, self.channels)
+        self.push(np.frombuffer(payload, dtype='<f4', count=count), timestamp)
+
+    def drain(self) -> np.ndarray:
+        """取走全部排队行（UI 线程），返回 (rows × width) 的独立数组"""
+        return self.drain_timed()[0]
+
+    def drain_timed(self) -> Tuple[np.ndarray, np.ndarray]:
+        """取走全部排队行及其接收时刻：((rows × width), (rows,))"""
+        with self.lock:
+            n = self._count
+            width = self.width
+            if n == 0:
+                return np.empty((0, width)), np.empty(0)
+            start = self._head
+            stop = start + n
+            if stop <= self.capacity:
+                out = self._block[start:stop, :width].copy()
+                times = self._times[start:stop].copy()
+            else:
+                out = np.concatenate((self._block[start:, :width],
+                                      self._block[:stop - self.capacity, :width]))
+                times = np.concatenate((self._times[start:], self._times[:stop - self.capacity]))
+            self._head = 0
+            self._count = 0
+            self.stats['drained'] += n
+        return out, times
+
+class LatencyHistogram:
+    """
+    延迟直方图：对数分桶（每十倍 bins_per_decade 个桶，覆盖 lo ~ hi 秒），
+    记录开销与样本数无关，可随时读取分位数。超出范围的样本计入两端的桶。
+    """
+    def __init__(self, lo: float = 1e-5, hi: float = 10.0, bins_per_decade: int = 20):
+        self.lo = lo
+        self.hi = hi
+        decades = np.log10(hi / lo)
+        self.edges = np.logspace(np.log10(lo), np.log10(hi), int(round(decades * bins_per_decade)) + 1)
+        self._edge_list = self.edges.tolist()
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64) # 含下溢/上溢桶
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, latencies: Union[float, Iterable[float]]):
+        if isinstance(latencies, float): # 单个样本（如每个 ACK 的 RTT）不经 numpy
+            if math.isfinite(latencies):
+                self.counts[bisect.bisect_left(self._edge_list, latencies)] += 1
+                self.count += 1
+                self.total += latencies
+                self.max = max(self.max, latencies)
+            return
+        values = np.atleast_1d(np.asarray(latencies, dtype=float))
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        self.counts += np.bincount(np.searchsorted(self.edges, values), minlength=len(self.counts))
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    def quantile(self, q: float) -> float:
+        """分位数（取所在桶的几何中点，相对误差约为桶宽的一半；不超过已记录的最大值）"""
+        if self.count == 0:
+            return float("nan")
+        i = int(np.searchsorted(np.cumsum(self.counts), q * self.count, side="left"))
+        i = min(i, len(self.counts) - 1)
+        if i == 0:
+            return min(float(self.edges[0]), self.max)
+        if i == len(self.edges):
+            return self.max
+        return min(float(np.sqrt(self.edges[i - 1] * self.edges[i])), self.max)
+
+    def summary(self) -> dict:
+        return {"count": self.count, "mean": self.mean, "p50": self.quantile(0.5),
+                "p90": self.quantile(0.9), "p99": self.quantile(0.99), "max": self.max}
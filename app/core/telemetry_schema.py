@@ -0,0 +1,124 @@
+import logging
+import struct
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 遥测字典 type 字段 -> 小端 NumPy 类型；整数字段配合 scale/offset 即定点数
+FIELD_TYPES = {
+    "float": "<f4", "float32": "<f4", "f32": "<f4",
+    "float64": "<f8", "double": "<f8",
+    "int8": "<i1", "uint8": "<u1", "bool": "<u1",
+    "int16": "<i2", "uint16": "<u2",
+    "int": "<i4", "int32": "<i4", "uint": "<u4", "uint32": "<u4",
+}
+STRUCT_CODES = {"<f4": "f", "<f8": "d", "<i1": "b", "<u1": "B", "<i2": "h", "<u2": "H", "<i4": "i", "<u4": "I"}
+
+class TelemetrySchema:
+    """
+    由遥测字典编译出的帧布局：字段按 index 顺序紧凑排列（无对齐填充），
+    每个字段 物理值 = 原始值 × scale + offset。一帧载荷可以包含整数个样本。
+    decode() 用 np.frombuffer 按结构化 dtype 取整块字段，直接得到 (样本 × 字段) 数组；
+    单样本帧走预编译的 struct.Struct（decode_sample），避免每个字段一次 NumPy 调用的固定开销。
+    """
+    def __init__(self, fields: Iterable[Tuple[str, str, float, float]]):
+        fields = list(fields)
+        self.names: List[str] = [name for name, _, _, _ in fields]
+        formats = []
+        for name, type_name, _, _ in fields:
+            fmt = FIELD_TYPES.get(type_name.lower())
+            if fmt is None:
+                raise ValueError(f"遥测字段 {name} 的类型 {type_name} 不受支持")
+            formats.append(fmt)
+        self.dtype = np.dtype({"names": self.names, "formats": formats})
+        self.struct = struct.Struct("<" + "".join(STRUCT_CODES[f] for f in formats))
+        self.frame_size = self.dtype.itemsize
+        self.scale = np.array([scale for _, _, scale, _ in fields], dtype=float)
+        self.offset = np.array([offset for _, _, _, offset in fields], dtype=float)
+        self.scaled = bool(np.any(self.scale != 1.0) or np.any(self.offset != 0.0))
+        self._scale_offset = list(zip(self.scale.tolist(), self.offset.tolist()))
+        # 全部为 float32 且不缩放时与旧格式相同，可整块视图转换
+        self.plain_float = all(f == "<f4" for f in formats) and not self.scaled
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def matches(self, payload: bytes) -> bool:
+        return self.frame_size > 0 and len(payload) > 0 and len(payload) % self.frame_size == 0
+
+    def decode_sample(self, payload: bytes) -> List[float]:
+        """解码单样本帧（长度必须等于 frame_size）"""
+        values = self.struct.unpack(payload)
+        if not self.scaled:
+            return list(values)
+        return [v * scale + offset for v, (scale, offset) in zip(values, self._scale_offset)]
+
+    def decode_into(self, payload: bytes, out: np.ndarray):
+        """把载荷解码进 (样本 × 字段) 的 float64 视图 out（如通道环形块的切片），不经中间数组"""
+        rows = len(out)
+        if rows == 1:
+            # 单样本：几个字段上的 NumPy 运算各有约 1us 固定开销，Python 层缩放后一次赋值更快
+            out[0] = self.decode_sample(payload)
+            return
+        if self.plain_float:
+            out[:] = np.frombuffer(payload, dtype="<f4").reshape(rows, len(self.names))
+            return
+        records = np.frombuffer(payload, dtype=self.dtype, count=rows)
+        for i, name in enumerate(self.names):
+            out[:, i] = records[name]
+        if self.scaled:
+            out *= self.scale
+            out += self.offset
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        """把载荷解码为 (样本 × 字段) 的 float64 数组；长度不是帧长整数倍时抛 ValueError"""
+        if not self.matches(payload):
+            raise ValueError(f"遥测载荷长度 {len(payload)} 不是帧长 {self.frame_size} 的整数倍")
+        rows = len(payload) // self.frame_size
+        if rows == 1:
+            return np.array([self.decode_sample(payload)], dtype=float)
+        if self.plain_float:
+            return np.frombuffer(payload, dtype="<f4").reshape(rows, len(self.names)).astype(float)
+        records = np.frombuffer(payload, dtype=self.dtype, count=rows)
+        out = np.empty((rows, len(self.names)))
+        for i, name in enumerate(self.names):
+            out[:, i] = records[name]
+        if self.scaled:
+            out *= self.scale
+            out += self.offset
+        return out
+
+    def encode(self, rows: np.ndarray) -> bytes:
+        """按本布局把物理值编码为载荷（整数字段四舍五入并截断到类型范围；供模拟与测试数据使用）"""
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        raw = (rows - self.offset) / self.scale
+        records = np.empty(len(rows), dtype=self.dtype)
+        for i, name in enumerate(self.names):
+            kind = self.dtype[name]
+            if kind.kind in "iu":
+                info = np.iinfo(kind)
+                records[name] = np.clip(np.rint(raw[:, i]), info.min, info.max)
+            else:
+                records[name] = raw[:, i]
+        return records.tobytes()
+
+@lru_cache(maxsize=8)
+def _compile(fields: Tuple[Tuple[str, str, float, float], ...]) -> TelemetrySchema:
+    return TelemetrySchema(fields)
+
+def compile_schema(telemetry: Dict[str, object]) -> Optional[TelemetrySchema]:
+    """
+    由 ParameterManager.telemetry 编译帧布局；同一份字典只编译一次（按字段内容缓存）。
+    字典为空时返回 None（沿用旧的 float32 数组格式）。
+    字段类型不受支持时同样返回 None 并记录错误。
+    """
+    defs = sorted(telemetry.values(), key=lambda t: t.index)
+    if not defs:
+        return None
+    try:
+        return _compile(tuple((t.name, t.type, float(t.scale), float(t.offset)) for t in defs))
+    except ValueError as e:
+        logger.error(f"遥测字典无法编译: {e}，按 float32 数组解码")
+        return None
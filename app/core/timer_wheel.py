@@ -0,0 +1,125 @@
+import logging
+import math
+import threading
+import time
+from typing import Callable, List, Set
+
+logger = logging.getLogger(__name__)
+
+class Timer:
+    """TimerWheel.schedule() 返回的句柄"""
+    __slots__ = ("wheel", "tick", "deadline", "callback", "args", "active")
+
+    def __init__(self, wheel: "TimerWheel", tick: int, deadline: float, callback: Callable, args: tuple):
+        self.wheel = wheel
+        self.tick = tick
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+    def cancel(self) -> bool:
+        """取消定时器；已触发或已取消时返回 False"""
+        return self.wheel.cancel(self)
+
+class TimerWheel:
+    """
+    哈希时间轮：slots 个槽，每槽 tick 秒，定时器按到期 tick 落入 tick % slots 号槽，
+    插入与取消都是 O(1)；到期时间向上取整到 tick，因此不会提前触发，最多迟一个 tick。
+    超过一圈的定时器留在槽中，转到它的到期 tick 时才触发。
+
+    单个后台线程推进时间轮：每次处理完后直接睡到下一个非空槽（没有定时器时无限期等待），
+    空槽不会唤醒线程。
+    回调在该线程中、锁外调用，应尽快返回（可在回调中再 schedule）。
+    """
+    def __init__(self, tick: float = 0.002, slots: int = 512, name: str = "TimerWheel"):
+        self.tick = tick
+        self.slots: List[Set[Timer]] = [set() for _ in range(slots)]
+        self.start_time = time.perf_counter()
+        self.current = 0 # 已处理到的 tick
+        self.wake_tick = 0 # 线程计划醒来的 tick；更早的定时器插入时需要唤醒
+        self.count = 0
+        self.cond = threading.Condition()
+        self.running = True
+        self.stats = {"scheduled": 0, "fired": 0, "cancelled": 0, "max_late": 0.0}
+        self.thread = threading.Thread(target=self._run, daemon=True, name=name)
+        self.thread.start()
+
+    def schedule(self, delay: float, callback: Callable, *args) -> Timer:
+        """delay 秒后在时间轮线程中调用 callback(*args)"""
+        deadline = time.perf_counter() + max(delay, 0.0)
+        with self.cond:
+            tick = max(math.ceil((deadline - self.start_time) / self.tick), self.current + 1)
+            timer = Timer(self, tick, deadline, callback, args)
+            self.slots[tick % len(self.slots)].add(timer)
+            self.count += 1
+            self.stats["scheduled"] += 1
+            if self.count == 1 or tick < self.wake_tick:
+                self.wake_tick = min(self.wake_tick, tick)
+                self.cond.notify()
+        return timer
+
+    def cancel(self, timer: Timer) -> bool:
+        with self.cond:
+            if not timer.active:
+                return False
+            timer.active = False
+            self.slots[timer.tick % len(self.slots)].discard(timer)
+            self.count -= 1
+            self.stats["cancelled"] += 1
+            return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join(1.0)
+
+    def _next_busy_tick(self) -> int:
+        """current 之后第一个非空槽对应的 tick（该槽里可能只有后几圈的定时器，届时再往后找）"""
+        n = len(self.slots)
+        for tick in range(self.current + 1, self.current + n + 1):
+            if self.slots[tick % n]:
+                return tick
+        return self.current + n
+
+    def _run(self):
+        while True:
+            expired: List[Timer] = []
+            with self.cond:
+                while self.running and self.count == 0:
+                    self.cond.wait()
+                    # 空闲期间不推进 current，醒来后从当前时刻接着转
+                    self.current = max(self.current, int((time.perf_counter() - self.start_time) / self.tick))
+                if not self.running:
+                    return
+                now_tick = int((time.perf_counter() - self.start_time) / self.tick)
+                if now_tick < self.wake_tick:
+                    self.cond.wait(self.start_time + self.wake_tick * self.tick - time.perf_counter())
+                    continue
+                n = len(self.slots)
+                # 落后多个 tick 时逐槽补处理（超过一圈只需扫一遍全部槽）
+                for tick in range(max(self.current + 1, now_tick - n + 1), now_tick + 1):
+                    slot = self.slots[tick % n]
+                    if not slot:
+                        continue
+                    due = [t for t in slot if t.tick <= now_tick]
+                    for t in due:
+                        slot.discard(t)
+                        t.active = False
+                    expired.extend(due)
+                self.current = now_tick
+                self.count -= len(expired)
+                self.wake_tick = self._next_busy_tick()
+            expired.sort(key=lambda t: t.deadline)
+            now = time.perf_counter()
+            for t in expired:
+                self.stats["fired"] += 1
+                self.stats["max_late"] = max(self.stats["max_late"], now - t.deadline)
+                try:
+                    t.callback(*t.args)
+                except Exception as e:
+                    logger.error(f"定时器回调出错: {e}")
@@ -0,0 +1,301 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import optimize
+
+from .pid_sim import simulate_pid_batch, pid_cost
+
+ProgressCallback = Callable[[int, int], None]
+
+METRIC_NAMES = ("rms_error", "overshoot", "settle_time", "energy", "jitter")
+
+class TuneCancelled(Exception):
+    pass
+
+class TuningProblem:
+    """
+    一次调参的全部输入：参考信号、对象模型与代价权重。
+    只含 numpy 数组与基本类型，可直接 pickle 发送到工作进程。
+    """
+    def __init__(self, r: np.ndarray, times: np.ndarray, tau: float, dt: float,
+                 weight: Dict[str, float], u_limit: float = 100.0):
+        self.r = np.ascontiguousarray(r, dtype=float)
+        self.times = np.ascontiguousarray(times, dtype=float)
+        self.tau = float(tau)
+        self.dt = float(dt)
+        self.weight = dict(weight)
+        self.u_limit = float(u_limit)
+
+    def evaluate(self, pids: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """pids 形状 (C, 3)，列依次为 kp/ki/kd；返回 (代价, 指标)"""
+        sim = simulate_pid_batch(self.r, self.times, self.tau, self.dt,
+                                 pids[:, 0], pids[:, 1], pids[:, 2], self.u_limit)
+        if not sim:
+            return np.full(len(pids), np.inf), {k: np.full(len(pids), np.nan) for k in METRIC_NAMES}
+        return pid_cost(sim, self.weight), {k: sim[k] for k in METRIC_NAMES}
+
+def _evaluate_chunk(problem: TuningProblem, pids: np.ndarray):
+    # 进程池入口，必须是模块级函数
+    return problem.evaluate(pids)
+
+def create_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    调参用进程池。统一使用 spawn：GUI 进程中已有串口/Qt 线程，fork 出的子进程可能继承被占用的锁。
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+def executor_workers(executor: Executor) -> int:
+    """executor 的工作进程/线程数（标准库执行器只在私有属性中保存）"""
+    return max(int(getattr(executor, "_max_workers", 0) or os.cpu_count() or 1), 1)
+
+# 本线程计算时的块大小，只决定进度回报与取消检查的粒度
+INLINE_CHUNK = 64
+
+class CandidateEvaluator:
+    """
+    优化器使用的批量代价函数。
+
+    有 executor 时每批候选都切块派发到其工作进程：块大小默认按工作进程数均分（不小于 min_chunk），
+    也可用 chunk_size 固定；没有 executor 时在本线程按 INLINE_CHUNK 逐块计算。
+    记录全部评估结果，并在每块完成后报告进度、检查取消标志。
+    """
+    def __init__(self, problem: TuningProblem, executor: Optional[Executor] = None,
+                 chunk_size: Optional[int] = None, progress: Optional[ProgressCallback] = None,
+                 cancel: Optional[threading.Event] = None, total: int = 0, min_chunk: int = 2):
+        self.problem = problem
+        self.executor = executor
+        self.chunk_size = max(int(chunk_size), 1) if chunk_size else None
+        self.min_chunk = max(int(min_chunk), 1)
+        self.workers = executor_workers(executor) if executor is not None else 1
+        self.progress = progress
+        self.cancel = cancel
+        self.total = total
+        self.evaluations = 0
+        self._pids: List[np.ndarray] = []
+        self._costs: List[np.ndarray] = []
+        self._metrics: List[Dict[str, np.ndarray]] = []
+
+    def check_cancelled(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise TuneCancelled()
+
+    def __call__(self, pids: np.ndarray) -> np.ndarray:
+        pids = np.atleast_2d(np.asarray(pids, dtype=float))
+        self.check_cancelled()
+        size = self._chunk_size(len(pids))
+        chunks = [pids[i:i + size] for i in range(0, len(pids), size)]
+        results: List[Optional[tuple]] = [None] * len(chunks)
+        try:
+            if self.executor is None:
+                for i, chunk in enumerate(chunks):
+                    results[i] = self.problem.evaluate(chunk)
+                    self._advance(len(chunk))
+            else:
+                pending = {self.executor.submit(_evaluate_chunk, self.problem, chunk): i
+                           for i, chunk in enumerate(chunks)}
+                try:
+                    while pending:
+                        done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            i = pending.pop(fut)
+                            results[i] = fut.result()
+                            self._advance(len(chunks[i]))
+                        self.check_cancelled()
+                finally:
+                    for fut in pending:
+                        fut.cancel()
+        finally:
+            # 取消时也保留已完成的块
+            for chunk, res in zip(chunks, results):
+                if res is not None:
+                    self._record(chunk, *res)
+        return np.concatenate([c for c, _ in results])
+
+    def _chunk_size(self, count: int) -> int:
+        if self.chunk_size is not None:
+            return self.chunk_size
+        if self.executor is None:
+            return INLINE_CHUNK
+        return max(math.ceil(count / self.workers), self.min_chunk)
+
+    def _advance(self, count: int):
+        self.evaluations += count
+        if self.progress is not None:
+            self.progress(self.evaluations, max(self.total, self.evaluations))
+        self.check_cancelled()
+
+    def _record(self, pids: np.ndarray, costs: np.ndarray, metrics: Dict[str, np.ndarray]):
+        self._pids.append(pids)
+        self._costs.append(costs)
+        self._metrics.append(metrics)
+
+    def candidates(self) -> List[Dict]:
+        """按评估顺序返回全部候选: {pid, cost, metrics}"""
+        table = []
+        for pids, costs, metrics in zip(self._pids, self._costs, self._metrics):
+            for i in range(len(costs)):
+                table.append({
+                    "pid": {"kp": float(pids[i, 0]), "ki": float(pids[i, 1]), "kd": float(pids[i, 2])},
+                    "cost": float(costs[i]),
+                    "metrics": {k: float(metrics[k][i]) for k in METRIC_NAMES}
+                })
+        return table
+
+class Optimizer:
+    """
+    调参搜索策略接口。search() 只通过 evaluate((C, 3) 候选) -> (C,) 代价 访问目标函数，
+    最优解由 CandidateEvaluator 在全部评估记录中选出，因此中途取消也能得到当前最优。
+    """
+    name = ""
+
+    def budget(self) -> int:
+        """预计评估次数，仅用于进度显示"""
+        return 0
+
+    def search(self, evaluate: CandidateEvaluator, base: np.ndarray):
+        raise NotImplementedError
+
+class GridSearch(Optimizer):
+    """以 base 为中心的乘性网格，候选顺序与原 auto_tune 相同 (kp 最外层, kd 最内层)"""
+    name = "grid"
+
+    def __init__(self, factors: Sequence[float] = (0.6, 0.8, 1.0, 1.2, 1.5)):
+        self.factors = np.asarray(factors, dtype=float)
+
+    def budget(self) -> int:
+        return len(self.factors) ** 3
+
+    def search(self, evaluate, base):
+        grids = np.meshgrid(self.factors, self.factors, self.factors, indexing="ij")
+        evaluate(base * np.stack([g.ravel() for g in grids], axis=1))
+
+class RandomSearch(Optimizer):
+    """在 base 的 [1/spread, spread] 倍范围内按对数均匀分布随机采样，base 本身总是第一个候选"""
+    name = "random"
+
+    def __init__(self, samples: int = 500, spread: float = 3.0, seed: Optional[int] = None):
+        self.samples = max(int(samples), 1)
+        self.spread = float(spread)
+        self.seed = seed
+
+    def budget(self) -> int:
+        return self.samples
+
+    def search(self, evaluate, base):
+        rng = np.random.default_rng(self.seed)
+        span = np.log(self.spread)
+        factors = np.exp(rng.uniform(-span, span, (self.samples, 3)))
+        factors[0] = 1.0
+        evaluate(base * factors)
+
+class CoordinateDescent(Optimizer):
+    """
+    逐个增益做一维线搜索：每轮对 kp/ki/kd 依次评估一行乘性候选并取最优，
+    一整轮没有改进时缩小步长。每行候选一次性批量评估，可并行。
+    """
+    name = "coordinate"
+
+    def __init__(self, rounds: int = 8, points: int = 9, spread: float = 2.0, shrink: float = 0.5):
+        self.rounds = max(int(rounds), 1)
+        self.points = max(int(points), 3)
+        self.spread = float(spread)
+        self.shrink = float(shrink)
+
+    def budget(self) -> int:
+        return self.rounds * 3 * self.points
+
+    def search(self, evaluate, base):
+        current = np.asarray(base, dtype=float).copy()
+        best_cost = np.inf
+        span = np.log(self.spread)
+        for _ in range(self.rounds):
+            improved = False
+            factors = np.exp(np.linspace(-span, span, self.points))
+            for axis in range(3):
+                line = np.repeat(current[np.newaxis, :], self.points, axis=0)
+                line[:, axis] *= factors
+                costs = evaluate(line)
+                i = int(np.argmin(costs))
+                if costs[i] < best_cost:
+                    improved = improved or not np.array_equal(line[i], current)
+                    best_cost = float(costs[i])
+                    current = line[i]
+            if not improved:
+                span *= self.shrink
+
+class NelderMead(Optimizer):
+    """scipy Nelder-Mead 单纯形，在对数增益空间中搜索（保证增益非负）；每步只评估一个点"""
+    name = "nelder-mead"
+
+    def __init__(self, max_evals: int = 200, xatol: float = 1e-3, fatol: float = 1e-6):
+        self.max_evals = max(int(max_evals), 1)
+        self.xatol = xatol
+        self.fatol = fatol
+
+    def budget(self) -> int:
+        return self.max_evals
+
+    def search(self, evaluate, base):
+        base = np.asarray(base, dtype=float)
+        optimize.minimize(lambda x: float(evaluate(base * np.exp(x))[0]), np.zeros(3),
+                          method="Nelder-Mead",
+                          options={"maxfev": self.max_evals, "xatol": self.xatol, "fatol": self.fatol})
+
+class DifferentialEvolution(Optimizer):
+    """
+    scipy 差分进化（种群型全局搜索）。vectorized 模式下每一代整个种群作为一批候选评估，
+    因此能充分利用进程池。
+    """
+    name = "evolution"
+
+    def __init__(self, generations: int = 30, popsize: int = 15, spread: float = 3.0, seed: Optional[int] = None):
+        self.generations = max(int(generations), 1)
+        self.popsize = max(int(popsize), 1)
+        self.spread = float(spread)
+        self.seed = seed
+
+    def budget(self) -> int:
+        return (self.generations + 1) * self.popsize * 3
+
+    def search(self, evaluate, base):
+        base = np.asarray(base, dtype=float)
+        span = np.log(self.spread)
+        # vectorized=True 时 x 的形状为 (3, S)
+        optimize.differential_evolution(lambda x: evaluate(base * np.exp(x.T)), [(-span, span)] * 3,
+                                        maxiter=self.generations, popsize=self.popsize, seed=self.seed,
+                                        polish=False, vectorized=True, updating="deferred", x0=np.zeros(3))
+
+OPTIMIZERS: Dict[str, type] = {
+    cls.name: cls for cls in (GridSearch, RandomSearch, CoordinateDescent, NelderMead, DifferentialEvolution)
+}
+
+def make_optimizer(name: str, **kwargs) -> Optimizer:
+    if name not in OPTIMIZERS:
+        raise ValueError(f"unknown optimizer: {name}")
+    return OPTIMIZERS[name](**kwargs)
+
+def run_search(problem: TuningProblem, base_pid: Dict[str, float], optimizer: Optional[Optimizer] = None,
+               executor: Optional[Executor] = None, progress: Optional[ProgressCallback] = None,
+               cancel: Optional[threading.Event] = None, chunk_size: Optional[int] = None) -> Dict:
+    """
+    执行一次搜索，返回 {"best", "candidates", "evaluations", "cancelled"}。
+    取消时保留已完成的评估，best 为其中最优者。
+    """
+    optimizer = optimizer or GridSearch()
+    evaluator = CandidateEvaluator(problem, executor, chunk_size, progress, cancel, optimizer.budget())
+    base = np.array([base_pid["kp"], base_pid["ki"], base_pid["kd"]], dtype=float)
+    cancelled = False
+    try:
+        optimizer.search(evaluator, base)
+    except TuneCancelled:
+        cancelled = True
+    if progress is not None and not cancelled:
+        # 提前收敛的优化器评估次数少于预算，结束时把进度补满
+        progress(evaluator.evaluations, evaluator.evaluations)
+    candidates = evaluator.candidates()
+    best = min(candidates, key=lambda c: c["cost"]) if candidates else {}
+    return {"best": best, "candidates": candidates, "evaluations": evaluator.evaluations, "cancelled": cancelled}
@@ -1,7 +1,8 @@
 import numpy as np
-from app.core.algo_sdk import AlgorithmBase
-from typing import Dict, Deque
-from collections import deque
+from scipy.signal import lfilter
+from app.core.algo_sdk import AlgorithmBase, RollingWindow, batch_column, batch_length
+from typing import Dict
+from app.core.quantile import WindowedSketch
 
 class FusionGuardAlgo(AlgorithmBase):
     """
@@ -9,6 +10,7 @@ class FusionGuardAlgo(AlgorithmBase):
     
     原理：
     1. 异常检测：监控输入信号的方差与突变，检测传感器故障或剧烈震荡。
+       突变阈值取自滤波残差的流式 90 分位数（noise_p90），随实际噪声水平自适应。
     2. 自适应滤波：根据信号噪声水平动态调整低通滤波器截止频率。
     3. 软限幅与保护：输出经过平滑处理，并提供建议的安全增益系数。
     """
@@ -17,32 +19,51 @@ class FusionGuardAlgo(AlgorithmBase):
         self.name = "FusionGuard Industrial Stabilizer"
         self.description = "Combines anomaly detection, adaptive filtering, and safety limiting."
         self.inputs = ["pitch", "gyro_y"] # Example inputs
-        self.outputs = ["pitch_fused", "safety_factor", "anomaly_score"]
+        self.outputs = ["pitch_fused", "safety_factor", "anomaly_score", "noise_p90"]
         
         # Internal state
         self.history_len = 50
-        self.pitch_buffer = deque(maxlen=self.history_len)
-        self.gyro_buffer = deque(maxlen=self.history_len)
+        # O(1) rolling statistics instead of np.std over a copied deque
+        self.pitch_buffer = RollingWindow(self.history_len)
+        self.gyro_buffer = RollingWindow(self.history_len)
         self.last_val = 0.0
         self.alpha = 0.1 # Default filter coefficient
+
+        # Streaming 90th percentile of the filter residual |raw - fused| (bounded memory).
+        # The sketch rotates every noise_window samples so old conditions age out.
+        self.noise_window = 2000
+        self.noise_refresh = 16 # recompute the percentile every N samples
+        # Fixed compaction seed: anomaly_score depends on the sketch, so the same input must give
+        # the same scores in every process (inline vs. plugin host).
+        self.noise_seed = 0
+        self.noise_sketch = WindowedSketch(k=128, seed=self.noise_seed)
+        self.noise_count = 0
+        self.noise_p90 = 0.0
+        # Residual spike thresholds as multiples of noise_p90 (score 0.5 / 1.0),
+        # active once the sketch has seen noise_warmup samples.
+        self.spike_k = (3.0, 6.0)
+        self.noise_warmup = 64
         
     def init(self):
-        self.pitch_buffer.clear()
-        self.gyro_buffer.clear()
+        self.pitch_buffer = RollingWindow(self.history_len)
+        self.gyro_buffer = RollingWindow(self.history_len)
         self.last_val = 0.0
+        self.noise_sketch = WindowedSketch(k=128, seed=self.noise_seed)
+        self.noise_count = 0
+        self.noise_p90 = 0.0
         
     def update(self, telemetry_data: Dict[str, float], dt: float) -> Dict[str, float]:
         # Get inputs (handle missing keys gracefully)
         raw_pitch = telemetry_data.get("pitch", 0.0)
         raw_gyro = telemetry_data.get("gyro_y", 0.0)
         
-        self.pitch_buffer.append(raw_pitch)
-        self.gyro_buffer.append(raw_gyro)
+        self.pitch_buffer.push(raw_pitch)
+        self.gyro_buffer.push(raw_gyro)
         
-        # 1. Anomaly Detection (Statistical)
+        # 1. Anomaly Detection (Statistical): sustained vibration
         anomaly_score = 0.0
-        if len(self.pitch_buffer) > 10:
-            std_dev = np.std(list(self.pitch_buffer))
+        if self.pitch_buffer.count > 10:
+            std_dev = self.pitch_buffer.std
             if std_dev > 10.0: # High vibration threshold
                 anomaly_score = 1.0
             elif std_dev > 5.0:
@@ -60,6 +81,22 @@ class FusionGuardAlgo(AlgorithmBase):
         # Apply LPF
         fused_pitch = self.last_val * (1 - self.alpha) + raw_pitch * self.alpha
         self.last_val = fused_pitch
+
+        # Residual noise level
+        residual = abs(raw_pitch - fused_pitch)
+        self.noise_sketch.update(residual)
+        self.noise_count += 1
+        if self.noise_count % self.noise_window == 0:
+            self.noise_sketch.rotate()
+        if self.noise_count % self.noise_refresh == 1:
+            self.noise_p90 = self.noise_sketch.quantile(0.9)
+
+        # Spike detection relative to the tracked noise level
+        if self.noise_count > self.noise_warmup and self.noise_p90 > 0.0:
+            if residual > self.spike_k[1] * self.noise_p90:
+                anomaly_score = 1.0
+            elif residual > self.spike_k[0] * self.noise_p90:
+                anomaly_score = max(anomaly_score, 0.5)
         
         # 3. Safety Factor
         # If anomaly detected, reduce control authority recommendation
@@ -68,8 +105,100 @@ class FusionGuardAlgo(AlgorithmBase):
         return {
             "pitch_fused": fused_pitch,
             "safety_factor": safety_factor,
-            "anomaly_score": anomaly_score
+            "anomaly_score": anomaly_score,
+            "noise_p90": self.noise_p90
+        }
+
+    def update_batch(self, columns: Dict[str, np.ndarray], dt) -> Dict[str, np.ndarray]:
+        """
+        Vectorized equivalent of update() for a block of samples.
+        The rolling std uses prefix sums over the buffered history plus the block, the alpha
+        smoother is a first-order IIR (lfilter) and the LPF is solved chunk-wise with cumulative
+        products. noise_p90 (and the spike part of anomaly_score derived from it) matches update()
+        up to the sketch's own approximation error.
+        """
+        n = batch_length(columns, dt)
+        raw_pitch = batch_column(columns, "pitch", n)
+        raw_gyro = batch_column(columns, "gyro_y", n)
+
+        # 1. Anomaly detection: std over the last min(count, history_len) samples after each push
+        history = self.pitch_buffer.values()
+        m = len(history)
+        series = np.concatenate((history, raw_pitch))
+        series = series - (series.mean() if len(series) else 0.0) # shift to limit cancellation
+        s1 = np.concatenate(([0.0], np.cumsum(series)))
+        s2 = np.concatenate(([0.0], np.cumsum(series * series)))
+        end = m + 1 + np.arange(n)
+        count = np.minimum(end, self.history_len)
+        start = end - count
+        mean = (s1[end] - s1[start]) / count
+        std_dev = np.sqrt(np.maximum((s2[end] - s2[start]) / count - mean * mean, 0.0))
+        anomaly_score = np.where(count > 10, np.where(std_dev > 10.0, 1.0, np.where(std_dev > 5.0, 0.5, 0.0)), 0.0)
+        self.pitch_buffer.extend(raw_pitch)
+        self.gyro_buffer.extend(raw_gyro)
+
+        # 2. Adaptive filtering: alpha[i] = 0.9 * alpha[i-1] + 0.1 * target[i]
+        target_alpha = 0.05 + np.minimum(np.abs(raw_gyro) / 200.0, 0.9)
+        alpha, _ = lfilter([0.1], [1.0, -0.9], target_alpha, zi=[0.9 * self.alpha])
+        fused_pitch = self._lpf_batch(raw_pitch, alpha)
+        if n:
+            self.alpha = float(alpha[-1])
+            self.last_val = float(fused_pitch[-1])
+
+        residual = np.abs(raw_pitch - fused_pitch)
+        noise_p90 = self._noise_batch(residual)
+        warm = (self.noise_count - n + 1 + np.arange(n) > self.noise_warmup) & (noise_p90 > 0.0)
+        anomaly_score = np.where(warm & (residual > self.spike_k[1] * noise_p90), 1.0,
+                                 np.where(warm & (residual > self.spike_k[0] * noise_p90),
+                                          np.maximum(anomaly_score, 0.5), anomaly_score))
+
+        # 3. Safety factor
+        return {
+            "pitch_fused": fused_pitch,
+            "safety_factor": 1.0 - anomaly_score,
+            "anomaly_score": anomaly_score,
+            "noise_p90": noise_p90
         }
 
+    def _lpf_batch(self, x: np.ndarray, alpha: np.ndarray, chunk: int = 16) -> np.ndarray:
+        # f[i] = (1 - a[i]) * f[i-1] + a[i] * x[i]; within a chunk f = P * (f0 + cumsum(a * x / P)),
+        # P = cumprod(1 - a). The chunk length keeps P well away from underflow (1 - a >= 0.05).
+        out = np.empty(len(x))
+        f = self.last_val
+        for i0 in range(0, len(x), chunk):
+            a = alpha[i0:i0 + chunk]
+            prod = np.cumprod(1.0 - a)
+            seg = prod * (f + np.cumsum(a * x[i0:i0 + chunk] / prod))
+            out[i0:i0 + chunk] = seg
+            f = seg[-1]
+        return out
+
+    def _noise_batch(self, residual: np.ndarray) -> np.ndarray:
+        # Replay update()'s schedule: rotate when count % noise_window == 0 and refresh the
+        # percentile when count % noise_refresh == 1, feeding the sketch between those events.
+        n = len(residual)
+        counts = self.noise_count + 1 + np.arange(n)
+        rotate = counts % self.noise_window == 0
+        refresh = counts % self.noise_refresh == 1
+        events = np.flatnonzero(rotate | refresh)
+        previous = self.noise_p90
+        values = np.empty(len(events))
+        start = 0
+        for j, i in enumerate(events.tolist()):
+            self.noise_sketch.update_many(residual[start:i + 1])
+            start = i + 1
+            if rotate[i]:
+                self.noise_sketch.rotate()
+            if refresh[i]:
+                self.noise_p90 = self.noise_sketch.quantile(0.9)
+            values[j] = self.noise_p90
+        self.noise_sketch.update_many(residual[start:])
+        self.noise_count += n
+        if len(events) == 0:
+            return np.full(n, previous)
+        # piecewise constant: each sample reports the last refreshed value at or before it
+        pos = np.searchsorted(events, np.arange(n), side="right") - 1
+        return np.where(pos >= 0, values[np.maximum(pos, 0)], previous)
+
     def reset(self):
         self.init()
@@ -1,5 +1,5 @@
 import numpy as np
-from app.core.algo_sdk import AlgorithmBase
+from app.core.algo_sdk import AlgorithmBase, batch_column, batch_length
 from typing import Dict, Any
 
 class GravitationalFieldGuidance(AlgorithmBase):
@@ -25,7 +25,7 @@ class GravitationalFieldGuidance(AlgorithmBase):
         super().__init__()
         self.name = "Gravitational Field Guidance (GFG)"
         self.description = "基于非线性重力场的新型物理控制律。"
-        self.inputs = ["error", "error_rate"] 
+        self.inputs = ["pitch", "gyro_y"] # 以俯仰角作为误差、陀螺仪作为误差率（见 update）
         self.outputs = ["gfg_output", "field_strength", "event_horizon_status"]
         
         # 场常数（微型宇宙的通用常数）
@@ -112,5 +112,52 @@ class GravitationalFieldGuidance(AlgorithmBase):
             "event_horizon_status": status
         }
 
+    def update_batch(self, columns: Dict[str, np.ndarray], dt) -> Dict[str, np.ndarray]:
+        """
+        向量化版本，结果与逐样本 update 一致。
+        积分项是一阶线性递推（势阱内 I += e*dt，势阱外 I *= 0.95），按块用累积乘积求解；
+        某块内触及限幅时该块退回逐样本计算。
+        """
+        n = batch_length(columns, dt)
+        error = batch_column(columns, "pitch", n)
+        velocity = batch_column(columns, "gyro_y", n)
+        dt = np.broadcast_to(np.asarray(dt, dtype=float), (n,))
+        r = np.abs(error)
+        far = r > self.R_s
+        near = r < self.R_s
+
+        f_gravity = np.where(far, -np.sign(error) * self.G * self.M, -self.G * error * (self.M / self.R_s))
+        status = far.astype(float)
+        viscosity = np.where(near, 1.0 + 5.0 * (1.0 - r / self.R_s) ** 2, 1.0)
+        f_damping = -velocity * viscosity * 0.5
+
+        integral = self._integral_batch(near, np.where(near, error * dt, 0.0))
+        u_out = np.clip(f_gravity + f_damping - self.Lambda * integral, -1000.0, 1000.0)
+        return {
+            "gfg_output": u_out,
+            "field_strength": np.abs(f_gravity),
+            "event_horizon_status": status
+        }
+
+    def _integral_batch(self, near: np.ndarray, increment: np.ndarray, chunk: int = 64) -> np.ndarray:
+        # I[i] = a[i] * I[i-1] + b[i]，a 取 1（势阱内）或 0.95（势阱外）
+        # 块内 I = P * (I0 + cumsum(b / P))，P = cumprod(a)；块长限制 P 的下界 (0.95^64 ≈ 0.04)
+        limit = self.M * 2.0
+        out = np.empty(len(near))
+        acc = float(self.integral_accum)
+        for i0 in range(0, len(near), chunk):
+            sl = slice(i0, i0 + chunk)
+            prod = np.cumprod(np.where(near[sl], 1.0, 0.95))
+            seg = prod * (acc + np.cumsum(increment[sl] / prod))
+            if np.any(np.abs(seg[near[sl]]) > limit):
+                for j in range(i0, min(i0 + chunk, len(near))):
+                    acc = np.clip(acc + increment[j], -limit, limit) if near[j] else acc * 0.95
+                    out[j] = acc
+            else:
+                out[sl] = seg
+            acc = float(out[min(i0 + chunk, len(near)) - 1])
+        self.integral_accum = acc
+        return out
+
     def reset(self):
         self.init()
@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+class JobFuture(Future):
+    """
+    后台任务句柄。cancel_event 供支持协作取消的任务函数轮询；
+    cancel() 作废任务（结果丢弃），stop() 只请求提前结束（已得到的部分结果照常送达）。
+    queued_s / elapsed_s 记录排队与执行耗时（秒）。
+    """
+    def __init__(self, key: str):
+        super().__init__()
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.submitted_at = time.perf_counter()
+        self.queued_s = 0.0
+        self.elapsed_s = 0.0
+        self._stale = False
+
+    def cancel(self) -> bool:
+        self._stale = True
+        self.cancel_event.set()
+        return super().cancel()
+
+    def stop(self):
+        self.cancel_event.set()
+
+    @property
+    def stale(self) -> bool:
+        return self._stale
+
+class _JobRunnable(QRunnable):
+    def __init__(self, runner: 'JobRunner', future: JobFuture, lock: threading.Lock,
+                 fn: Callable, args: tuple, kwargs: dict):
+        super().__init__()
+        self.runner = runner
+        self.future = future
+        self.lock = lock
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        future = self.future
+        # 同键任务串行执行：被替换的旧任务仍在运行时，新任务在此等待
+        with self.lock:
+            if future.stale or not future.set_running_or_notify_cancel():
+                self.runner._done.emit(future)
+                return
+            start = time.perf_counter()
+            future.queued_s = start - future.submitted_at
+            try:
+                result = self.fn(*self.args, **self.kwargs)
+            except BaseException as e:
+                future.elapsed_s = time.perf_counter() - start
+                future.set_exception(e)
+            else:
+                future.elapsed_s = time.perf_counter() - start
+                future.set_result(result)
+        self.runner._done.emit(future)
+
+class JobRunner(QObject):
+    """
+    在 QThreadPool 上执行分析任务，结果经信号回到主线程。
+
+    任务按 key 归类：replace=True 时提交同键的新任务会取消旧任务（旧结果即使算完也被丢弃），
+    同键任务始终串行执行，不会并发修改同一份状态。
+    with_progress=True 时任务函数额外收到 progress(done, total) 与 cancel(threading.Event) 关键字参数。
+    """
+    # 以下信号都在主线程中发出；_done/_progress 由工作线程发出，经队列连接转到主线程
+    finished = Signal(str, object, object) # key, result, JobFuture
+    failed = Signal(str, object, object)   # key, exception, JobFuture
+    progress = Signal(str, int, int)       # key, done, total
+    _done = Signal(object)
+    _progress = Signal(str, object, int, int)
+
+    def __init__(self, max_threads: int = 2, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._active: Dict[str, List[JobFuture]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._done.connect(self._on_done)
+        self._progress.connect(self._on_progress)
+
+    def submit(self, key: str, fn: Callable, *args, replace: bool = True,
+               with_progress: bool = False, **kwargs) -> JobFuture:
+        if replace:
+            self.cancel(key)
+        future = JobFuture(key)
+        if with_progress:
+            kwargs["progress"] = lambda done, total: self._progress.emit(key, future, done, total)
+            kwargs["cancel"] = future.cancel_event
+        self._active.setdefault(key, []).append(future)
+        lock = self._locks.setdefault(key, threading.Lock())
+        self.pool.start(_JobRunnable(self, future, lock, fn, args, kwargs))
+        return future
+
+    def cancel(self, key: str):
+        """取消该键下所有未完成的任务（例如输入参数已改变）"""
+        for future in self._active.get(key, []):
+            future.cancel()
+
+    def stop(self, key: str):
+        """请求该键下的任务提前结束，结果仍会送达"""
+        for future in self._active.get(key, []):
+            future.stop()
+
+    def cancel_all(self):
+        for key in list(self._active):
+            self.cancel(key)
+
+    def is_busy(self, key: str) -> bool:
+        return any(not f.stale for f in self._active.get(key, []))
+
+    def shutdown(self, timeout_ms: int = 2000):
+        self.cancel_all()
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
+
+    # 线程: 主线程
+    def _on_done(self, future: JobFuture):
+        active = self._active.get(future.key, [])
+        if future in active:
+            active.remove(future)
+        if not active:
+            self._active.pop(future.key, None)
+        if future.stale or future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.failed.emit(future.key, error, future)
+        else:
+            self.finished.emit(future.key, future.result(), future)
+
+    def _on_progress(self, key: str, future: JobFuture, done: int, total: int):
+        if not future.stale:
+            self.progress.emit(key, done, total)
@@ -3,36 +3,62 @@ import os
 import json
 import time
 import struct
+import numpy as np
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QTabWidget, QPushButton, QLabel, 
-                               QComboBox, QStatusBar, QMessageBox,
+                               QComboBox, QStatusBar, QMessageBox, QCheckBox,
                                QLineEdit, QFormLayout, QDoubleSpinBox,
-                               QTextEdit, QTableWidget, QTableWidgetItem)
+                               QTextEdit, QTableWidget, QTableWidgetItem, QProgressBar)
 from PySide6.QtCore import QTimer, Slot, Signal, QObject
 
-from app.core.serial_interface import SerialInterface
+from app.core.aio_transport import AioSerialInterface, SyncDispatcher
 from app.core.dispatcher import Dispatcher, MsgType
 from app.core.parameters import ParameterManager
+from app.core.param_transfer import parse_hello
 from app.core.protocol import Packet
 from app.core.plugin_manager import PluginManager
 from app.core.algo_sdk import ControlCompiler
+from app.core.tuning import OPTIMIZERS, make_optimizer, create_executor
+from app.core.telemetry import LatencyHistogram, TelemetryChannel, sample_intervals, wall_time
+from app.core.telemetry_schema import compile_schema
 
 from .oscilloscope import OscilloscopeWidget
 from .params_widget import ParametersWidget
 from .dashboard import DashboardWidget
+from .jobs import JobRunner
+
+# 演示固件的遥测列顺序
+TELEMETRY_COLUMNS = ("voltage", "current", "pitch", "gyro_y", "speed") # 未收到遥测字典时的默认列顺序
+NOMINAL_DT = 0.05 # 还没有可用的接收间隔时使用的 dt（20Hz）
 
 class SignalBridge(QObject):
-    telemetry_received = Signal(object) # 载荷数据（元组/列表）
     watchdog_timeout = Signal()
     export_log_received = Signal(object)
+    dictionary_received = Signal(str)
 
 class ControlCompilerWidget(QWidget):
+    log_keys_changed = Signal() # compiler.log_keys 已修改，需要更新插件订阅
+
     def __init__(self, dispatcher: Dispatcher, compiler: ControlCompiler):
         super().__init__()
         self.dispatcher = dispatcher
         self.compiler = compiler
         self.baseline_metrics = None
         self.last_tuned_pid = None
+        self.tune_executor = None
+        # 分析任务在线程池中执行，主线程只负责提交与显示，示波器刷新不受影响
+        self.jobs = JobRunner(max_threads=2, parent=self)
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.failed.connect(self.on_job_failed)
+        self.jobs.progress.connect(self.on_job_progress)
+        self.job_handlers = {
+            "model": ("模型表", self.show_model_table),
+            "tune": ("自动调参", self.show_tuning_result),
+            "feedforward": ("前馈", self.show_feedforward),
+            "compile": ("策略编译", self.show_profile),
+            "baseline": ("保存基线", self.show_baseline),
+            "report": ("对比报告", self.show_report)
+        }
 
         layout = QVBoxLayout(self)
         self.tabs = QTabWidget()
@@ -45,6 +71,19 @@ class ControlCompilerWidget(QWidget):
         self._build_compile_tab()
         self._build_report_tab()
 
+        self.job_status = QLabel("任务: 空闲")
+        layout.addWidget(self.job_status)
+
+        # 输入变化时作废仍在计算的旧任务，避免显示过期结果
+        # 分箱尺寸变化时直接重建模型表（新任务替换旧任务）
+        for box in (self.model_speed_bin, self.model_voltage_bin, self.model_temp_bin):
+            box.valueChanged.connect(self.rebin_model_table)
+        for box in (self.pid_kp, self.pid_ki, self.pid_kd, self.w_rms, self.w_overshoot,
+                    self.w_settle, self.w_sat, self.w_energy, self.w_jitter):
+            box.valueChanged.connect(self.invalidate_tuning)
+        self.tune_method.currentIndexChanged.connect(self.invalidate_tuning)
+        self.profile_id.textChanged.connect(lambda _: self.jobs.cancel("compile"))
+
     def _build_experiment_tab(self):
         tab = QWidget()
         layout = QVBoxLayout(tab)
@@ -74,6 +113,11 @@ class ControlCompilerWidget(QWidget):
         form.addRow("最大加速度", self.exp_max_accel)
         form.addRow("最大角速度", self.exp_max_yaw)
         form.addRow("最大偏离", self.exp_max_dev)
+        # 随遥测记录的插件输出（逗号分隔），留空记录全部
+        self.exp_log_keys = QLineEdit()
+        self.exp_log_keys.setPlaceholderText("全部插件输出")
+        self.exp_log_keys.editingFinished.connect(self.apply_log_keys)
+        form.addRow("记录插件输出", self.exp_log_keys)
         layout.addLayout(form)
 
         btn_row = QHBoxLayout()
@@ -104,17 +148,40 @@ class ControlCompilerWidget(QWidget):
         self.model_voltage_bin = QDoubleSpinBox()
         self.model_voltage_bin.setRange(0.5, 20)
         self.model_voltage_bin.setValue(2)
+        self.model_temp_bin = QDoubleSpinBox()
+        self.model_temp_bin.setRange(0, 50)
+        self.model_temp_bin.setValue(0)
+        self.model_temp_bin.setSpecialValueText("不分箱")
 
         form.addRow("速度分箱", self.model_speed_bin)
         form.addRow("电压分箱", self.model_voltage_bin)
+        form.addRow("温度分箱", self.model_temp_bin)
+        self.model_half_life = QDoubleSpinBox()
+        self.model_half_life.setRange(0, 3600)
+        self.model_half_life.setValue(0)
+        self.model_half_life.setSuffix(" s")
+        self.model_half_life.setSpecialValueText("不老化")
+        form.addRow("在线模型半衰期", self.model_half_life)
         layout.addLayout(form)
 
+        btn_row = QHBoxLayout()
         self.model_build_btn = QPushButton("生成模型表")
         self.model_build_btn.clicked.connect(self.build_model_table)
-        layout.addWidget(self.model_build_btn)
+        self.model_online_btn = QPushButton("读取在线模型")
+        self.model_online_btn.clicked.connect(self.show_online_model)
+        self.model_online_apply_btn = QPushButton("应用在线模型设置")
+        self.model_online_apply_btn.clicked.connect(self.apply_online_model)
+        self.model_online_reset_btn = QPushButton("重置在线模型")
+        self.model_online_reset_btn.clicked.connect(self.reset_online_model)
+        btn_row.addWidget(self.model_build_btn)
+        btn_row.addWidget(self.model_online_btn)
+        btn_row.addWidget(self.model_online_apply_btn)
+        btn_row.addWidget(self.model_online_reset_btn)
+        btn_row.addStretch()
+        layout.addLayout(btn_row)
 
-        self.model_table = QTableWidget(0, 5)
-        self.model_table.setHorizontalHeaderLabels(["速度段", "电压段", "时间常数", "延迟", "死区"])
+        self.model_table = QTableWidget(0, 6)
+        self.model_table.setHorizontalHeaderLabels(["速度段", "电压段", "温度段", "时间常数", "延迟", "死区"])
         layout.addWidget(self.model_table)
         self.tabs.addTab(tab, "模型学习")
 
@@ -161,11 +228,28 @@ class ControlCompilerWidget(QWidget):
         form.addRow("饱和权重", self.w_sat)
         form.addRow("能耗权重", self.w_energy)
         form.addRow("抖动权重", self.w_jitter)
+
+        self.tune_method = QComboBox()
+        for name, label in (("grid", "网格"), ("random", "随机"), ("coordinate", "坐标下降"),
+                            ("nelder-mead", "Nelder-Mead"), ("evolution", "差分进化")):
+            if name in OPTIMIZERS:
+                self.tune_method.addItem(label, name)
+        form.addRow("搜索策略", self.tune_method)
         layout.addLayout(form)
 
+        btn_row = QHBoxLayout()
         self.tune_btn = QPushButton("搜索最优")
         self.tune_btn.clicked.connect(self.run_tuning)
-        layout.addWidget(self.tune_btn)
+        self.tune_cancel_btn = QPushButton("取消")
+        self.tune_cancel_btn.setEnabled(False)
+        self.tune_cancel_btn.clicked.connect(self.cancel_tuning)
+        btn_row.addWidget(self.tune_btn)
+        btn_row.addWidget(self.tune_cancel_btn)
+        layout.addLayout(btn_row)
+
+        self.tune_progress = QProgressBar()
+        self.tune_progress.setValue(0)
+        layout.addWidget(self.tune_progress)
 
         self.tune_result = QTextEdit()
         self.tune_result.setReadOnly(True)
@@ -261,18 +345,99 @@ class ControlCompilerWidget(QWidget):
         self.exp_status.setText("状态: 已请求日志")
 
     def load_log_records(self, records):
-        self.compiler.logs = records
+        # 日志更换后基于旧日志的分析都已过期
+        self.invalidate_tuning()
+        for key in ("model", "baseline", "report"):
+            self.jobs.cancel(key)
+        self.compiler.load_records(records)
         self.exp_status.setText(f"状态: 已载入日志 {len(records)} 条")
 
+    def submit_job(self, key, fn, *args, **kwargs):
+        future = self.jobs.submit(key, fn, *args, **kwargs)
+        self.job_status.setText(f"任务: {self.job_handlers[key][0]} 运行中...")
+        return future
+
+    @Slot(str, object, object)
+    def on_job_finished(self, key, result, future):
+        label, handler = self.job_handlers[key]
+        self.job_status.setText(f"任务: {label} 完成，用时 {future.elapsed_s * 1e3:.1f} ms"
+                                f"（排队 {future.queued_s * 1e3:.1f} ms）")
+        handler(result)
+
+    @Slot(str, object, object)
+    def on_job_failed(self, key, error, future):
+        label = self.job_handlers[key][0]
+        self.job_status.setText(f"任务: {label} 失败 ({error})，用时 {future.elapsed_s * 1e3:.1f} ms")
+        if key == "tune":
+            self.tune_btn.setEnabled(True)
+            self.tune_cancel_btn.setEnabled(False)
+            self.tune_result.setPlainText(f"调参失败: {error}")
+
+    @Slot(str, int, int)
+    def on_job_progress(self, key, done, total):
+        if key == "tune":
+            self.tune_progress.setMaximum(max(total, 1))
+            self.tune_progress.setValue(done)
+
     def build_model_table(self):
-        table = self.compiler.build_model_table(self.model_speed_bin.value(), self.model_voltage_bin.value())
+        # 日志快照在主线程取：工作线程中读取时主线程可能正在 extend 日志
+        self.submit_job("model", self.compiler.build_model_table, self.model_speed_bin.value(),
+                        self.model_voltage_bin.value(), self.model_temp_bin.value() or None,
+                        self.compiler.logs.view())
+
+    def rebin_model_table(self, *_):
+        if self.compiler.model_table:
+            self.build_model_table()
+        else:
+            self.jobs.cancel("model")
+
+    def apply_log_keys(self):
+        keys = {k.strip() for k in self.exp_log_keys.text().split(",") if k.strip()}
+        keys = keys or None
+        if keys != self.compiler.log_keys:
+            self.compiler.log_keys = keys
+            self.log_keys_changed.emit()
+
+    def show_online_model(self):
+        # 只读：按在线模型自己的分箱显示，不受上面分箱输入框影响
+        self.show_model_table(self.compiler.online_model_table())
+
+    def apply_online_model(self):
+        """把分箱与半衰期设置应用到在线模型；分箱变化会清空已累计的统计，需要确认"""
+        online = self.compiler.online_model
+        speed_bin, voltage_bin = self.model_speed_bin.value(), self.model_voltage_bin.value()
+        if (speed_bin, voltage_bin) != (online.speed_bin, online.voltage_bin) and online.bins:
+            answer = QMessageBox.question(
+                self, "应用在线模型设置",
+                f"在线模型当前分箱为 速度 {online.speed_bin:g} / 电压 {online.voltage_bin:g}，"
+                f"改为 {speed_bin:g} / {voltage_bin:g} 将清空已累计的统计。是否继续？")
+            if answer != QMessageBox.Yes:
+                return
+        online.configure(speed_bin, voltage_bin)
+        half_life = self.model_half_life.value() or None
+        online.half_life = half_life
+        # 超过 4 个半衰期没有新样本的工况视为已过时
+        online.max_age = 4 * half_life if half_life else None
+        online.prune()
+        self.show_online_model()
+
+    def reset_online_model(self):
+        if self.compiler.online_model.bins and QMessageBox.question(
+                self, "重置在线模型", "将清空在线模型已累计的全部统计。是否继续？") != QMessageBox.Yes:
+            return
+        self.compiler.online_model.reset()
+        self.model_table.setRowCount(0)
+
+    def show_model_table(self, table):
         self.model_table.setRowCount(len(table))
         for row, item in enumerate(table):
             self.model_table.setItem(row, 0, QTableWidgetItem(f"{item['speed_bin'][0]}-{item['speed_bin'][1]}"))
             self.model_table.setItem(row, 1, QTableWidgetItem(f"{item['voltage_bin'][0]}-{item['voltage_bin'][1]}"))
-            self.model_table.setItem(row, 2, QTableWidgetItem(f"{item['tau']:.3f}"))
-            self.model_table.setItem(row, 3, QTableWidgetItem(f"{item['delay']:.3f}"))
-            self.model_table.setItem(row, 4, QTableWidgetItem(f"{item['deadzone']:.3f}"))
+            temp = item.get("temperature_bin")
+            self.model_table.setItem(row, 2, QTableWidgetItem(f"{temp[0]}-{temp[1]}" if temp else "-"))
+            self.model_table.setItem(row, 3, QTableWidgetItem(f"{item['tau']:.3f}"))
+            self.model_table.setItem(row, 4, QTableWidgetItem(f"{item['delay']:.3f}"))
+            self.model_table.setItem(row, 5, QTableWidgetItem(f"{item['deadzone']:.3f}"))
 
     def run_tuning(self):
         base_pid = {"kp": self.pid_kp.value(), "ki": self.pid_ki.value(), "kd": self.pid_kd.value()}
@@ -284,39 +449,92 @@ class ControlCompilerWidget(QWidget):
             "energy": self.w_energy.value(),
             "jitter": self.w_jitter.value()
         }
-        best = self.compiler.auto_tune(self.compiler.logs, base_pid, weight)
+        optimizer = make_optimizer(self.tune_method.currentData())
+        # 在主线程取日志快照，任务线程只读这份视图
+        self.submit_job("tune", self._tune_job, self.compiler.logs.view(), base_pid, weight, optimizer,
+                        with_progress=True)
+        self.tune_btn.setEnabled(False)
+        self.tune_cancel_btn.setEnabled(True)
+        self.tune_progress.setValue(0)
+        self.tune_result.setPlainText("搜索中...")
+
+    def _tune_job(self, samples, base_pid, weight, optimizer, progress, cancel):
+        # 线程: 任务线程；只返回结果，编译器状态在 show_tuning_result 中更新
+        return self.compiler.search_pid(samples, base_pid, weight, optimizer=optimizer,
+                                        executor=self._get_executor(), progress=progress, cancel=cancel)
+
+    def _get_executor(self):
+        # 单核机器上进程池只有开销，直接在任务线程中计算
+        if self.tune_executor is None and (os.cpu_count() or 1) > 1:
+            self.tune_executor = create_executor()
+        return self.tune_executor
+
+    def invalidate_tuning(self, *_):
+        if not self.jobs.is_busy("tune"):
+            return
+        self.jobs.cancel("tune")
+        self.tune_btn.setEnabled(True)
+        self.tune_cancel_btn.setEnabled(False)
+        self.tune_result.setPlainText("输入已变更，搜索已作废")
+
+    def cancel_tuning(self):
+        # 提前结束搜索，仍显示已评估候选中的最优解
+        self.jobs.stop("tune")
+        self.tune_cancel_btn.setEnabled(False)
+
+    def show_tuning_result(self, result):
+        self.tune_btn.setEnabled(True)
+        self.tune_cancel_btn.setEnabled(False)
+        self.compiler.store_tune(result)
+        best = result["best"]
         if not best:
-            self.tune_result.setPlainText("日志不足，无法调参")
+            self.tune_result.setPlainText("已取消" if result["cancelled"] else "日志不足，无法调参")
             return
         self.last_tuned_pid = best["pid"]
         metrics = best.get("metrics", {})
         text = {
             "pid": best["pid"],
             "metrics": metrics,
-            "cost": best.get("cost", 0.0)
+            "cost": best.get("cost", 0.0),
+            "evaluations": result["evaluations"],
+            "cancelled": result["cancelled"]
         }
         self.tune_result.setPlainText(json.dumps(text, ensure_ascii=False, indent=2))
 
+    def shutdown(self):
+        self.jobs.shutdown()
+        if self.tune_executor is not None:
+            self.tune_executor.shutdown(wait=False, cancel_futures=True)
+            self.tune_executor = None
+
     def update_feedforward(self):
-        table = self.compiler.update_feedforward(self.compiler.logs, self.ff_alpha.value())
+        # 每次点击都是一步学习，排队依次执行而不是互相替换
+        self.submit_job("feedforward", self.compiler.update_feedforward, self.compiler.logs.view(),
+                        self.ff_alpha.value(), replace=False)
+
+    def show_feedforward(self, table):
         preview = table[:50]
         self.ff_view.setPlainText(json.dumps({"size": len(table), "preview": preview}, ensure_ascii=False, indent=2))
 
+    def current_pid(self):
+        return self.last_tuned_pid or {"kp": self.pid_kp.value(), "ki": self.pid_ki.value(), "kd": self.pid_kd.value()}
+
     def compile_profile(self):
-        pid = self.last_tuned_pid or {"kp": self.pid_kp.value(), "ki": self.pid_ki.value(), "kd": self.pid_kd.value()}
-        profile = self.compiler.compile_profile(self.profile_id.text().strip(), pid)
+        self.submit_job("compile", self.compiler.compile_profile, self.profile_id.text().strip(), self.current_pid())
+
+    def show_profile(self, profile):
         self.compile_view.setPlainText(json.dumps(profile, ensure_ascii=False, indent=2))
 
     def apply_profile(self):
         if not self.compiler.profile:
-            self.compile_profile()
+            self.compiler.compile_profile(self.profile_id.text().strip(), self.current_pid())
         payload = {"profile": self.compiler.profile}
         data = json.dumps(payload).encode("utf-8")
         self.dispatcher.send(MsgType.APPLY_PROFILE, data)
 
     def export_profile(self):
         if not self.compiler.profile:
-            self.compile_profile()
+            self.compiler.compile_profile(self.profile_id.text().strip(), self.current_pid())
         profile = self.compiler.profile
         if not profile:
             self.compile_view.setPlainText("没有可导出的策略")
@@ -340,12 +558,16 @@ class ControlCompilerWidget(QWidget):
         self.compile_view.setPlainText(f"导出完成: {params_path} , {table_path}")
 
     def save_baseline(self):
-        metrics = self.compiler.compute_metrics(self.compiler.logs)
+        self.submit_job("baseline", self.compiler.compute_metrics, self.compiler.logs.view())
+
+    def show_baseline(self, metrics):
         self.baseline_metrics = metrics
         self.report_view.setPlainText(json.dumps({"baseline": metrics}, ensure_ascii=False, indent=2))
 
     def generate_report(self):
-        metrics = self.compiler.compute_metrics(self.compiler.logs)
+        self.submit_job("report", self.compiler.compute_metrics, self.compiler.logs.view())
+
+    def show_report(self, metrics):
         report = {"current": metrics}
         if self.baseline_metrics:
             report["baseline"] = self.baseline_metrics
@@ -359,21 +581,33 @@ class MainWindow(QMainWindow):
         
         # 信号桥接器（用于线程安全）
         self.signals = SignalBridge()
-        self.signals.telemetry_received.connect(self.process_telemetry)
         self.signals.watchdog_timeout.connect(self.handle_watchdog)
         self.signals.export_log_received.connect(self.process_export_log)
+        self.signals.dictionary_received.connect(self.process_dictionary)
         
         # 核心系统
-        self.serial = SerialInterface("COM3")
-        self.dispatcher = Dispatcher(self.serial)
+        # 串口收发与 ACK/看门狗定时器都在共享的 asyncio 事件循环线程中运行
+        self.serial = AioSerialInterface("COM3")
+        self.dispatcher = SyncDispatcher(self.serial)
         self.param_mgr = ParameterManager()
         self.plugin_mgr = PluginManager()
-        self.plugin_mgr.discover_plugins()
+        self.telemetry_columns = TELEMETRY_COLUMNS # 遥测块各列的名称，收到字典后按其 index 顺序
+        self.plugin_mgr.discover_plugins(self.telemetry_columns)
+        self.plugin_outputs = {} # 虚拟遥测键 -> 最近一块的插件输出列
         self.compiler = ControlCompiler()
+        # 遥测批量通道：RX 线程写入，update_ui 节拍整块取走
+        self.telemetry_channel = TelemetryChannel(channels=16, capacity=4096,
+                                                  policy=TelemetryChannel.DROP_OLDEST)
+        self._last_rx_time = None # 上一块最后一个样本的接收时刻
+        self._last_dt = NOMINAL_DT
+        # 端到端延迟：接收 -> 插件执行完成，接收 -> 示波器绘制完成
+        self.latency = {"plugin": LatencyHistogram(), "paint": LatencyHistogram()}
         
         self.dispatcher.register_telemetry_handler(self.on_telemetry)
         self.dispatcher.set_watchdog_callback(self.on_watchdog_timeout)
         self.dispatcher.register_handler(MsgType.EXPORT_LOG, self.on_export_log)
+        self.dispatcher.register_handler(MsgType.DICT_RSP, self.on_dictionary)
+        self.dispatcher.register_handler(MsgType.HELLO_RSP, self.on_hello)
         
         # UI 设置
         self.setup_ui()
@@ -404,6 +638,10 @@ class MainWindow(QMainWindow):
         top_bar.addWidget(QLabel("端口:"))
         top_bar.addWidget(self.port_combo)
         top_bar.addWidget(self.connect_btn)
+        # 插件在独立进程中执行：慢插件不阻塞界面，超时的插件自动禁用
+        self.chk_plugin_process = QCheckBox("插件独立进程")
+        self.chk_plugin_process.toggled.connect(self.toggle_plugin_process)
+        top_bar.addWidget(self.chk_plugin_process)
         top_bar.addStretch()
         
         main_layout.addLayout(top_bar)
@@ -418,6 +656,9 @@ class MainWindow(QMainWindow):
         
         # 2. 示波器标签页
         self.scope = OscilloscopeWidget()
+        # 插件输出作为虚拟通道；图例中显示的通道即为示波器的订阅
+        self.scope.set_virtual_channels(self.plugin_mgr.output_keys())
+        self.scope.channel_toggled.connect(self.on_scope_channel_toggled)
         self.tabs.addTab(self.scope, "示波器")
         
         # 3. 参数标签页
@@ -425,7 +666,10 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.params_widget, "参数")
 
         self.compiler_widget = ControlCompilerWidget(self.dispatcher, self.compiler)
+        self.compiler_widget.log_keys_changed.connect(self.update_compiler_subscription)
         self.tabs.addTab(self.compiler_widget, "Control Compiler")
+        # 编译器记录的插件输出同样是订阅，对应的插件才会执行
+        self.update_compiler_subscription()
         
         # 状态栏
         self.status_bar = QStatusBar()
@@ -453,14 +697,18 @@ class MainWindow(QMainWindow):
         # 调度字典请求
         QTimer.singleShot(500, lambda: self.dispatcher.send(MsgType.DICT_REQ, b''))
 
+    def on_hello(self, packet: Packet):
+        # 线程: 串口接收线程；新固件在 HELLO_RSP 中声明最大载荷，批量参数帧按它切分
+        mtu = parse_hello(packet.payload)
+        if mtu:
+            self.params_widget.mtu = mtu
+
     def on_telemetry(self, packet: Packet):
         # 线程: 串口接收线程
-        # 发送信号到主线程
+        # 解码进批量通道，由主线程在 update_ui 中整块取走
         try:
-            # 假设载荷为浮点数组
-            count = len(packet.payload) // 4
-            values = struct.unpack(f'<{count}f', packet.payload)
-            self.signals.telemetry_received.emit(values)
+            # 按遥测字典编译出的帧布局解码（未收到字典时为 float32 数组）
+            self.telemetry_channel.push_payload(packet.payload, packet.timestamp)
         except Exception:
             pass
 
@@ -472,50 +720,89 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
 
+    def on_dictionary(self, packet: Packet):
+        try:
+            self.signals.dictionary_received.emit(packet.payload.decode("utf-8"))
+        except Exception:
+            pass
+
     def on_watchdog_timeout(self):
         # 线程: 调度器线程
         self.signals.watchdog_timeout.emit()
 
-    @Slot(object)
-    def process_telemetry(self, values):
+    def process_telemetry_block(self, block, times=None):
         # 线程: 主线程
-        
-        # 1. 为插件准备数据字典
-        # 假设演示的固定顺序: [电压, 电流, 俯仰角, 陀螺仪Y轴, 速度]
-        telemetry_dict = {}
-        if len(values) >= 5:
-            telemetry_dict = {
-                "voltage": values[0],
-                "current": values[1],
-                "pitch": values[2],
-                "gyro_y": values[3],
-                "speed": values[4]
-            }
+        # 整块按列处理：每个插件每块只调用一次 update_batch
+        # times 为每行的接收时刻（单调时钟），插件的 dt 与编译器的时间戳都由它得到
+        if times is None:
+            times = np.full(len(block), time.perf_counter())
+        dt = sample_intervals(times, self._last_rx_time, self._last_dt)
+        if len(block):
+            self._last_rx_time = times[-1]
+            self._last_dt = dt[-1]
+        # 列名来自遥测字典；未收到字典时为演示的固定顺序 [电压, 电流, 俯仰角, 陀螺仪Y轴, 速度]
+        names = self.telemetry_columns
+        columns = {}
+        if block.shape[1] >= len(names):
+            columns = {key: block[:, i] for i, key in enumerate(names)}
             target_value = None
             if "target_spd" in self.param_mgr.params:
                 target_value = self.param_mgr.params["target_spd"].value
             elif "target_vel" in self.param_mgr.params:
                 target_value = self.param_mgr.params["target_vel"].value
             context = {"target_spd": float(target_value)} if target_value is not None else None
-            self.compiler.ingest(telemetry_dict, time.time(), context)
-            
-        # 2. 运行插件
-        for plugin in self.plugin_mgr.get_all_plugins():
-            if plugin.enabled:
-                outputs = plugin.update(telemetry_dict, 0.05) # 假设 dt=50ms
-                # 可选：可视化输出？
-                # 目前仅将 GFG 输出打印到控制台以证明其工作正常
-                if "gfg_output" in outputs:
-                    # 将其追加到值中以便示波器显示？
-                    # 让我们扩展元组以进行可视化（如果示波器支持）
-                    pass
-        
-        # 传递给示波器
-        self.scope.add_data(values)
+
+        # 按执行图运行被订阅的插件（示波器与编译器的订阅）
+        self.plugin_outputs = self.plugin_mgr.run_batch(columns, dt)
+        if self.plugin_outputs:
+            self.latency["plugin"].record(time.perf_counter() - times)
+        if columns:
+            self.compiler.ingest_batch(columns, wall_time(times), context, virtual=self.plugin_outputs)
+
+        # 整块传递给示波器，插件输出作为虚拟通道
+        self.scope.add_block(block, virtual=self.plugin_outputs)
         
         # 传递给仪表盘 (例如第一个值是电压)
-        if len(values) > 0:
-            self.dashboard.update_voltage(values[0])
+        if block.shape[1] > 0:
+            self.dashboard.update_voltage(block[-1, 0])
+
+    def toggle_plugin_process(self, checked):
+        if not checked:
+            self.plugin_mgr.stop_host()
+            return
+        try:
+            self.plugin_mgr.start_host()
+        except Exception as e:
+            self.status_bar.showMessage(f"插件进程启动失败: {e}", 5000)
+            self.chk_plugin_process.setChecked(False)
+
+    @Slot(str, bool)
+    def on_scope_channel_toggled(self, key, visible):
+        if visible:
+            self.plugin_mgr.subscribe("scope", [key])
+        else:
+            self.plugin_mgr.unsubscribe("scope", [key])
+
+    @Slot()
+    def update_compiler_subscription(self):
+        self.plugin_mgr.unsubscribe("compiler")
+        self.plugin_mgr.subscribe("compiler", self.compiler.log_subscription(self.plugin_mgr.output_keys()))
+
+    @Slot(str)
+    def process_dictionary(self, json_data):
+        self.param_mgr.load_dictionary(json_data)
+        self.params_widget.rebuild_tree()
+        # 遥测帧按字典编译出的布局解码（可含 int16 / 定点字段），列名随之更新
+        schema = compile_schema(self.param_mgr.telemetry)
+        self.telemetry_channel.schema = schema
+        names = tuple(schema.names) if schema is not None else TELEMETRY_COLUMNS
+        if names != self.telemetry_columns:
+            self.telemetry_columns = names
+            self.plugin_mgr.set_sources(names)
+            self.scope.set_virtual_channels(self.plugin_mgr.output_keys())
+            self.update_compiler_subscription()
+        # 示波器通道数与名称跟随遥测字典
+        self.scope.configure(self.param_mgr.telemetry)
 
     @Slot(object)
     def process_export_log(self, records):
@@ -527,11 +814,35 @@ class MainWindow(QMainWindow):
         self.status_bar.showMessage("看门狗超时 - 连接丢失？", 5000)
         # 在此处理安全逻辑
 
+    def closeEvent(self, event):
+        self.compiler_widget.shutdown()
+        self.plugin_mgr.stop_host()
+        self.dispatcher.close()
+        self.serial.close()
+        super().closeEvent(event)
+
     def update_ui(self):
+        block, times = self.telemetry_channel.drain_timed()
+        if len(block) > 0:
+            self.process_telemetry_block(block, times)
         self.scope.update_plot()
+        if len(block) > 0:
+            self.latency["paint"].record(time.perf_counter() - times)
         # 更新连接统计信息
         stats = self.serial.stats
-        self.status_bar.showMessage(f"TX: {stats['tx_packets']} | RX: {stats['rx_packets']} | ERR: {stats['rx_errors']}")
+        q = self.telemetry_channel.stats
+        message = (f"TX: {stats['tx_packets']} | RX: {stats['rx_packets']} | ERR: {stats['rx_errors']}"
+                   f" | 队列峰值: {q['high_water']} | 丢弃: {q['dropped']}")
+        paint = self.latency["paint"]
+        if paint.count:
+            message += f" | 延迟 p50/p99: {paint.quantile(0.5) * 1e3:.1f}/{paint.quantile(0.99) * 1e3:.1f} ms"
+        # 正在执行的插件的每样本耗时
+        active = self.plugin_mgr.active_plugins()
+        if active:
+            timing = self.plugin_mgr.timing()
+            message += " | 插件: " + ", ".join(f"{name} {timing[name]['us_per_sample']:.1f}us"
+                                               for name in active if name in timing)
+        self.status_bar.showMessage(message)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -1,51 +1,177 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QCheckBox
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QCheckBox, QLabel, QSpinBox
+from PySide6.QtCore import Qt, Signal
 import pyqtgraph as pg
 import numpy as np
-from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.lod import MinMaxPyramid
 
 class OscilloscopeWidget(QWidget):
+    COLORS = ['r', 'g', 'b', 'c', 'm', 'y', 'w']
+    DEFAULT_CHANNELS = 6
+    DEFAULT_HISTORY = 300_000 # 1kHz 下约 5 分钟
+    # 虚拟通道（插件输出）显示状态变化：键, 是否显示。点击图例切换；隐藏的虚拟通道不订阅、插件不执行
+    channel_toggled = Signal(str, bool)
+
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout(self)
-        
+
         # 控制
         ctrl_layout = QHBoxLayout()
         self.btn_pause = QPushButton("暂停")
         self.btn_pause.setCheckable(True)
         ctrl_layout.addWidget(self.btn_pause)
+        self.chk_follow = QCheckBox("跟随最新")
+        self.chk_follow.setChecked(True)
+        self.chk_follow.toggled.connect(self._mark_view_dirty)
+        ctrl_layout.addWidget(self.chk_follow)
+        ctrl_layout.addWidget(QLabel("历史点数:"))
+        self.history_spin = QSpinBox()
+        self.history_spin.setRange(1000, 50_000_000)
+        self.history_spin.setSingleStep(100_000)
+        self.history_spin.setValue(self.DEFAULT_HISTORY)
+        self.history_spin.editingFinished.connect(self._on_history_changed)
+        ctrl_layout.addWidget(self.history_spin)
         ctrl_layout.addStretch()
         self.layout.addLayout(ctrl_layout)
-        
+
         # 绘图
         self.plot_widget = pg.PlotWidget()
         self.plot_widget.showGrid(x=True, y=True)
         self.plot_widget.addLegend()
         self.layout.addWidget(self.plot_widget)
-        
+        # x 轴为绝对样本序号；手动平移/缩放时退出跟随，视图变化时按新范围重新取 LOD
+        self.view_box = self.plot_widget.getPlotItem().getViewBox()
+        self.view_box.enableAutoRange(x=False)
+        self.view_box.sigRangeChangedManually.connect(self._on_manual_range)
+        self.view_box.sigXRangeChanged.connect(self._mark_view_dirty)
+        self.view_span = self.DEFAULT_HISTORY # 跟随模式下显示的样本跨度
+
         # 数据
-        self.history_size = 1000
+        self.history_size = self.DEFAULT_HISTORY
+        self.channel_names: List[str] = [f"通道{i}" for i in range(self.DEFAULT_CHANNELS)]
+        self.virtual_keys: List[str] = [] # 排在遥测通道之后的插件输出通道
+        self.virtual_visible: Set[str] = set()
+        self.curves = []
+        self.buffer: Optional[MinMaxPyramid] = None
+        self._drawn = np.zeros(0, dtype=np.int64) # 各通道上次绘制时的 generation
+        self._view_dirty = True
+        self._following = False # 正在由跟随逻辑设置范围
+        self._rebuild()
+
+    def configure(self, telemetry: Dict[str, object], history_size: Optional[int] = None):
+        """
+        按遥测字典 (ParameterManager.telemetry) 重建通道，按 index 排序。
+        history_size 为空时保留当前设置。
+        """
+        defs = sorted(telemetry.values(), key=lambda t: t.index)
+        if defs:
+            self.channel_names = [f"{t.name} ({t.unit})" if t.unit else t.name for t in defs]
+        if history_size:
+            self.history_size = int(history_size)
+            self.history_spin.setValue(self.history_size)
+        self._rebuild()
+
+    def set_virtual_channels(self, keys: Iterable[str]):
+        """设置插件输出通道（默认隐藏）；列表变化时重建"""
+        keys = list(keys)
+        if keys != self.virtual_keys:
+            self.virtual_keys = keys
+            self.virtual_visible &= set(keys)
+            self._rebuild()
+
+    def _on_history_changed(self):
+        if self.history_spin.value() != self.history_size:
+            self.history_size = self.history_spin.value()
+            self.view_span = self.history_size
+            self._rebuild()
+
+    def _on_manual_range(self, *args):
+        if self.chk_follow.isChecked():
+            self.chk_follow.setChecked(False)
+        self._mark_view_dirty()
+
+    def _mark_view_dirty(self, *args):
+        if not self._following:
+            self._view_dirty = True
+
+    def _rebuild(self):
+        self.plot_widget.clear()
+        legend = self.plot_widget.plotItem.legend
+        if legend is not None:
+            legend.clear()
+        channels = len(self.channel_names) + len(self.virtual_keys)
         self.curves = []
-        self.data_buffers = []
-        
-        # 设置初始通道（实际应用中将是动态的）
-        colors = ['r', 'g', 'b', 'c', 'm', 'y']
-        for i in range(6):
-            curve = self.plot_widget.plot(pen=colors[i], name=f"通道{i}")
+        for i, name in enumerate(self.channel_names):
+            curve = self.plot_widget.plot(pen=self.COLORS[i % len(self.COLORS)], name=name)
             self.curves.append(curve)
-            self.data_buffers.append(deque(maxlen=self.history_size))
-            
+        for j, key in enumerate(self.virtual_keys):
+            pen = pg.mkPen(self.COLORS[(len(self.channel_names) + j) % len(self.COLORS)], style=Qt.DashLine)
+            curve = self.plot_widget.plot(pen=pen, name=f"{key} (插件)")
+            curve.setVisible(key in self.virtual_visible)
+            curve.visibleChanged.connect(lambda i=len(self.curves), k=key: self._on_curve_visibility(i, k))
+            self.curves.append(curve)
+        self.buffer = MinMaxPyramid(channels, self.history_size)
+        self._drawn = np.zeros(channels, dtype=np.int64)
+        self._view_dirty = True
+
+    def _on_curve_visibility(self, i: int, key: str):
+        self._drawn[i] = -1 # 隐藏期间未绘制，重新显示时强制重绘
+        visible = self.curves[i].isVisible()
+        if visible != (key in self.virtual_visible):
+            if visible:
+                self.virtual_visible.add(key)
+            else:
+                self.virtual_visible.discard(key)
+            self.channel_toggled.emit(key, visible)
+
     def add_data(self, values):
+        self.add_block(np.asarray(values, dtype=np.float32)[np.newaxis, :])
+
+    def add_block(self, block: np.ndarray, valid: Optional[int] = None,
+                  virtual: Optional[Dict[str, np.ndarray]] = None):
+        """追加 (rows × channels) 样本块；virtual 为本块的插件输出列，未提供的虚拟通道补 NaN"""
         if self.btn_pause.isChecked():
             return
-            
-        for i, val in enumerate(values):
-            if i < len(self.data_buffers):
-                self.data_buffers[i].append(val)
-                
+        if self.virtual_keys:
+            real = len(self.channel_names)
+            rows = len(block)
+            merged = np.full((rows, real + len(self.virtual_keys)), np.nan, dtype=np.float32)
+            cols = min(block.shape[1], real) if block.ndim == 2 else 0
+            merged[:, :cols] = block[:, :cols]
+            for j, key in enumerate(self.virtual_keys):
+                col = (virtual or {}).get(key)
+                if col is not None:
+                    merged[:, real + j] = col
+            block, valid = merged, None
+        self.buffer.append(block, valid)
+
     def update_plot(self):
-        if self.btn_pause.isChecked():
+        buf = self.buffer
+        paused = self.btn_pause.isChecked()
+        if buf.total == 0 or (paused and not self._view_dirty):
             return
-            
+        if self.chk_follow.isChecked() and not paused:
+            x1 = buf.total
+            x0 = max(buf.raw.oldest, x1 - self.view_span)
+            self._following = True
+            self.view_box.setXRange(x0, x1, padding=0)
+            self._following = False
+        else:
+            (x0, x1), _ = self.view_box.viewRange()
+            if not self.chk_follow.isChecked():
+                self.view_span = max(int(x1 - x0), 1)
+        # 每个像素最多一个 min/max 对，绘制开销与历史长度无关
+        pixels = max(int(self.view_box.width()), 100)
+        view_dirty = self._view_dirty
+        self._view_dirty = False
         for i, curve in enumerate(self.curves):
-            if i < len(self.data_buffers) and len(self.data_buffers[i]) > 0:
-                curve.setData(list(self.data_buffers[i]))
+            if not curve.isVisible():
+                continue
+            gen = buf.generation[i]
+            if gen == self._drawn[i] and not view_dirty:
+                continue # 自上一帧以来没有新数据且视图未变
+            self._drawn[i] = gen
+            x, y = buf.query(i, int(x0), int(np.ceil(x1)) + 1, pixels)
+            curve.setData(x, y)
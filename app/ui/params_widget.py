@@ -1,12 +1,23 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QHeaderView, QPushButton, QHBoxLayout, QDoubleSpinBox
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QHeaderView, QPushButton, QHBoxLayout, QDoubleSpinBox, QLabel
 from app.core.parameters import ParameterManager
 from app.core.dispatcher import Dispatcher, MsgType
+from app.core.param_transfer import DEFAULT_PARAM_MTU, ParamTransfer
 
 class ParametersWidget(QWidget):
+    # 批量下发的进度/结果来自 ACK 处理线程，经信号回到主线程
+    transfer_progress = Signal(int, int)
+    transfer_finished = Signal(bool)
+
     def __init__(self, param_mgr: ParameterManager, dispatcher: Dispatcher):
         super().__init__()
         self.param_mgr = param_mgr
         self.dispatcher = dispatcher
+        self.mtu = DEFAULT_PARAM_MTU # 握手时由 HELLO_RSP 更新
+        self.window = 4
+        self.transfer: ParamTransfer = None
+        self.transfer_progress.connect(self.show_transfer_progress)
+        self.transfer_finished.connect(self.show_transfer_result)
         
         layout = QVBoxLayout(self)
         
@@ -16,9 +27,14 @@ class ParametersWidget(QWidget):
         refresh_btn.clicked.connect(self.request_dict)
         save_btn = QPushButton("保存到 Flash")
         save_btn.clicked.connect(self.save_params)
+        self.push_btn = QPushButton("下发全部参数")
+        self.push_btn.clicked.connect(self.push_params)
+        self.transfer_label = QLabel("")
         
         btn_layout.addWidget(refresh_btn)
         btn_layout.addWidget(save_btn)
+        btn_layout.addWidget(self.push_btn)
+        btn_layout.addWidget(self.transfer_label)
         btn_layout.addStretch()
         layout.addLayout(btn_layout)
         
@@ -34,6 +50,27 @@ class ParametersWidget(QWidget):
     def save_params(self):
         self.dispatcher.send(MsgType.PARAM_SAVE, b'', need_ack=True)
 
+    def push_params(self):
+        """把全部可写参数的当前值打包成批量 PARAM_SET 帧，按滑动窗口下发"""
+        if self.transfer is not None and self.transfer.ok is None:
+            return
+        entries = self.param_mgr.get_param_entries({name: p.value for name, p in self.param_mgr.params.items()})
+        self.push_btn.setEnabled(False)
+        self.transfer = ParamTransfer(self.dispatcher, entries, self.mtu, self.window,
+                                      on_done=self.transfer_finished.emit, on_progress=self.transfer_progress.emit)
+        self.transfer.start()
+
+    def show_transfer_progress(self, acked: int, total: int):
+        self.transfer_label.setText(f"{acked}/{total}")
+
+    def show_transfer_result(self, ok: bool):
+        self.push_btn.setEnabled(True)
+        t = self.transfer
+        if ok:
+            self.transfer_label.setText(f"已下发 {t.total_params} 个参数 ({t.elapsed * 1e3:.0f} ms)")
+        else:
+            self.transfer_label.setText(f"下发失败: {t.acked_params}/{t.total_params} 已确认")
+
     def rebuild_tree(self):
         self.tree.clear()
         
@@ -26,10 +26,47 @@ void Protocol_ProcessRx(void) {
     // Decode COBS
     // Check CRC
     // Switch(msg_type)
-    //   Case PARAM_SET: Update Param, Send ACK
+    //   Case HELLO_REQ: Protocol_SendHello(hdr.seq)
+    //   Case PARAM_SET: Protocol_HandleParamSet(hdr.seq, payload, hdr.payload_len)
     //   Case DICT_REQ: Send JSON Dict
 }
 
+static void Protocol_SendFrame(uint8_t msg_type, uint16_t seq, const uint8_t *payload, uint16_t len) {
+    // FrameHeader{1, msg_type, seq, 0, len} + payload + CRC16
+    // COBS Encode into tx_buffer, append 0x00
+    // HAL_UART_Transmit_DMA
+}
+
+void Protocol_SendAck(uint16_t seq) {
+    uint8_t payload[2] = { (uint8_t)(seq & 0xFF), (uint8_t)(seq >> 8) };
+    Protocol_SendFrame(MSG_ACK, seq, payload, sizeof(payload));
+}
+
+void Protocol_SendHello(uint16_t seq) {
+    HelloRsp rsp = { .max_payload = PROTOCOL_MAX_PAYLOAD };
+    Protocol_SendFrame(MSG_HELLO_RSP, seq, (const uint8_t *)&rsp, sizeof(rsp));
+}
+
+// Batched PARAM_SET: apply every entry, then ACK the frame once.
+// The host keeps several frames in flight and retransmits only the unacked ones, so a
+// frame may arrive twice when an ACK is lost; writes are absolute values and safe to repeat.
+// Unknown or read-only ids are skipped; a malformed frame is not ACKed.
+bool Protocol_HandleParamSet(uint16_t seq, const uint8_t *payload, uint16_t len) {
+    if (len < 1) {
+        return false;
+    }
+    uint8_t count = payload[0];
+    if (count > PARAM_SET_MAX_ENTRIES || len < 1 + count * sizeof(ParamEntry)) {
+        return false;
+    }
+    const ParamEntry *entries = (const ParamEntry *)(payload + 1);
+    for (uint8_t i = 0; i < count; i++) {
+        Param_Write(entries[i].id, entries[i].value);
+    }
+    Protocol_SendAck(seq);
+    return true;
+}
+
 void Protocol_SendTelemetry(void) {
     // Pack data
     // FrameHeader + Payload + CRC
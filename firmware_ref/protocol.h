@@ -4,6 +4,11 @@
 #define RX_BUFFER_SIZE 1024
 #define TX_BUFFER_SIZE 1024
 
+// Largest payload accepted in one frame; announced to the host in HELLO_RSP
+#define PROTOCOL_MAX_PAYLOAD 256
+#define PARAM_VALUE_SIZE 4
+#define PARAM_SET_MAX_ENTRIES ((PROTOCOL_MAX_PAYLOAD - 1) / sizeof(ParamEntry))
+
 typedef enum {
     MSG_HELLO_REQ = 0x01,
     MSG_HELLO_RSP = 0x02,
@@ -11,6 +16,7 @@ typedef enum {
     MSG_DICT_RSP  = 0x04,
     MSG_PARAM_SET = 0x05,
     MSG_PARAM_GET = 0x06,
+    MSG_PARAM_VAL = 0x07,
     MSG_TELEMETRY = 0x08,
     MSG_ACK       = 0x0A,
     MSG_ERROR     = 0x0B,
@@ -28,7 +34,23 @@ typedef struct {
     uint16_t payload_len;
 } __attribute__((packed)) FrameHeader;
 
+// PARAM_SET payload: uint8_t count, then count entries
+typedef struct {
+    uint16_t id;
+    uint8_t value[PARAM_VALUE_SIZE]; // little-endian float / int32 / uint32, per the dictionary type
+} __attribute__((packed)) ParamEntry;
+
+// HELLO_RSP payload
+typedef struct {
+    uint16_t max_payload;
+} __attribute__((packed)) HelloRsp;
+
+// Provided by the parameter table; returns false for unknown / read-only ids
+bool Param_Write(uint16_t id, const uint8_t value[PARAM_VALUE_SIZE]);
+
 void Protocol_Init(void);
 void Protocol_ProcessRx(void);
 void Protocol_SendTelemetry(void);
 void Protocol_SendAck(uint16_t seq);
+void Protocol_SendHello(uint16_t seq);
+bool Protocol_HandleParamSet(uint16_t seq, const uint8_t *payload, uint16_t len);
@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from app.ui.main_window import MainWindow
 
@@ -21,4 +22,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # 调参进程池与插件宿主进程使用 spawn，打包后的 exe 需要由此进入子进程入口
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,129 @@
+"""
+ACK 定时器基准：对比基线 Dispatcher（维护线程每 50ms 持锁扫描全部待确认包）与当前两种实现：
+- wheel:   Dispatcher，AckTracker + 时间轮定时器（不经过事件循环的链路，如 tools 中的模拟下位机）；
+- asyncio: SyncDispatcher -> AsyncDispatcher，AckTracker + loop.call_later，即界面实际使用的路径。
+  每次 send() 都要跨线程提交到事件循环并等待返回，us/packet 含这次往返。
+
+链路为空实现，不走串口：
+- 超时精度：发出 --timeouts 个需要 ACK 的包且不回 ACK（不重发），统计从发送到失败回调的时间
+  与 200ms 期望值之差；
+- 批量确认：一次发出 --outstanding 个需要 ACK 的包（超时 5 s，不会到期）后逐个模拟 ACK，
+  统计每包发送 + 确认的开销，以及在全部包挂起期间后台线程的 CPU 占比。
+
+用法: python -m tools.bench_ack_timers [--timeouts 200] [--outstanding 5000]
+"""
+import argparse
+import struct
+import threading
+import time
+
+import numpy as np
+
+from app.core.aio_transport import SyncDispatcher, shared_loop_thread
+from app.core.dispatcher import DEFAULT_RETRY_POLICY, Dispatcher, RetryPolicy
+from app.core.protocol import MsgType, Packet
+
+class NullLink:
+    def set_callback(self, callback):
+        self.callback = callback
+
+    def send(self, packet: Packet):
+        pass
+
+class NullAioLink(NullLink):
+    """SyncDispatcher 需要链路提供事件循环线程"""
+    def __init__(self):
+        self.loop_thread = shared_loop_thread()
+
+class LegacyDispatcher(Dispatcher):
+    """基线实现：每 50ms 持锁遍历全部待确认包检查超时（超时取该消息类型的 RetryPolicy，不重发）"""
+    def __init__(self, link):
+        super().__init__(link)
+        self._watchdog.cancel()
+        self.legacy = {}
+        self.legacy_lock = threading.Lock()
+        threading.Thread(target=self._maintenance_loop, daemon=True).start()
+
+    def send(self, msg_type, payload=b'', need_ack=False, callback=None, policy=None):
+        seq = self._next_seq()
+        if need_ack:
+            with self.legacy_lock:
+                timeout = (policy or self.acks.retry_policies.get(msg_type, DEFAULT_RETRY_POLICY)).timeout
+                self.legacy[seq] = {'ts': time.perf_counter(), 'cb': callback, 'timeout': timeout}
+        self.serial.send(Packet(msg_type, payload, seq=seq))
+        return seq
+
+    def _handle_ack(self, packet):
+        acked_seq = struct.unpack('<H', packet.payload[:2])[0]
+        with self.legacy_lock:
+            req = self.legacy.pop(acked_seq, None)
+            if req and req['cb']:
+                req['cb'](True)
+
+    def _maintenance_loop(self):
+        while self.running:
+            now = time.perf_counter()
+            with self.legacy_lock:
+                for seq, req in list(self.legacy.items()):
+                    if now - req['ts'] > req['timeout']:
+                        self.legacy.pop(seq)
+                        req['cb'](False)
+            time.sleep(0.05)
+
+def deliver(d, packets):
+    """模拟收到一批包：asyncio 实现在事件循环线程中处理（与实际串口接收相同），其余直接回调"""
+    if isinstance(d, SyncDispatcher):
+        d.loop_thread.call(lambda: [d.core._on_packet_received(p) for p in packets])
+    else:
+        for p in packets:
+            d._on_packet_received(p)
+
+def measure(make, link, args) -> dict:
+    d = make(link)
+    # 批量确认阶段的超时足够长，保证挂起期间没有包超时（asyncio 实现发送 5000 包约需 0.3 s）
+    d.set_retry_policy(MsgType.PARAM_GET, RetryPolicy(timeout=0.2, retries=0))
+    d.set_retry_policy(MsgType.PARAM_SET, RetryPolicy(timeout=5.0, retries=0))
+    try:
+        # 超时精度
+        lateness = []
+        done = threading.Semaphore(0)
+        for i in range(args.timeouts):
+            start = time.perf_counter()
+            d.send(MsgType.PARAM_GET, b'', need_ack=True,
+                   callback=lambda ok, start=start: (lateness.append(time.perf_counter() - start - 0.2), done.release()))
+            time.sleep(0.003)
+        for _ in range(args.timeouts):
+            done.acquire()
+        lateness = np.asarray(lateness) * 1e3
+
+        # 批量确认
+        seqs = []
+        start = time.perf_counter()
+        for _ in range(args.outstanding):
+            seqs.append(d.send(MsgType.PARAM_SET, b'', need_ack=True, callback=lambda ok: None))
+        hold0 = time.process_time()
+        time.sleep(0.15) # 全部挂起期间
+        hold_cpu = (time.process_time() - hold0) / 0.15 * 100
+        deliver(d, [Packet(MsgType.ACK, struct.pack('<H', seq)) for seq in seqs])
+        per_packet = (time.perf_counter() - start - 0.15) / args.outstanding * 1e6
+    finally:
+        d.close()
+    return {"p50": np.median(lateness), "p99": np.percentile(lateness, 99), "max": lateness.max(),
+            "per_packet": per_packet, "hold_cpu": hold_cpu}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--timeouts", type=int, default=200)
+    parser.add_argument("--outstanding", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'impl':>10}{'late p50 ms':>13}{'late p99 ms':>13}{'late max':>10}{'us/packet':>11}{'hold CPU %':>12}")
+    impls = (("baseline", LegacyDispatcher, NullLink), ("wheel", Dispatcher, NullLink),
+             ("asyncio", SyncDispatcher, NullAioLink))
+    for label, make, link in impls:
+        r = measure(make, link(), args)
+        print(f"{label:>10}{r['p50']:>13.2f}{r['p99']:>13.2f}{r['max']:>10.2f}"
+              f"{r['per_packet']:>11.2f}{r['hold_cpu']:>12.1f}")
+
+if __name__ == "__main__":
+    main()
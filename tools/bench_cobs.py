@@ -0,0 +1,140 @@
+"""
+COBS 编解码器校验与吞吐基准。
+
+先用随机数据（含全零、长非零段、畸形输入）对照旧实现做性质校验，
+再对 16B 遥测帧与 4KB JSON 帧输出 MB/s。
+
+用法: python -m tools.bench_cobs [--cases 2000] [--seconds 0.5]
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from app.core import cobs
+
+def legacy_encode(data: bytes) -> bytes:
+    """基线版本逐字节编码，作为对照"""
+    out = bytearray()
+    code_idx = 0
+    code = 1
+    out.append(0)
+    for byte in data:
+        if byte == 0:
+            out[code_idx] = code
+            code = 1
+            code_idx = len(out)
+            out.append(0)
+        else:
+            out.append(byte)
+            code += 1
+            if code == 0xFF:
+                out[code_idx] = code
+                code = 1
+                code_idx = len(out)
+                out.append(0)
+    out[code_idx] = code
+    return bytes(out)
+
+def legacy_decode(data: bytes) -> bytes:
+    """基线版本 _cobs_decode_simple，作为语义对照"""
+    res = bytearray()
+    i = 0
+    while i < len(data):
+        code = data[i]
+        i += 1
+        if code == 0:
+            break
+        chunk = data[i:i + code - 1]
+        res.extend(chunk)
+        i += len(chunk)
+        if code < 0xFF and i < len(data):
+            res.append(0)
+    return bytes(res)
+
+def legacy_decode_double(data: bytes) -> bytes:
+    """基线 cobs_decode 的实际开销：先逐字节解码一遍并丢弃，再调用 _cobs_decode_simple"""
+    out = bytearray()
+    idx = 0
+    while idx < len(data):
+        code = data[idx]
+        idx += 1
+        if code == 0:
+            break
+        for _ in range(code - 1):
+            if idx >= len(data):
+                break
+            out.append(data[idx])
+            idx += 1
+        if code < 0xFF and idx < len(data):
+            out.append(0)
+    return legacy_decode(data)
+
+def _random_payload(rng: random.Random) -> bytes:
+    kind = rng.randrange(4)
+    n = rng.choice([0, 1, 2, 253, 254, 255, 508, rng.randrange(2000)])
+    if kind == 0:
+        return bytes(rng.randrange(256) for _ in range(n))
+    if kind == 1:
+        return bytes(n)
+    if kind == 2:
+        return bytes(rng.randrange(1, 256) for _ in range(n))
+    return bytes(rng.choice([0, 0, 1, 0xFF]) for _ in range(n))
+
+def check(cases: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(cases):
+        data = _random_payload(rng)
+        enc = cobs.encode(data)
+        assert enc == legacy_encode(data), data
+        assert b"\x00" not in enc
+        assert len(enc) <= cobs.max_encoded_len(len(data))
+        assert cobs.decode(enc) == data
+        out = bytearray(len(enc) + 8)
+        n = cobs.decode_into(memoryview(enc), memoryview(out)[4:])
+        assert bytes(out[4:4 + n]) == data
+        # 畸形输入（截断、内嵌零）必须与旧实现逐字节一致
+        junk = bytes(rng.randrange(256) for _ in range(rng.randrange(64)))
+        assert cobs.decode(junk) == legacy_decode(junk), junk
+        cut = enc[:rng.randrange(len(enc) + 1)]
+        assert cobs.decode(cut) == legacy_decode(cut), cut
+    print(f"性质校验通过: {cases} 组")
+
+def _throughput(func, data, seconds: float) -> float:
+    loops = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        func(data)
+        loops += 1
+        elapsed = time.perf_counter() - start
+    return loops * len(data) / elapsed / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args = parser.parse_args()
+    check(args.cases)
+
+    telemetry = os.urandom(16)
+    records = [{"t": i * 0.005, "speed": i % 300, "voltage": 12.0, "target_spd": 100} for i in range(80)]
+    json_frame = json.dumps({"records": records}).encode("utf-8")[:4096]
+    frames = {"telemetry16": telemetry, "json4k": json_frame}
+
+    out = bytearray(8192)
+    print(f"{'frame':<12}{'legacy enc':>14}{'encode':>14}{'legacy dec':>14}{'decode':>14}{'decode_into':>14}")
+    for name, raw in frames.items():
+        enc = cobs.encode(raw)
+        row = [
+            _throughput(legacy_encode, raw, args.seconds),
+            _throughput(cobs.encode, raw, args.seconds),
+            _throughput(legacy_decode_double, enc, args.seconds),
+            _throughput(cobs.decode, enc, args.seconds),
+            _throughput(lambda d: cobs.decode_into(d, out), enc, args.seconds),
+        ]
+        print(f"{name:<12}" + "".join(f"{v:>9.2f}MB/s" for v in row))
+
+if __name__ == "__main__":
+    main()
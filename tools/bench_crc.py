@@ -0,0 +1,43 @@
+"""
+CRC-16 后端微基准：校验各后端与参考实现一致，并输出 MB/s。
+
+用法: python -m tools.bench_crc [--sizes 16,256,4096,65536] [--seconds 0.5]
+"""
+import argparse
+import os
+import time
+
+from app.core import crc
+
+def _throughput(func, data: bytes, seconds: float) -> float:
+    loops = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        func(data)
+        loops += 1
+        elapsed = time.perf_counter() - start
+    return loops * len(data) / elapsed / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="16,256,4096,65536")
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args = parser.parse_args()
+    sizes = [int(x) for x in args.sizes.split(",")]
+
+    for size in sizes:
+        data = os.urandom(size)
+        expected = crc.crc16_bitwise(data)
+        for name, func in crc.BACKENDS.items():
+            if func(data) != expected:
+                raise SystemExit(f"后端 {name} 结果不一致 (size={size})")
+
+    print(f"当前后端: {crc.active_backend}")
+    print(f"{'backend':<10}" + "".join(f"{s:>12}B" for s in sizes))
+    for name, func in crc.BACKENDS.items():
+        row = [_throughput(func, os.urandom(s), args.seconds) for s in sizes]
+        print(f"{name:<10}" + "".join(f"{v:>10.2f}MB/s" for v in row))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+分帧器回放基准：对比基线 _process_buffer 与 FrameDeframer。
+
+回放一段录制的串口字节流（或按 --record 生成的模拟流：200Hz 遥测帧、
+偶发 DICT_RSP/EXPORT_LOG 大帧和无分隔符的噪声突发），分别按固定读取块
+大小和一次性整段读取两种方式送入，输出帧数与 MB/s。
+
+用法:
+    python -m tools.bench_deframer --record stream.bin --mb 4
+    python -m tools.bench_deframer --input stream.bin [--chunk 4096]
+"""
+import argparse
+import json
+import os
+import random
+import struct
+import time
+
+from app.core.deframer import FrameDeframer
+from app.core.protocol import Packet, MsgType
+
+def synth_stream(target_bytes: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    out = bytearray()
+    seq = 0
+    while len(out) < target_bytes:
+        seq = (seq + 1) & 0xFFFF
+        roll = rng.random()
+        if roll < 0.002:
+            records = [{"t": i * 0.005, "speed": rng.uniform(0, 300), "voltage": 12.0} for i in range(400)]
+            payload = json.dumps({"records": records}).encode("utf-8")[:0xFFFF]
+            out += Packet(MsgType.EXPORT_LOG, payload, seq=seq).serialize()
+        elif roll < 0.004:
+            out += bytes(rng.randrange(1, 256) for _ in range(rng.randrange(100, 3000)))
+        else:
+            values = [rng.uniform(-100, 100) for _ in range(6)]
+            out += Packet(MsgType.TELEMETRY, struct.pack('<6f', *values), seq=seq).serialize()
+    return bytes(out)
+
+class LegacyBuffer:
+    """基线 SerialInterface._process_buffer 的逐帧前删实现"""
+    def __init__(self, on_frame):
+        self.rx_buffer = bytearray()
+        self.on_frame = on_frame
+
+    def feed(self, data):
+        self.rx_buffer.extend(data)
+        while b'\x00' in self.rx_buffer:
+            idx = self.rx_buffer.index(b'\x00')
+            frame_data = self.rx_buffer[:idx]
+            del self.rx_buffer[:idx + 1]
+            if len(frame_data) > 0:
+                self.on_frame(frame_data)
+
+def _run(make_feeder, stream: bytes, chunk: int, parse: bool):
+    count = [0, 0]
+
+    def on_frame(frame):
+        if parse:
+            try:
+                Packet.parse(frame)
+            except Exception:
+                count[1] += 1
+        count[0] += 1
+
+    feed = make_feeder(on_frame)
+    view = memoryview(stream)
+    start = time.perf_counter()
+    for pos in range(0, len(stream), chunk):
+        feed(view[pos:pos + chunk])
+    elapsed = time.perf_counter() - start
+    return count[0], count[1], len(stream) / elapsed / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="录制的原始字节流文件")
+    parser.add_argument("--record", help="生成模拟流并写入该文件")
+    parser.add_argument("--mb", type=float, default=4.0)
+    parser.add_argument("--chunk", type=int, default=4096)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as f:
+            stream = f.read()
+    else:
+        stream = synth_stream(int(args.mb * 1e6))
+        if args.record:
+            with open(args.record, "wb") as f:
+                f.write(stream)
+    print(f"流长度: {len(stream) / 1e6:.2f} MB")
+
+    feeders = {
+        "legacy": lambda cb: LegacyBuffer(cb).feed,
+        "deframer": lambda cb: (lambda data, d=FrameDeframer(): d.feed(data, cb)),
+    }
+    for chunk in (args.chunk, len(stream)):
+        for parse in (False, True):
+            label = f"chunk={chunk} parse={'on' if parse else 'off'}"
+            for name, make in feeders.items():
+                if name == "legacy" and chunk == len(stream) and len(stream) > 1e6:
+                    # 整段读取时基线为 O(n^2)，只回放前 1MB 估算
+                    frames, errors, mbps = _run(make, stream[:1000000], chunk, parse)
+                    name += "(1MB)"
+                else:
+                    frames, errors, mbps = _run(make, stream, chunk, parse)
+                print(f"{label:<28}{name:<16}{frames:>8} 帧 {errors:>5} 错误 {mbps:>9.2f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+批量 PID 仿真基准：校验 simulate_pid_batch 与标量 _simulate_pid + compute_metrics
+在浮点容差内一致，并测量 C 个候选 × n 点参考信号的耗时。
+
+用法: python -m tools.bench_pid_sim [--candidates 2000] [--samples 10000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.core.algo_sdk import ControlCompiler
+from app.core.log_store import LogView
+from app.core.pid_sim import simulate_pid_batch
+
+def _reference(n: int, dt: float):
+    times = np.arange(n) * dt
+    r = np.where((np.arange(n) // 500) % 2 == 0, 20.0, 100.0)
+    return times, r
+
+def check(compiler: ControlCompiler, times, r, tau, dt, u_limit, pids):
+    sim = simulate_pid_batch(r, times, tau, dt, pids[:, 0], pids[:, 1], pids[:, 2], u_limit)
+    for i, (kp, ki, kd) in enumerate(pids):
+        ys, us = compiler._simulate_pid(r, tau, dt, {"kp": kp, "ki": ki, "kd": kd}, u_limit)
+        ref = compiler.compute_metrics(LogView({"t": times, "speed": np.asarray(ys), "target_spd": r}, len(ys)))
+        ref["saturation"] = float(np.mean(np.abs(us) >= 0.98 * u_limit))
+        for k, v in ref.items():
+            if not np.isclose(sim[k][i], v, rtol=1e-9, atol=1e-9):
+                raise SystemExit(f"候选 {i} 指标 {k} 不一致: batch={sim[k][i]} scalar={v}")
+    print(f"一致性校验通过: {len(pids)} 个候选")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=10000)
+    args = parser.parse_args()
+
+    dt, tau, u_limit = 0.005, 0.3, 100.0
+    compiler = ControlCompiler()
+    rng = np.random.default_rng(0)
+
+    times, r = _reference(2000, dt)
+    check(compiler, times, r, tau, dt, u_limit, rng.uniform([0.1, 0.0, 0.0], [5.0, 2.0, 0.5], (8, 3)))
+
+    times, r = _reference(args.samples, dt)
+    pids = rng.uniform([0.1, 0.0, 0.0], [5.0, 2.0, 0.5], (args.candidates, 3))
+    start = time.perf_counter()
+    simulate_pid_batch(r, times, tau, dt, pids[:, 0], pids[:, 1], pids[:, 2], u_limit)
+    batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiler._simulate_pid(r, tau, dt, {"kp": pids[0, 0], "ki": pids[0, 1], "kd": pids[0, 2]}, u_limit)
+    scalar = time.perf_counter() - start
+    print(f"{args.candidates} 候选 × {args.samples} 点: batch {batch:.3f} s, "
+          f"标量估计 {scalar * args.candidates:.1f} s (单个 {scalar * 1e3:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
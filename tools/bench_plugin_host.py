@@ -0,0 +1,58 @@
+"""
+插件宿主进程基准：同一组内置插件在主线程内执行与在独立进程中执行（共享内存环 + 每块一条管道消息）
+的每块耗时对比，并校验两种方式的输出一致（noise_p90 除外，见 bench_plugins）。
+
+用法: python -m tools.bench_plugin_host [--blocks 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.core.plugin_manager import PluginManager
+from tools.bench_plugins import APPROX, make_columns
+
+SOURCES = ("voltage", "current", "pitch", "gyro_y", "speed")
+
+def make_manager() -> PluginManager:
+    mgr = PluginManager()
+    mgr.discover_plugins(SOURCES)
+    mgr.subscribe("bench", mgr.output_keys())
+    return mgr
+
+def run(mgr: PluginManager, columns: dict, block: int, blocks: int):
+    outputs = []
+    times = []
+    for b in range(blocks):
+        chunk = {k: v[b * block:(b + 1) * block] for k, v in columns.items()}
+        start = time.perf_counter()
+        outputs.append(mgr.run_batch(chunk, np.full(block, 0.05)))
+        times.append(time.perf_counter() - start)
+    return outputs, np.asarray(times) * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'block':>8}{'inline ms':>12}{'hosted ms':>12}{'hosted p99':>12}{'late':>6}")
+    for block in (32, 256, 2048):
+        columns = make_columns(block * args.blocks, np.random.default_rng(0))
+        inline_out, inline_t = run(make_manager(), columns, block, args.blocks)
+        mgr = make_manager()
+        # 宿主等待上限放宽到 1 s，保证每块都有结果可比较
+        mgr.start_host(timeout=1.0, deadline=1.0)
+        try:
+            hosted_out, hosted_t = run(mgr, columns, block, args.blocks)
+            late = mgr.host.stats["late"] + mgr.host.stats["dropped"]
+        finally:
+            mgr.stop_host()
+        for a, b in zip(inline_out, hosted_out):
+            for key, value in a.items():
+                if key not in APPROX and not np.allclose(value, b.get(key, np.nan)):
+                    raise SystemExit(f"块 {block}: {key} 宿主进程结果与主线程不一致")
+        print(f"{block:>8}{np.median(inline_t):>12.3f}{np.median(hosted_t):>12.3f}"
+              f"{np.percentile(hosted_t, 99):>12.3f}{late:>6}")
+
+if __name__ == "__main__":
+    main()
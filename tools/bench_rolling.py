@@ -0,0 +1,90 @@
+"""
+滑动窗口统计基准：RollingWindow / RollingMinMax 与 np.std(list(deque)) / min(deque) 的逐样本开销对比，
+窗口 50 ~ 50k。同时校验滚动结果与直接计算一致，以及长时间运行（均值很大）时方差不漂移。
+
+用法: python -m tools.bench_rolling [--samples 20000]
+"""
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from app.core.algo_sdk import RollingMinMax, RollingWindow
+
+def _per_sample_us(fn, values) -> float:
+    start = time.perf_counter()
+    fn(values)
+    return (time.perf_counter() - start) / len(values) * 1e6
+
+# 每个构造函数返回 (fill, run)：fill 只填充窗口、不计算统计量，用于预热
+def legacy_std(size):
+    buf = deque(maxlen=size)
+    def run(values):
+        for x in values:
+            buf.append(x)
+            np.std(list(buf))
+    return buf.extend, run
+
+def rolling_std(size):
+    win = RollingWindow(size)
+    def run(values):
+        for x in values:
+            win.push(x)
+            win.std
+    return (lambda values: [win.push(x) for x in values]), run
+
+def legacy_minmax(size):
+    buf = deque(maxlen=size)
+    def run(values):
+        for x in values:
+            buf.append(x)
+            min(buf)
+            max(buf)
+    return buf.extend, run
+
+def rolling_minmax(size):
+    mm = RollingMinMax(size)
+    def run(values):
+        for x in values:
+            mm.push(x)
+            mm.min
+            mm.max
+    return (lambda values: [mm.push(x) for x in values]), run
+
+def check(size: int, rng):
+    values = (1e6 + rng.standard_normal(size * 5 + 123)).tolist()
+    win = RollingWindow(size)
+    mm = RollingMinMax(size)
+    for x in values:
+        win.push(x)
+        mm.push(x)
+    tail = np.asarray(values[-size:])
+    if not np.isclose(win.std, tail.std(), rtol=1e-6):
+        raise SystemExit(f"窗口 {size}: std 不一致 {win.std} vs {tail.std()}")
+    if mm.min != tail.min() or mm.max != tail.max():
+        raise SystemExit(f"窗口 {size}: min/max 不一致")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'window':>8}{'np.std us':>12}{'rolling us':>12}{'min/max us':>12}{'mono us':>10}")
+    for size in (50, 500, 5000, 50000):
+        check(size, rng)
+        values = rng.standard_normal(size + args.samples).tolist()
+        warm, timed = values[:size], values[size:]
+        # 基线在大窗口下每样本毫秒级，只测一部分样本
+        legacy_n = max(200, min(args.samples, 2_000_000 // size))
+        results = []
+        for make, n in ((legacy_std, legacy_n), (rolling_std, args.samples),
+                        (legacy_minmax, legacy_n), (rolling_minmax, args.samples)):
+            fill, run = make(size)
+            fill(warm)
+            results.append(_per_sample_us(run, timed[:n]))
+        print(f"{size:>8}{results[0]:>12.2f}{results[1]:>12.2f}{results[2]:>12.2f}{results[3]:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+示波器帧时间基准。
+
+跟随模式：每帧追加 33 行（约 1kHz 遥测的一个 30Hz 节拍），执行 update_plot 并强制重绘；
+平移/缩放：在全部历史上随机设置视图范围后重绘。
+报告每通道 1k / 100k / 1M / 10M 点时的平均帧时间，并给出基线 deque + list() 方案的对照
+（基线只测到 1M 点）。
+开始前先用随机长度的块（含超过容量的块）追加，逐级与暴力计算的 min/max 比对。
+
+用法: QT_QPA_PLATFORM=offscreen python -m tools.bench_scope [--frames 30]
+"""
+import argparse
+import sys
+import time
+from collections import deque
+
+import numpy as np
+from PySide6.QtWidgets import QApplication
+
+from app.core.lod import MinMaxPyramid
+from app.ui.oscilloscope import OscilloscopeWidget
+
+LEGACY_LIMIT = 1_000_000
+
+def _legacy_frame(curves, buffers, block):
+    for row in block:
+        for i, val in enumerate(row):
+            buffers[i].append(val)
+    for i, curve in enumerate(curves):
+        curve.setData(list(buffers[i]))
+
+def _make_scope(history: int) -> OscilloscopeWidget:
+    scope = OscilloscopeWidget()
+    scope.history_size = history
+    scope.view_span = history
+    scope._rebuild()
+    scope.resize(1280, 720)
+    scope.show()
+    return scope
+
+def _timed(app, scope, step, frames: int) -> float:
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        step()
+        scope.plot_widget.repaint()
+        app.processEvents()
+        times.append(time.perf_counter() - start)
+    return float(np.mean(times[1:] or times)) * 1e3
+
+def bench(app, history: int, frames: int):
+    rng = np.random.default_rng(0)
+    channels = OscilloscopeWidget.DEFAULT_CHANNELS
+    fill = rng.standard_normal((history, channels)).astype(np.float32)
+    block = rng.standard_normal((33, channels)).astype(np.float32)
+    result = {}
+
+    if history <= LEGACY_LIMIT:
+        scope = _make_scope(1000)
+        buffers = [deque(fill[:, i], maxlen=history) for i in range(channels)]
+        scope.chk_follow.setChecked(False)
+        result["legacy"] = _timed(app, scope, lambda: _legacy_frame(scope.curves, buffers, block),
+                                  max(3, frames // 10) if history > 100_000 else frames)
+        scope.close()
+
+    scope = _make_scope(history)
+    scope.add_block(fill)
+
+    def follow():
+        scope.add_block(block)
+        scope.update_plot()
+    result["follow"] = _timed(app, scope, follow, frames)
+
+    scope.chk_follow.setChecked(False)
+    total = scope.buffer.total
+
+    def pan_zoom():
+        span = int(rng.integers(100, total))
+        x0 = int(rng.integers(0, total - span + 1))
+        scope.view_box.setXRange(x0, x0 + span, padding=0)
+        scope.update_plot()
+    result["pan_zoom"] = _timed(app, scope, pan_zoom, frames)
+    scope.close()
+    return result
+
+def check_pyramid(trials: int = 200):
+    """随机块长（可超过容量）追加后，原始环与各级 min/max 必须与完整历史的暴力结果一致"""
+    rng = np.random.default_rng(0)
+    for trial in range(trials):
+        pyramid = MinMaxPyramid(2, int(rng.integers(16, 400)), factor=4, min_blocks=4, dtype=np.float64)
+        cap = pyramid.capacity
+        history = np.empty((0, 2))
+        for _ in range(6):
+            block = rng.normal(size=(int(rng.integers(1, 2 * cap + 2)), 2))
+            history = np.concatenate((history, block))
+            pyramid.append(block)
+            total, oldest = pyramid.raw.total, pyramid.raw.oldest
+            if not np.array_equal(pyramid.raw.read(oldest, total), history[oldest:total].T):
+                raise SystemExit(f"原始环错位: cap={cap} n={len(block)}")
+            for k in range(1, pyramid.levels + 1):
+                size = pyramid.factor ** k
+                b0, b1 = -(-oldest // size), -(-total // size)
+                if b1 <= b0:
+                    continue
+                mins = pyramid._level_read(pyramid._mins[k], k, b0, b1)
+                maxs = pyramid._level_read(pyramid._maxs[k], k, b0, b1)
+                for b in range(b0, b1):
+                    seg = history[b * size:min((b + 1) * size, total)]
+                    if not (np.allclose(mins[:, b - b0], seg.min(axis=0)) and np.allclose(maxs[:, b - b0], seg.max(axis=0))):
+                        raise SystemExit(f"第 {k} 级块 {b} 的 min/max 错误: cap={cap} n={len(block)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--sizes", default="1000,100000,1000000,10000000")
+    args = parser.parse_args()
+    check_pyramid()
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{'points/ch':>12}{'legacy ms':>12}{'follow ms':>12}{'pan/zoom ms':>14}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        r = bench(app, size, args.frames)
+        legacy = f"{r['legacy']:>12.2f}" if "legacy" in r else f"{'-':>12}"
+        print(f"{size:>12}{legacy}{r['follow']:>12.2f}{r['pan_zoom']:>14.2f}")
+
+if __name__ == "__main__":
+    main()
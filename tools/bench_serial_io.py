@@ -0,0 +1,115 @@
+"""
+串口收发基准（pyserial loop:// 回环）：对比基线（TX 每 1ms 轮询队列、每包一次 write，RX read 新分配）
+与当前实现（条件变量唤醒、积压包合并写入、RX readinto 复用缓冲区），以及 asyncio 实现
+（AioSerialInterface；loop:// 没有文件描述符，走读线程回退路径）。
+
+- 空闲 CPU：连接后不收发，统计 --idle 秒内进程 CPU 时间占比；
+- 命令往返：逐个发送 PARAM_GET 包，回环后由 RX 回调收到即计一次往返，报告 p50/p99；
+- 突发写入：一次提交 --burst 个包，统计 write 调用次数与全部收回的耗时。
+
+用法: python -m tools.bench_serial_io [--idle 2] [--rounds 500] [--burst 1000]
+"""
+import argparse
+import struct
+import threading
+import time
+
+import numpy as np
+
+from app.core.protocol import MsgType, Packet
+from app.core.aio_transport import AioSerialInterface
+from app.core.serial_interface import SerialInterface
+
+class LegacySerialInterface(SerialInterface):
+    """基线实现：sleep 轮询的 TX 线程，每包一次 write；RX 每次 read 分配新 bytes"""
+    def send(self, packet: Packet):
+        self.tx_queue.append(packet)
+
+    def close(self):
+        self.running = False
+        super().close()
+
+    def _tx_loop(self):
+        while self.running:
+            if not self.tx_queue:
+                time.sleep(0.001)
+                continue
+            try:
+                packet = self.tx_queue.popleft()
+                data = packet.serialize()
+                if self.serial and self.serial.is_open:
+                    self.serial.write(data)
+                    self.stats['tx_packets'] += 1
+                    self.stats['tx_writes'] += 1
+                    self.stats['bytes_sent'] += len(data)
+            except Exception:
+                self.connected = False
+
+    def _rx_loop(self):
+        while self.running:
+            try:
+                data = self.serial.read(self.serial.in_waiting or 1)
+                if data:
+                    self._rx_time = time.perf_counter()
+                    self.stats['bytes_received'] += len(data)
+                    self.deframer.feed(data, self._handle_frame)
+            except Exception:
+                if not self.running:
+                    break
+
+def measure(cls, args) -> dict:
+    iface = cls("loop://")
+    received = threading.Semaphore(0)
+    iface.set_callback(lambda packet: received.release())
+    if not iface.open():
+        raise SystemExit("无法打开 loop://")
+    try:
+        # 空闲 CPU
+        time.sleep(0.2)
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        time.sleep(args.idle)
+        idle_cpu = (time.process_time() - cpu0) / (time.perf_counter() - wall0) * 100
+
+        # 命令往返
+        rtt = []
+        payload = struct.pack('<H', 1)
+        for i in range(args.rounds):
+            start = time.perf_counter()
+            iface.send(Packet(MsgType.PARAM_GET, payload, seq=i & 0xFFFF))
+            if not received.acquire(timeout=1.0):
+                raise SystemExit(f"{cls.__name__}: 第 {i} 个包未收回")
+            rtt.append(time.perf_counter() - start)
+        rtt = np.asarray(rtt) * 1e3
+
+        # 突发写入
+        writes0 = iface.stats['tx_writes']
+        packets = [Packet(MsgType.PARAM_GET, payload, seq=i & 0xFFFF) for i in range(args.burst)]
+        start = time.perf_counter()
+        for packet in packets:
+            iface.send(packet)
+        for _ in range(args.burst):
+            if not received.acquire(timeout=5.0):
+                raise SystemExit(f"{cls.__name__}: 突发包未全部收回")
+        burst_ms = (time.perf_counter() - start) * 1e3
+        writes = iface.stats['tx_writes'] - writes0
+    finally:
+        iface.close()
+    return {"idle_cpu": idle_cpu, "p50": np.median(rtt), "p99": np.percentile(rtt, 99),
+            "burst_ms": burst_ms, "writes": writes}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--idle", type=float, default=2.0)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--burst", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'impl':>10}{'idle CPU %':>12}{'rtt p50 ms':>12}{'rtt p99 ms':>12}{'burst ms':>10}{'writes':>8}")
+    for label, cls in (("baseline", LegacySerialInterface), ("current", SerialInterface),
+                       ("asyncio", AioSerialInterface)):
+        r = measure(cls, args)
+        print(f"{label:>10}{r['idle_cpu']:>12.2f}{r['p50']:>12.3f}{r['p99']:>12.3f}"
+              f"{r['burst_ms']:>10.1f}{r['writes']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+遥测解码基准：对比基线（每包 struct.unpack 新格式化的 '<{n}f' 格式串，再按固定顺序建 dict）
+与按遥测字典编译的 TelemetrySchema（单样本帧用预编译的 struct.Struct，多样本帧用 np.frombuffer 结构化 dtype）。
+
+布局: float32 × 字段数，以及 int16 定点（scale 0.01）× 字段数；报告每样本字节数、
+单样本帧的解码耗时（decode_sample）与 --batch 个样本一帧时的每样本耗时（decode），并校验定点解码误差不超过 scale/2。
+另校验多样本帧的各行时刻均匀分布在帧间隔内，sample_intervals 得到真实的每样本 dt；
+以及 push_rows / push_payload 的整帧切片写入与逐行 push 的结果一致（两种背压策略、环形绕回、超过容量的帧）。
+
+用法: python -m tools.bench_telemetry_decode [--fields 5] [--frames 20000] [--batch 16]
+"""
+import argparse
+import struct
+import time
+
+import numpy as np
+
+from app.core.parameters import TelemetryDef
+from app.core.telemetry import TelemetryChannel, sample_intervals
+from app.core.telemetry_schema import compile_schema
+
+NAMES = ("voltage", "current", "pitch", "gyro_y", "speed")
+
+def make_defs(n: int, type_name: str, scale: float):
+    names = [NAMES[i] if i < len(NAMES) else f"ch{i}" for i in range(n)]
+    return {name: TelemetryDef(name=name, type=type_name, unit="", group="", index=i, scale=scale)
+            for i, name in enumerate(names)}
+
+def legacy_decode(payload: bytes, names) -> dict:
+    count = len(payload) // 4
+    values = struct.unpack(f'<{count}f', payload)
+    return {name: values[i] for i, name in enumerate(names) if i < count}
+
+def per_frame_us(fn, payloads) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        fn(payload)
+    return (time.perf_counter() - start) / len(payloads) * 1e6
+
+def check_frame_timing(samples: int = 4, period: float = 0.004, frames: int = 4):
+    """每帧 samples 个样本、帧间隔 period：除首帧外每个样本的 dt 都应为 period / samples"""
+    schema = compile_schema(make_defs(len(NAMES), "int16", 0.01))
+    channel = TelemetryChannel(channels=16)
+    channel.schema = schema
+    payload = schema.encode(np.zeros((samples, len(NAMES))))
+    for i in range(frames):
+        channel.push_payload(payload, 100.0 + i * period)
+    _, times = channel.drain_timed()
+    dt = sample_intervals(times, None, 0.05)[samples:]
+    if not np.allclose(dt, period / samples):
+        raise SystemExit(f"多样本帧的 dt 错误: {np.round(dt, 4)}")
+
+def check_push_rows(trials: int = 200):
+    """随机帧序列下整帧写入与逐行 push（时刻取自 _row_times）的排队内容、时刻与统计一致"""
+    rng = np.random.default_rng(1)
+    for trial in range(trials):
+        policy = (TelemetryChannel.DROP_OLDEST, TelemetryChannel.COALESCE)[trial % 2]
+        capacity = int(rng.integers(1, 12))
+        channels = int(rng.integers(2, 8))
+        fields = int(rng.integers(1, 10))
+        schema = compile_schema(make_defs(fields, ("float32", "int16")[trial % 3 == 0], (1.0, 0.01)[trial % 3 == 0]))
+        channel = TelemetryChannel(channels, capacity, policy)
+        channel.schema = schema
+        ref = TelemetryChannel(channels, capacity, policy)
+        for i in range(30):
+            n = int(rng.integers(1, 2 * capacity + 2))
+            data = rng.uniform(-100, 100, (n, fields))
+            stamp = 10.0 + i * 0.01
+            if rng.random() < 0.5:
+                rows = data
+                channel.push_rows(rows, stamp)
+            else:
+                payload = schema.encode(data)
+                rows = schema.decode(payload)
+                channel.push_payload(payload, stamp)
+            times = ref._row_times(stamp, n)
+            for row, t in zip(rows, times):
+                ref.push(row, t)
+            if rng.random() < 0.2 or i == 29:
+                got, want = channel.drain_timed(), ref.drain_timed()
+                if not (np.array_equal(got[0], want[0], equal_nan=True) and np.allclose(got[1], want[1])
+                        and channel.stats == ref.stats):
+                    raise SystemExit(f"整帧写入与逐行 push 不一致: policy={policy} capacity={capacity} "
+                                     f"channels={channels} fields={fields} frame={i}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fields", type=int, default=5)
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+
+    check_frame_timing()
+    check_push_rows()
+    rng = np.random.default_rng(0)
+    data = rng.uniform(-100, 100, (args.frames, args.fields))
+    names = tuple(make_defs(args.fields, "float32", 1.0))
+
+    print(f"{'decoder':>22}{'bytes/sample':>14}{'us/frame':>10}{'us/sample (batch)':>19}{'max err':>10}")
+    float_payloads = [struct.pack(f'<{args.fields}f', *row) for row in data]
+    us = per_frame_us(lambda p: legacy_decode(p, names), float_payloads)
+    print(f"{'baseline struct+dict':>22}{4 * args.fields:>14}{us:>10.2f}{'-':>19}{'-':>10}")
+
+    for label, type_name, scale in (("schema float32", "float32", 1.0), ("schema int16 x0.01", "int16", 0.01)):
+        schema = compile_schema(make_defs(args.fields, type_name, scale))
+        payloads = [schema.encode(row) for row in data]
+        batches = [schema.encode(data[i:i + args.batch]) for i in range(0, args.frames, args.batch)]
+        us = per_frame_us(schema.decode_sample, payloads)
+        us_batch = per_frame_us(schema.decode, batches) / args.batch
+        decoded = np.concatenate([schema.decode(p) for p in batches])
+        err = np.abs(decoded - data).max()
+        bound = scale / 2 if type_name.startswith("int") else 1e-4 * np.abs(data).max()
+        if err > bound + 1e-9:
+            raise SystemExit(f"{label}: 解码误差 {err} 超过 {bound}")
+        print(f"{label:>22}{schema.frame_size:>14}{us:>10.2f}{us_batch:>19.3f}{err:>10.4f}")
+
+    # 通道写入：旧路径与 schema 路径的 push_payload
+    channel = TelemetryChannel(channels=16, capacity=args.frames + 1)
+    us_legacy = per_frame_us(channel.push_payload, float_payloads)
+    channel = TelemetryChannel(channels=16, capacity=args.frames + 1)
+    channel.schema = compile_schema(make_defs(args.fields, "int16", 0.01))
+    payloads = [channel.schema.encode(row) for row in data]
+    us_schema = per_frame_us(channel.push_payload, payloads)
+    channel = TelemetryChannel(channels=16, capacity=args.frames + 1)
+    channel.schema = compile_schema(make_defs(args.fields, "int16", 0.01))
+    batches = [channel.schema.encode(data[i:i + args.batch]) for i in range(0, args.frames, args.batch)]
+    us_batch = per_frame_us(channel.push_payload, batches) / args.batch
+    print(f"push_payload us/frame: float32 {us_legacy:.2f}, int16 schema {us_schema:.2f}; "
+          f"us/sample (batch) {us_batch:.3f}")
+
+if __name__ == "__main__":
+    main()